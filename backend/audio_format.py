@@ -0,0 +1,88 @@
+# backend/audio_format.py
+"""
+Stream format shared by TX and RX (config keys audio_encoding, audio_channels,
+audio_ptime_us). Everything is 48 kHz; AES67 packet-time profiles (latency and load
+notes are estimates from the packet rate, not measurements):
+
+  ptime    samples/pkt  pkts/s/stream  notes (estimated)
+  4 ms     192          250            AES67 "media" profile; lowest CPU and network load,
+                                       adds ~4 ms at the sender. Safe on shared/Wi-Fi LANs.
+  1 ms     48           1000           AES67 default profile; ~3 ms less end-to-end than 4 ms,
+                                       about 4x the packet rate/IRQ load. Dedicated wired LAN.
+  250 us   12           4000           AES67 "333/250 us" class option; ~0.75 ms less than
+                                       1 ms at 4x its packet rate. Wired LAN, Pi 4/5 class CPU;
+                                       12-byte header per 24 bytes of L16 mono.
+  125 us   6            8000           AES67 low-latency profile; sub-ms packetisation but
+                                       8000 pkt/s per talker: plan on a dedicated switch and
+                                       a Pi 4/5 class CPU, and expect header overhead to
+                                       dominate bandwidth (12-byte header per 12 bytes of L16).
+
+Actual end-to-end latency and CPU load depend on the jitterbuffer latency and the audio device;
+measure them on the target hardware with the latency probe (see README).
+"""
+
+RATE = 48000
+ENCODINGS = {"L16": 2, "L24": 3}       # bytes per sample on the wire
+PTIMES_US = (4000, 1000, 250, 125)     # 250 us is the AES67 "333/250 us" class option
+DEFAULT_FORMAT = {"encoding": "L16", "channels": 1, "ptime_us": 4000}
+
+
+def stream_format(cfg: dict) -> dict:
+    """Validated format from config; unknown values fall back to L16/mono/4 ms."""
+    enc = str(cfg.get("audio_encoding") or "L16").upper()
+    if enc not in ENCODINGS:
+        enc = "L16"
+    try:
+        ch = int(cfg.get("audio_channels") or 1)
+    except Exception:
+        ch = 1
+    ch = 2 if ch == 2 else 1
+    try:
+        ptime = int(cfg.get("audio_ptime_us") or 4000)
+    except Exception:
+        ptime = 4000
+    if ptime not in PTIMES_US:
+        ptime = 4000
+    return {"encoding": enc, "channels": ch, "ptime_us": ptime}
+
+
+def ptime_ns(fmt):
+    return fmt["ptime_us"] * 1000
+
+
+def samples_per_packet(fmt):
+    return RATE * fmt["ptime_us"] // 1_000_000
+
+
+def packet_bytes(fmt):
+    """RTP packet size including the 12-byte header."""
+    return 12 + samples_per_packet(fmt) * fmt["channels"] * ENCODINGS[fmt["encoding"]]
+
+
+def rtp_caps(fmt):
+    return (f"application/x-rtp,media=audio,encoding-name={fmt['encoding']},clock-rate={RATE},"
+            f"channels={fmt['channels']}")
+
+
+def wire_raw_format(fmt):
+    """Big-endian raw format the payloader expects."""
+    return "S24BE" if fmt["encoding"] == "L24" else "S16BE"
+
+
+def payloader(fmt):
+    return "rtpL24pay" if fmt["encoding"] == "L24" else "rtpL16pay"
+
+
+def mix_raw_format(fmt):
+    """Internal mixing format: audiomixer has no packed 24-bit, so L24 mixes in S32."""
+    return "S32LE" if fmt["encoding"] == "L24" else "S16LE"
+
+
+def mix_buffer_ns(fmt):
+    """Mixer output buffer duration: shorter buffers for low ptime, at the cost of more wakeups."""
+    return {4000: 10_000_000, 1000: 2_000_000}.get(fmt["ptime_us"], 1_000_000)
+
+
+def capture_latency_us(fmt):
+    """alsasrc latency-time: keep the 4 ms profile's conservative 20 ms; go small for low ptime."""
+    return 20000 if fmt["ptime_us"] >= 4000 else max(1000, fmt["ptime_us"])
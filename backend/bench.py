@@ -0,0 +1,256 @@
+# backend/bench.py
+"""
+RX benchmark: drives the real RxPartylineWorker with loadgen.py talkers and writes a
+JSON report per invocation, so versions can be compared on the same hardware.
+
+  python bench.py --talkers 1,4,8,16 --seconds 30 [--ptime-us 4000] [--jitter-ms 0]
+      [--loss-pct 0] [--jb-ms 100] [--out bench-results] [--baseline old.json]
+
+For each talker count: start RX on a loopback group, start the generator in a separate
+process (so its CPU is not charged to RX), skip a warm-up, then measure
+  - RX process CPU (total and per talker)
+  - packets sent vs counted, per-talker loss, jitterbuffer late/lost drops
+  - mix continuity: 10 ms blocks of the mix that fell silent while every talker sends
+    a continuous tone
+  - metrics accuracy: metrics_snapshot() (what /rx/metrics serves) against the
+    generator's own counts and nominal packet rate
+With --baseline, runs are compared by talker count. The exit status is 1 when CPU per
+talker rises by more than 20%, when loss rises by more than 0.1 points, or when the
+number of mix gaps goes up.
+"""
+import argparse
+import array
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from audio_format import stream_format
+from rx_worker import RxPartylineWorker
+
+HERE = Path(__file__).resolve().parent
+
+
+class MixContinuity:
+    """Counts silent 10 ms blocks in the mix tap once signal has started (peak, not RMS: C-level min/max only)."""
+    BLOCK_SEC = 0.01
+    SILENT_PEAK = 33  # about -60 dBFS
+
+    def __init__(self, channels=1):
+        self.channels = channels
+        self.block = int(48000 * self.BLOCK_SEC) * channels
+        self._lock = threading.Lock()
+        self._tail = array.array("h")
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.frames = 0
+            self.blocks = 0
+            self.silent_blocks = 0
+            self.gaps = 0
+            self.longest_gap_ms = 0.0
+            self._run = 0
+            self._started = False
+
+    def feed(self, pcm):
+        a = array.array("h")
+        a.frombytes(pcm[:len(pcm) - len(pcm) % 2])
+        if sys.byteorder != "little":
+            a.byteswap()
+        with self._lock:
+            self.frames += len(a) // self.channels
+            a = self._tail + a
+            n = len(a) - len(a) % self.block
+            for i in range(0, n, self.block):
+                b = a[i:i + self.block]
+                silent = max(b) < self.SILENT_PEAK and min(b) > -self.SILENT_PEAK
+                if not self._started:
+                    self._started = not silent
+                    if not self._started:
+                        continue
+                self.blocks += 1
+                if silent:
+                    self.silent_blocks += 1
+                    if self._run == 0:
+                        self.gaps += 1
+                    self._run += 1
+                    self.longest_gap_ms = max(self.longest_gap_ms, self._run * self.BLOCK_SEC * 1000.0)
+                else:
+                    self._run = 0
+            self._tail = a[n:]
+
+    def snapshot(self):
+        with self._lock:
+            return {"frames": self.frames, "blocks": self.blocks, "silent_blocks": self.silent_blocks,
+                    "gaps": self.gaps, "longest_gap_ms": round(self.longest_gap_ms, 1)}
+
+
+def _cpu_sec():
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    return ru.ru_utime + ru.ru_stime
+
+
+def _version():
+    try:
+        p = subprocess.run(["git", "describe", "--always", "--dirty", "--tags"], cwd=str(HERE),
+                           capture_output=True, text=True, timeout=5)
+        return p.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _pct(part, whole):
+    return round(100.0 * part / whole, 3) if whole else None
+
+
+def run_one(n, a, ptimes):
+    """One talker count; returns the result dict."""
+    fmt = stream_format({"audio_ptime_us": ptimes[0], "audio_channels": a.channels})
+    tmp = tempfile.mkdtemp(prefix="aes67-bench-")
+    w = RxPartylineWorker(a.group, a.port, "file", Path(tmp) / "mix.wav", {}, a.iface, idle_timeout=0,
+                          fmt=fmt, jb={"mode": "fixed", "latency_ms": a.jb_ms},
+                          vad={"enabled": a.vad, "threshold_db": a.vad_threshold_db})
+    cont = MixContinuity(a.channels)
+    w.set_live_tap(cont.feed)
+    w.start()
+    gen = subprocess.Popen(
+        [sys.executable, str(HERE / "loadgen.py"), "--talkers", str(n), "--group", a.group, "--port", str(a.port),
+         "--seconds", str(a.warmup + a.seconds), "--ptime-us", ",".join(map(str, ptimes)),
+         "--channels", str(a.channels), "--jitter-ms", str(a.jitter_ms), "--loss-pct", str(a.loss_pct)],
+        stdout=subprocess.PIPE, text=True)
+    try:
+        time.sleep(a.warmup)
+        cont.reset()
+        m0, cpu0, t0 = w.metrics_snapshot(), _cpu_sec(), time.monotonic()
+        # nominal packet rate after injected loss
+        nominal_pps = sum(1e6 / ptimes[i % len(ptimes)] for i in range(n)) * (1 - a.loss_pct / 100.0)
+        pps_err = []
+        while time.monotonic() - t0 < a.seconds:
+            time.sleep(1.0)
+            pps = w.metrics_snapshot().get("pps_recent") or 0.0
+            pps_err.append(abs(pps - nominal_pps) / nominal_pps * 100.0)
+        m1, cpu1, wall = w.metrics_snapshot(), _cpu_sec(), time.monotonic() - t0
+        mix = cont.snapshot()
+        # audio frames that reached the tap vs wall time (mixer timeouts or tap drops show up here)
+        mix["coverage_pct"] = _pct(mix["frames"], 48000 * wall)
+        out, _ = gen.communicate(timeout=a.warmup + a.seconds + 30)
+        time.sleep(max(1.0, 2 * a.jb_ms / 1000.0))  # jitterbuffer drain + a final stats poll
+        m2 = w.metrics_snapshot()
+        peers = w.peers_snapshot()
+    finally:
+        if gen.poll() is None:
+            gen.terminate()
+        w.stop()
+        for f in Path(tmp).glob("*"):
+            f.unlink()
+        os.rmdir(tmp)
+    g = json.loads(out.strip().splitlines()[-1]) if out.strip() else {}
+    cpu = 100.0 * (cpu1 - cpu0) / wall
+    counted = m2.get("packets_total") or 0
+    sent = g.get("sent") or 0
+    lost = sum(max(0, p.get("lost") or 0) for p in peers)
+    expected = sum(p.get("packets") or 0 for p in peers) + lost
+    return {
+        "talkers": n,
+        "talkers_seen": len(peers),
+        "cpu_pct": round(cpu, 2),
+        "cpu_pct_per_talker": round(cpu / n, 3),
+        "generator": {k: g.get(k) for k in ("sent", "dropped", "max_send_lag_ms", "cpu_sec")},
+        "packets": {
+            "sent": sent,
+            "counted": counted,
+            "missing": sent - counted,
+            "missing_pct": _pct(sent - counted, sent),
+            "lost": lost,
+            "loss_pct": _pct(lost, expected),
+            "late": sum(p.get("late") or 0 for p in peers),
+            "jb_lost": sum(p.get("jb_lost") or 0 for p in peers),
+        },
+        "mix": mix,
+        "metrics_accuracy": {
+            "nominal_pps": round(nominal_pps, 1),
+            "measured_pps": round(((m1.get("packets_total") or 0) - (m0.get("packets_total") or 0)) / wall, 1),
+            "pps_recent_err_pct_mean": round(sum(pps_err) / len(pps_err), 2) if pps_err else None,
+            "pps_recent_err_pct_max": round(max(pps_err), 2) if pps_err else None,
+            "packets_total_err_pct": _pct(abs(counted - sent), sent),
+        },
+    }
+
+
+def compare(report, baseline):
+    """Regressions of report against baseline (lists of human-readable strings)."""
+    old = {r["talkers"]: r for r in baseline.get("runs", [])}
+    out = []
+    for r in report["runs"]:
+        b = old.get(r["talkers"])
+        if b is None:
+            continue
+        n = r["talkers"]
+        if b["cpu_pct_per_talker"] and r["cpu_pct_per_talker"] > 1.2 * b["cpu_pct_per_talker"]:
+            out.append(f"{n} talkers: CPU/talker {b['cpu_pct_per_talker']}% -> {r['cpu_pct_per_talker']}%")
+        lo, ln = b["packets"].get("loss_pct") or 0, r["packets"].get("loss_pct") or 0
+        if ln > lo + 0.1:
+            out.append(f"{n} talkers: loss {lo}% -> {ln}%")
+        if r["mix"]["gaps"] > b["mix"]["gaps"]:
+            out.append(f"{n} talkers: mix gaps {b['mix']['gaps']} -> {r['mix']['gaps']}")
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="RX mixing benchmark with synthetic talkers")
+    ap.add_argument("--talkers", default="1,4,8,16", help="comma-separated talker counts")
+    ap.add_argument("--seconds", type=float, default=30.0, help="measured time per run")
+    ap.add_argument("--warmup", type=float, default=3.0)
+    ap.add_argument("--group", default="239.69.0.199")
+    ap.add_argument("--port", type=int, default=5998)
+    ap.add_argument("--iface", default=None)
+    ap.add_argument("--ptime-us", default="4000", help="comma-separated, cycled over talkers")
+    ap.add_argument("--channels", type=int, choices=(1, 2), default=1)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--loss-pct", type=float, default=0.0)
+    ap.add_argument("--jb-ms", type=int, default=100)
+    ap.add_argument("--vad", action="store_true", help="run with the voice gate on (compare against a run without)")
+    ap.add_argument("--vad-threshold-db", type=float, default=-45.0)
+    ap.add_argument("--out", default=str(HERE / "bench-results"))
+    ap.add_argument("--baseline", default=None, help="earlier report to check for regressions")
+    a = ap.parse_args(argv)
+    ptimes = [int(p) for p in a.ptime_us.split(",") if p]
+    report = {
+        "version": _version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "host": {"node": platform.node(), "machine": platform.machine(), "python": platform.python_version(),
+                 "cpus": os.cpu_count()},
+        "params": {k: getattr(a, k) for k in ("seconds", "warmup", "group", "port", "channels", "jitter_ms",
+                                               "loss_pct", "jb_ms", "vad")} | {"ptime_us": ptimes},
+        "runs": [],
+    }
+    for n in [int(x) for x in a.talkers.split(",") if x]:
+        print(f"bench: {n} talkers ...", file=sys.stderr)
+        r = run_one(n, a, ptimes)
+        report["runs"].append(r)
+        print(f"  cpu {r['cpu_pct']}% ({r['cpu_pct_per_talker']}%/talker)  loss {r['packets']['loss_pct']}%  "
+              f"late {r['packets']['late']}  mix gaps {r['mix']['gaps']}  "
+              f"pps err {r['metrics_accuracy']['pps_recent_err_pct_mean']}%", file=sys.stderr)
+    out = Path(a.out)
+    out.mkdir(parents=True, exist_ok=True)
+    path = out / f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    regressions = []
+    if a.baseline:
+        regressions = compare(report, json.loads(Path(a.baseline).read_text()))
+        report["regressions"] = regressions
+    path.write_text(json.dumps(report, indent=2))
+    print(f"report: {path}", file=sys.stderr)
+    for line in regressions:
+        print("REGRESSION:", line, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# backend/channels.py
+"""
+Party-line channels served by one backend process.
+
+The top-level rx_*/tx_* keys describe the "main" channel. `channels` adds more, each
+giving only what differs from main:
+
+  {"name": "lighting", "multicast": "239.69.0.122", "port": 5004,
+   "rx_sink": {"path": "recordings-lighting"}, "rx_ring_minutes": 0}
+
+`multicast`/`port` set both directions (a party line sends and listens on one group);
+rx_multicast/rx_port/tx_multicast/tx_port override one side. Other rx_* keys override
+the main channel's receiver settings, except rx_mix_minus, which a channel only gets
+if it lists its own. A channel's recordings default to
+"<main path>-<name>". `tx_channels` lists the channels our sender talks on.
+"""
+import re
+
+DEFAULT_CHANNEL = "main"
+NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+_warned = set()  # bad entries already reported (this runs on every request)
+
+
+def _suffixed(path, name):
+    stem, dot, ext = str(path).rpartition(".")
+    if dot and "/" not in ext:
+        return f"{stem}-{name}.{ext}"
+    return f"{path}-{name}"
+
+
+def channel_configs(cfg: dict) -> dict:
+    """name -> full config dict for that channel (main first). Invalid or duplicate entries are skipped."""
+    out = {DEFAULT_CHANNEL: cfg}
+    for ch in cfg.get("channels") or []:
+        name = str((ch or {}).get("name") or "").strip() if isinstance(ch, dict) else ""
+        if not NAME_RE.match(name) or name in out:
+            if repr(ch) not in _warned:
+                _warned.add(repr(ch))
+                print(f"WARN: ignoring channel entry {ch!r} (needs a unique name of letters, digits, - or _)")
+            continue
+        c = dict(cfg)
+        c.update({k: v for k, v in ch.items() if k.startswith("rx_") and k != "rx_sink"})
+        c["rx_mix_minus"] = ch.get("rx_mix_minus") or []  # outputs are per channel, never inherited
+        group, port = ch.get("multicast"), ch.get("port")
+        c["rx_multicast"] = ch.get("rx_multicast") or group or cfg["rx_multicast"]
+        c["rx_port"] = ch.get("rx_port") or port or cfg["rx_port"]
+        c["tx_multicast"] = ch.get("tx_multicast") or group or c["rx_multicast"]
+        c["tx_port"] = ch.get("tx_port") or port or c["rx_port"]
+        sink = dict(cfg.get("rx_sink") or {})
+        own = ch.get("rx_sink") or {}
+        sink.update(own)
+        if "path" not in own:
+            sink["path"] = _suffixed(sink.get("path") or ("recordings" if sink.get("mode") == "segments" else "mix.wav"),
+                                     name)
+        c["rx_sink"] = sink
+        c["channels"] = []
+        out[name] = c
+    return out
+
+
+def validate(channels, cfg=None) -> str | None:
+    """
+    Error text for an unusable `channels` value, else None. With the rest of the config
+    (`cfg`, for the main channel's group), two channels receiving the same group:port
+    are refused: each receiver would mix the other's talkers too.
+    """
+    if not isinstance(channels, list):
+        return "channels must be a list"
+    seen = {DEFAULT_CHANNEL}
+    for ch in channels:
+        name = ch.get("name") if isinstance(ch, dict) else None
+        if not isinstance(name, str) or not NAME_RE.match(name):
+            return f"bad channel name {name!r} (1-32 letters, digits, - or _)"
+        if name in seen:
+            return f"duplicate channel name {name!r}"
+        seen.add(name)
+    if cfg is not None:
+        groups = {}
+        for name, c in channel_configs({**cfg, "channels": channels}).items():
+            try:
+                dest = (str(c["rx_multicast"]), int(c["rx_port"]))
+            except (KeyError, TypeError, ValueError):
+                return f"channel {name!r}: bad rx group or port"
+            if dest in groups:
+                return f"channels {groups[dest]!r} and {name!r} both receive {dest[0]}:{dest[1]}"
+            groups[dest] = name
+    return None
+
+
+def tx_destinations(cfg: dict) -> list:
+    """(host, port) for every channel listed in tx_channels (default: main), in order, without repeats."""
+    chans = channel_configs(cfg)
+    wanted = cfg.get("tx_channels")
+    if not isinstance(wanted, list):
+        wanted = [DEFAULT_CHANNEL]
+    out = []
+    for name in wanted:
+        c = chans.get(name)
+        if c is None:
+            continue
+        dest = (c["tx_multicast"], int(c["tx_port"]))
+        if dest not in out:
+            out.append(dest)
+    return out
@@ -0,0 +1,125 @@
+# backend/clock_drift.py
+import math
+from collections import deque
+
+
+class DriftEstimator:
+    """
+    Estimates one talker's sample-clock skew against our clock, in ppm (positive: the
+    sender runs fast), from (arrival time, RTP timestamp) samples.
+
+    The offset arrival - rtp_time drifts linearly with the skew; network queueing only
+    ever adds to it. So each BUCKET_SEC keeps its smallest offset (the least delayed
+    packet), and the skew is the slope of a least-squares line through the last
+    WINDOW_BUCKETS minima. A jump of more than RESYNC_SEC (sender restart, timestamp
+    discontinuity) starts over.
+    """
+    BUCKET_SEC = 10.0
+    WINDOW_BUCKETS = 30    # 5 minutes of history
+    MIN_BUCKETS = 3        # first estimate after ~30 s
+    RESYNC_SEC = 0.5
+
+    def __init__(self, clock_rate=48000):
+        self.clock_rate = int(clock_rate)
+        self.ppm = None
+        self.resyncs = 0
+        self._buckets = deque(maxlen=self.WINDOW_BUCKETS)  # (arrival, min offset)
+        self._reset()
+
+    def _reset(self):
+        self._buckets.clear()
+        self._ext = None      # unwrapped RTP timestamp
+        self._last_ts = None
+        self._t0 = None       # first arrival / RTP time, subtracted to keep floats small
+        self._rtp0 = None
+        self._last_off = None
+        self._cur = None      # [bucket start, arrival of min, min offset]
+
+    def add(self, arrival_sec, rtp_ts):
+        """Feed one packet's arrival (seconds, any steady clock) and 32-bit RTP timestamp."""
+        if self._last_ts is None:
+            self._ext = 0
+            self._t0, self._rtp0 = arrival_sec, 0
+        else:
+            d = (rtp_ts - self._last_ts) & 0xFFFFFFFF
+            if d >= 0x80000000:
+                d -= 0x100000000  # reordered packet
+            self._ext += d
+        self._last_ts = rtp_ts
+        t = arrival_sec - self._t0
+        off = t - (self._ext - self._rtp0) / self.clock_rate
+        if self._last_off is not None and abs(off - self._last_off) > self.RESYNC_SEC:
+            self.resyncs += 1
+            self._reset()
+            self.add(arrival_sec, rtp_ts)
+            return
+        self._last_off = off
+        cur = self._cur
+        if cur is None:
+            self._cur = [t, t, off]
+        elif t - cur[0] >= self.BUCKET_SEC:
+            self._buckets.append((cur[1], cur[2]))
+            self._cur = [t, t, off]
+            self._fit()
+        elif off < cur[2]:
+            cur[1], cur[2] = t, off
+
+    def _fit(self):
+        pts = self._buckets
+        if len(pts) < self.MIN_BUCKETS:
+            return
+        n = len(pts)
+        mx = sum(p[0] for p in pts) / n
+        my = sum(p[1] for p in pts) / n
+        sxx = sum((p[0] - mx) ** 2 for p in pts)
+        if sxx <= 0:
+            return
+        slope = sum((p[0] - mx) * (p[1] - my) for p in pts) / sxx
+        self.ppm = -slope * 1e6
+
+
+class RateDither:
+    """
+    Turns a fractional ppm correction into the integer caps rates audioresample accepts
+    (1 Hz at 48 kHz is ~21 ppm, too coarse on its own). The rate sits on one of the two
+    integers around the target and the error this leaves (samples gained or lost) is
+    integrated; only when it passes MAX_ERR_SAMPLES does the rate flip to the other side.
+    So the rates average to the exact target, the timing error stays within
+    MAX_ERR_SAMPLES, and caps are renegotiated every minute or two instead of every
+    update. The applied ppm slews at most SLEW_PPM_PER_SEC, so compensation never steps
+    audibly.
+    """
+    SLEW_PPM_PER_SEC = 2.0
+    MAX_ERR_SAMPLES = 24.0   # 0.5 ms at 48 kHz, well inside any jitterbuffer
+
+    def __init__(self, rate=48000):
+        self.rate = int(rate)
+        self.applied_ppm = 0.0
+        self.current = self.rate  # rate the stream is labelled with now
+        self.changes = 0          # times `current` moved (each one renegotiates caps)
+        self._err = 0.0           # samples the target got ahead of `current`
+        self._last = None
+
+    def update(self, now, ppm):
+        """Step towards ppm (None: hold); returns the integer rate for the next period."""
+        dt = 1.0 if self._last is None else max(0.0, now - self._last)
+        self._last = now
+        if ppm is not None:
+            step = self.SLEW_PPM_PER_SEC * dt
+            self.applied_ppm += max(-step, min(step, ppm - self.applied_ppm))
+        target = self.rate * (1.0 + self.applied_ppm * 1e-6)
+        lim = self.MAX_ERR_SAMPLES
+        self._err = max(-2 * lim, min(2 * lim, self._err + (target - self.current) * dt))
+        lo = math.floor(target)
+        if self.current not in (lo, lo + 1):
+            new = int(round(target))  # the correction moved on: follow it
+        elif self._err > lim:
+            new = lo + 1
+        elif self._err < -lim:
+            new = lo
+        else:
+            new = self.current
+        if new != self.current:
+            self.current = new
+            self.changes += 1
+        return self.current
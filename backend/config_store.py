@@ -1,5 +1,8 @@
 from pathlib import Path
+import atexit
+import copy
 import json
+import threading
 
 CONFIG_PATH = Path(__file__).with_name("config.json")
 
@@ -13,22 +16,233 @@ DEFAULT_CFG = {
     "tx_port": 5004,
     "tx_iface": None,
 
+    # Stream format for TX and RX (see audio_format.py for the latency/CPU trade-offs)
+    "audio_encoding": "L16",      # "L16" | "L24"
+    "audio_channels": 1,          # 1 | 2
+    "audio_ptime_us": 4000,       # 4000 | 1000 | 250 | 125
+
     "rx_multicast": "239.69.69.69",
     "rx_port": 5004,
-    "rx_sink": {"mode": "file", "path": "mix.wav"},
+    # "segments": rotating WAV segments in <path>/ (see recorder.py); "file": one WAV; "auto": play out
+    "rx_sink": {"mode": "segments", "path": "recordings", "segment_sec": 300, "max_segment_mb": 0,
+                "retention_hours": 24, "retention_mb": 2048},
     "rx_iface": None,
+    "rx_ring_minutes": 5,         # in-memory "last N minutes" of the mix for /rx/clip; 0 = off (~5.8 MB/min)
+    "rx_ring_talker_minutes": 0,  # same per talker (up to 16 rings); 0 = off
+    "rx_jb_mode": "fixed",        # "fixed" | "adaptive" (per talker, from measured jitter)
+    "rx_jb_latency_ms": 100,      # fixed latency; adaptive mode starts here
+    "rx_jb_min_ms": 10,           # adaptive bounds
+    "rx_jb_max_ms": 200,
+    "rx_idle_timeout_sec": 30,    # drop a talker's mix branch after this much silence; 0 = never
+    "rx_vad": False,              # voice gate: keep silent talkers out of the mix (and report who talks)
+    "rx_vad_threshold_db": -45,   # peak dBFS that opens a talker's gate
+    "rx_vad_hangover_ms": 300,    # gate stays open this long after the last loud meter reading
+    "rx_meter_hz": 20,            # level meter updates per second (mix and all talkers in one batch), 1-50
+    "rx_drift_comp": True,        # resample each talker to cancel its clock drift (estimated after ~30 s)
+    "rx_drift_max_ppm": 200,      # larger estimates are clamped (a wrong nominal rate, not drift)
+    "rx_history_hours": 24,       # metrics history for /rx/history (~24 MB per channel at 24 h); 0 = off
+    # Mixes without some talkers, e.g. {"name": "local", "exclude": ["self"], "sink": {"mode": "auto"}}
+    # or {"name": "booth", "exclude": [23456789], "output": "rtp", "host": "239.69.0.130", "port": 5004}
+    "rx_mix_minus": [],
+
+    # Extra party-line channels, each {"name", "multicast", "port", optional rx_* overrides}
+    # (see channels.py); the rx_*/tx_* keys above are channel "main"
+    "channels": [],
+    "tx_channels": ["main"],      # channels our sender talks on (one udpsink, one client per group)
+
+    # SAP/SDP discovery (see sap.py)
+    "sap_listen": True,           # keep an index of streams announced on 239.255.255.255:9875
+    "sap_announce": True,         # announce our TX streams while TX runs
+    "sap_interval_sec": 30,       # AES67 devices' usual rate (RFC 2974 would say >= 300)
+    "sap_min_timeout_sec": 3600,  # forget an unannounced stream after max(this, 10 intervals)
+    "rx_sdp_caps": True,          # receive an announced group:port in its announced format
 
     "ssrc_names": { "12345678": "Unit A", "23456789": "Unit B" }
 }
 
-def load_config():
+# Saves landing within this window are written to disk once
+SAVE_DELAY_SEC = 0.5
+
+# The parsed config is cached in memory and re-read only when the file's mtime/size
+# change (e.g. hand edits). Callers always get a private copy.
+_lock = threading.RLock()
+_write_lock = threading.Lock()  # held for a whole file write, see _write_now()
+_cfg = None         # cached config, defaults merged
+_version = 0        # bumped on every change (save or reload)
+_file_sig = None    # (mtime_ns, size) of the file as last read or written
+_save_timer = None  # pending coalesced write
+_pending = None     # _PendingWrite the next write completes
+_listeners = []     # [(frozenset(keys) | None, callback)]
+
+
+def _stat_sig():
+    try:
+        st = CONFIG_PATH.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_file():
     if CONFIG_PATH.exists():
         with CONFIG_PATH.open() as f:
-            return {**DEFAULT_CFG, **json.load(f)}
-    return DEFAULT_CFG.copy()
+            return {**copy.deepcopy(DEFAULT_CFG), **json.load(f)}
+    return copy.deepcopy(DEFAULT_CFG)
+
+
+def _changed_keys(old: dict, new: dict):
+    return {k for k in set(old) | set(new) if old.get(k) != new.get(k)}
+
+
+def _notify(old: dict | None, new: dict):
+    if old is None:
+        return
+    keys = _changed_keys(old, new)
+    if not keys:
+        return
+    with _lock:
+        listeners = list(_listeners)
+    for wanted, cb in listeners:
+        hit = keys if wanted is None else keys & wanted
+        if not hit:
+            continue
+        try:
+            cb({k: copy.deepcopy(new.get(k)) for k in hit}, copy.deepcopy(new))
+        except Exception as e:
+            print("config listener failed:", e)
+
+
+def _refresh():
+    """Reload from disk if the file changed. Returns (old, new) when it did."""
+    global _cfg, _version, _file_sig
+    # Unsaved in-memory changes win over the file until they are flushed (or while a
+    # write is replacing it: its signature is recorded when the write completes)
+    if _save_timer is not None or _write_lock.locked():
+        return None
+    sig = _stat_sig()
+    if _cfg is not None and sig == _file_sig:
+        return None
+    try:
+        new = _read_file()
+    except (OSError, ValueError) as e:
+        if _cfg is None:
+            raise
+        print("WARN: config.json unreadable, keeping cached config:", e)
+        _file_sig = sig
+        return None
+    old = _cfg
+    _cfg = new
+    _file_sig = sig
+    _version += 1
+    return old, new
+
+
+def load_config():
+    with _lock:
+        changed = _refresh()
+        out = copy.deepcopy(_cfg)
+    if changed:
+        _notify(*changed)
+    return out
+
+
+def get_version():
+    """Monotonic counter of config changes; cheap way to detect staleness."""
+    with _lock:
+        _refresh()
+        return _version
+
+
+class _PendingWrite:
+    """One coalesced file write; every save_config() it covers can wait() for the outcome."""
+    def __init__(self):
+        self._done = threading.Event()
+        self.error = None
+
+    def wait(self, timeout=None):
+        """Block until written. Raises the write's exception if it failed; False on timeout."""
+        if not self._done.wait(timeout):
+            return False
+        if self.error is not None:
+            raise self.error
+        return True
+
+
+def _write_now():
+    global _save_timer, _pending, _file_sig
+    # _write_lock orders writers (timer, flush) so the newest snapshot lands last; the
+    # file I/O runs outside _lock, so readers never wait on a slow SD card
+    with _write_lock:
+        with _lock:
+            _save_timer = None
+            pending, _pending = _pending, None
+            data = copy.deepcopy(_cfg)
+        try:
+            tmp = CONFIG_PATH.with_suffix(".json.tmp")
+            with tmp.open("w") as f:
+                json.dump(data, f, indent=2)
+            tmp.replace(CONFIG_PATH)
+            sig = _stat_sig()
+            with _lock:
+                _file_sig = sig
+        except (OSError, TypeError, ValueError) as e:
+            # the cached config keeps the change; the next save tries the file again
+            print("WARN: config.json write failed:", e)
+            if pending is not None:
+                pending.error = e
+        finally:
+            if pending is not None:
+                pending._done.set()
+
 
 def save_config(cfg: dict):
-    tmp = CONFIG_PATH.with_suffix(".json.tmp")
-    with tmp.open("w") as f:
-        json.dump(cfg, f, indent=2)
-    tmp.replace(CONFIG_PATH)
+    """
+    Update the cached config now; the file write is coalesced (see flush()). Returns a
+    handle whose wait() reports whether the write covering this change succeeded.
+    """
+    global _cfg, _version, _save_timer, _pending
+    with _lock:
+        if _cfg is None:
+            _refresh()
+        old = _cfg
+        _cfg = copy.deepcopy(cfg)
+        _version += 1
+        if _save_timer is None:
+            _pending = _PendingWrite()
+            _save_timer = threading.Timer(SAVE_DELAY_SEC, _write_now)
+            _save_timer.daemon = True
+            _save_timer.start()
+        pending, new = _pending, _cfg
+    _notify(old, new)
+    return pending
+
+
+def flush():
+    """Write any pending save immediately (call before exiting the process)."""
+    global _save_timer
+    with _lock:
+        t = _save_timer
+        if t is None:
+            return
+        t.cancel()
+    _write_now()
+
+
+def subscribe(keys, callback):
+    """
+    Call `callback(changed, cfg)` whenever any of `keys` (None = all) changes, whether
+    through save_config() or an edit of config.json on disk. `changed` maps each changed
+    key to its new value. Returns a function that removes the listener.
+    """
+    entry = (frozenset(keys) if keys is not None else None, callback)
+    with _lock:
+        _listeners.append(entry)
+
+    def _unsubscribe():
+        with _lock:
+            if entry in _listeners:
+                _listeners.remove(entry)
+    return _unsubscribe
+
+
+atexit.register(flush)
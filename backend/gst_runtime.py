@@ -0,0 +1,145 @@
+# backend/gst_runtime.py
+"""
+One GStreamer context per process. Gst is imported and initialised once, and a single
+GLib main-loop thread owns the bus watches and periodic timers of every pipeline (RX
+channels, TX, mic monitor), so adding a pipeline adds no thread. The loop sleeps
+until a message is posted or a timer is due; messages reach their handler as they
+are posted instead of on the next poll.
+
+Callbacks run on that thread: keep them short and never block it on a pipeline state
+change that needs the loop to make progress. Handlers store what they learn on their
+worker (levels, counters, state) for the HTTP threads to read.
+"""
+import sys
+import threading
+import time
+
+_lock = threading.Lock()
+_Gst = None
+_GLib = None
+_loop = None
+_thread = None
+_stats = {"watches": 0, "timers": 0, "messages": 0, "callbacks": 0, "max_callback_ms": 0.0}
+
+
+def gst():
+    """The initialised Gst module (python3-gi from the system when the venv lacks it)."""
+    global _Gst, _GLib
+    with _lock:
+        if _Gst is None:
+            try:
+                import gi  # type: ignore
+            except ModuleNotFoundError:
+                # Common system path for python3-gi on Debian/RPi OS
+                sys.path.append("/usr/lib/python3/dist-packages")
+                import gi  # type: ignore
+            gi.require_version('Gst', '1.0')
+            from gi.repository import Gst, GLib
+            Gst.init(None)
+            _Gst, _GLib = Gst, GLib
+        return _Gst
+
+
+def _ensure_loop():
+    global _loop, _thread
+    gst()
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _loop = _GLib.MainLoop()  # default main context: watches/timers below attach to it
+            _thread = threading.Thread(target=_loop.run, name="gst-main-loop", daemon=True)
+            _thread.start()
+    return _GLib
+
+
+def _run(fn, args, what):
+    t0 = time.perf_counter()
+    try:
+        fn(*args)
+    except Exception as e:
+        print(f"{what} failed:", e)
+    ms = (time.perf_counter() - t0) * 1000.0
+    with _lock:
+        _stats["callbacks"] += 1
+        if ms > _stats["max_callback_ms"]:
+            _stats["max_callback_ms"] = ms
+
+
+def watch_bus(bus, handler):
+    """
+    Dispatch every message on `bus` to handler(msg) on the main loop as it is posted.
+    Returns a function that removes the watch. A bus takes one watch at a time.
+    """
+    GLib = _ensure_loop()
+
+    def _on_message(_bus, msg):
+        _stats["messages"] += 1
+        _run(handler, (msg,), "bus handler")
+        return True
+
+    bus.add_watch(GLib.PRIORITY_DEFAULT, _on_message)
+    with _lock:
+        _stats["watches"] += 1
+    state = {"on": True}
+
+    def _remove():
+        if state["on"]:
+            state["on"] = False
+            bus.remove_watch()
+            with _lock:
+                _stats["watches"] -= 1
+    return _remove
+
+
+def every(interval_sec, fn):
+    """Call fn() on the main loop every interval_sec until cancelled; returns a cancel function."""
+    GLib = _ensure_loop()
+    state = {"on": True}
+
+    def _tick():
+        if not state["on"]:
+            return False
+        _run(fn, (), "main-loop timer")
+        return True
+
+    source_id = GLib.timeout_add(max(1, int(interval_sec * 1000)), _tick)
+    with _lock:
+        _stats["timers"] += 1
+
+    def _cancel():
+        if state["on"]:
+            state["on"] = False
+            GLib.source_remove(source_id)
+            with _lock:
+                _stats["timers"] -= 1
+    return _cancel
+
+
+def after(delay_sec, fn, *args):
+    """Run fn(*args) once on the main loop after delay_sec."""
+    GLib = _ensure_loop()
+
+    def _once():
+        _run(fn, args, "main-loop call")
+        return False
+
+    GLib.timeout_add(max(1, int(delay_sec * 1000)), _once)
+
+
+def call_soon(fn, *args):
+    """Run fn(*args) once on the main loop."""
+    GLib = _ensure_loop()
+
+    def _once():
+        _run(fn, args, "main-loop call")
+        return False
+
+    GLib.idle_add(_once)
+
+
+def snapshot():
+    """Main-loop health for /status and /metrics: live watches/timers, dispatch counts, slowest callback."""
+    with _lock:
+        s = dict(_stats)
+        s["running"] = _thread is not None and _thread.is_alive()
+    s["max_callback_ms"] = round(s["max_callback_ms"], 2)
+    return s
@@ -0,0 +1,77 @@
+# backend/jitter_adapt.py
+from collections import deque
+
+
+class AdaptiveLatency:
+    """
+    Chooses one talker's jitterbuffer latency from its measured arrival jitter.
+
+    The target is a multiple of the recent peak RFC 3550 jitter plus a packet time and
+    a safety margin, clamped to [min_ms, max_ms]. Raising is immediate: when the target
+    exceeds the current latency, or the jitterbuffer reports late drops, latency goes up
+    at once. Lowering uses hysteresis: the target must stay at least HYSTERESIS_MS below
+    for HOLD_DOWN_SEC, and then latency only moves halfway towards it, so a brief quiet
+    spell cannot pull the buffer under the next burst.
+    """
+    JITTER_MULT = 4.0      # RFC 3550 jitter is a mean deviation; peaks run several times higher
+    MARGIN_MS = 5.0
+    PEAK_WINDOW_SEC = 10.0
+    HYSTERESIS_MS = 10.0
+    HOLD_DOWN_SEC = 5.0
+    LATE_STEP_MS = 20.0    # extra headroom added per update with late drops
+    GRANULARITY_MS = 5
+
+    def __init__(self, min_ms=10, max_ms=200, ptime_ms=4.0, initial_ms=None):
+        self.min_ms = int(min_ms)
+        self.max_ms = max(self.min_ms, int(max_ms))
+        self.ptime_ms = float(ptime_ms)
+        self.latency_ms = self._clamp(initial_ms if initial_ms is not None else self.max_ms)
+        self.target_ms = self.latency_ms
+        self._peaks = deque()      # (ts, jitter_ms); kept monotonically decreasing
+        self._below_since = None
+        self._late_last = None
+
+    def _clamp(self, ms):
+        g = self.GRANULARITY_MS
+        ms = int(-(-ms // g) * g)  # round up to the granularity
+        return max(self.min_ms, min(self.max_ms, ms))
+
+    def _peak(self, now, jitter_ms):
+        q = self._peaks
+        while q and q[-1][1] <= jitter_ms:
+            q.pop()
+        q.append((now, jitter_ms))
+        while q[0][0] < now - self.PEAK_WINDOW_SEC:
+            q.popleft()
+        return q[0][1]
+
+    def update(self, now, jitter_ms, late_total=None):
+        """Feed one measurement; returns the new latency when it should change, else None."""
+        late = 0
+        if late_total is not None:
+            if self._late_last is not None and late_total > self._late_last:
+                late = late_total - self._late_last
+            self._late_last = late_total
+        if jitter_ms is None and not late:
+            return None
+        peak = self._peak(now, float(jitter_ms or 0.0))
+        target = self._clamp(self.JITTER_MULT * peak + self.ptime_ms + self.MARGIN_MS)
+        if late:
+            target = self._clamp(max(target, self.latency_ms + self.LATE_STEP_MS))
+        self.target_ms = target
+        if target > self.latency_ms:
+            self._below_since = None
+            self.latency_ms = target
+            return target
+        if target <= self.latency_ms - self.HYSTERESIS_MS:
+            if self._below_since is None:
+                self._below_since = now
+            elif now - self._below_since >= self.HOLD_DOWN_SEC:
+                self._below_since = now
+                new = self._clamp((self.latency_ms + target) / 2.0)
+                if new < self.latency_ms:
+                    self.latency_ms = new
+                    return new
+        else:
+            self._below_since = None
+        return None
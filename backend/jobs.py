@@ -0,0 +1,147 @@
+# backend/jobs.py
+import itertools
+import threading
+import time
+import traceback
+from collections import deque
+
+
+class JobError(Exception):
+    """A job failure with a user-facing hint (e.g. which packages to install)."""
+
+    def __init__(self, message, hint=None):
+        super().__init__(message)
+        self.hint = hint
+
+
+class JobRunner:
+    """
+    Runs lifecycle operations (start/stop/restart, config application) one at a time on
+    a single worker thread, so HTTP handlers only enqueue and return a job id.
+
+    A job is a dict record: id, op, key, state (queued/running/done/failed), progress,
+    result, error, timestamps and how many requests were folded into it. The key names
+    the resource a job acts on ("rx:main", "tx", ...; "rx" covers every "rx:<name>",
+    "*" covers everything; "tx+rx:main" names both). A request for a resource whose last queued job has the same
+    key replaces that job's operation, so start -> stop -> start ends in the state asked
+    for last, and every caller polls the one job that does it. It joins the running job
+    only for the same operation submitted with the same `stamp` (e.g. the config
+    version), never one started from older settings. Finished jobs are kept for
+    MAX_DONE lookups; internal jobs (config application) have their own smaller ring so
+    they never evict a job a client is still polling.
+    """
+    MAX_DONE = 50
+    MAX_DONE_INTERNAL = 10
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._pending = deque()
+        self._current = None
+        self._done = deque(maxlen=self.MAX_DONE)
+        self._done_internal = deque(maxlen=self.MAX_DONE_INTERNAL)
+        self._thread = None
+
+    @staticmethod
+    def _view(job):
+        return {k: v for k, v in job.items() if k != "fn"}
+
+    @staticmethod
+    def _overlaps(a, b):
+        # a key may name several resources joined by "+", e.g. "tx+rx:main"
+        return any(x == y or "*" in (x, y) or x.startswith(y + ":") or y.startswith(x + ":")
+                   for x in a.split("+") for y in b.split("+"))
+
+    def submit(self, op, fn, key=None, coalesce_running=True, stamp=None, internal=False, **info):
+        """Queue fn() (returning a result dict or None). Returns (job view, coalesced)."""
+        key = key or op
+        with self._cond:
+            for job in reversed(self._pending):
+                if not self._overlaps(job["key"], key):
+                    continue
+                if job["key"] != key:
+                    break  # a wider job comes later; keep the order
+                job.update(op=op, fn=fn, stamp=stamp, **info)
+                job["coalesced"] += 1
+                return self._view(job), True
+            else:
+                cur = self._current
+                if (coalesce_running and cur is not None and cur["key"] == key and cur["op"] == op
+                        and cur["stamp"] == stamp):
+                    cur["coalesced"] += 1
+                    return self._view(cur), True
+            job = {"id": str(next(self._ids)), "op": op, "key": key, **info, "state": "queued", "progress": None,
+                   "result": None, "error": None, "hint": None, "coalesced": 0, "stamp": stamp,
+                   "internal": bool(internal),
+                   "created_ts": time.time(), "started_ts": None, "finished_ts": None, "fn": fn}
+            self._pending.append(job)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="jobs", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+            return self._view(job), False
+
+    def progress(self, text):
+        """Called from inside a running job to say what it is doing."""
+        with self._cond:
+            if self._current is not None:
+                self._current["progress"] = text
+
+    def _find(self, job_id):
+        for job in itertools.chain(self._pending, [self._current] if self._current else [], self._done,
+                                   self._done_internal):
+            if job["id"] == job_id:
+                return job
+        return None
+
+    def get(self, job_id):
+        with self._cond:
+            job = self._find(job_id)
+            return self._view(job) if job is not None else None
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes (or timeout); returns its view, or None when unknown."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                job = self._find(job_id)
+                if job is None or job["state"] in ("done", "failed"):
+                    return self._view(job) if job is not None else None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return self._view(job)
+                self._cond.wait(remaining)
+
+    def snapshot(self):
+        """Queued, running and recently finished jobs (newest first)."""
+        with self._cond:
+            active = ([self._current] if self._current else []) + list(self._pending)
+            recent = sorted(itertools.chain(self._done, self._done_internal), key=lambda j: j["finished_ts"],
+                            reverse=True)
+            return {"active": [self._view(j) for j in active], "recent": [self._view(j) for j in recent]}
+
+    def busy(self):
+        with self._cond:
+            return self._current is not None or bool(self._pending)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job = self._current = self._pending.popleft()
+                job["state"] = "running"
+                job["started_ts"] = time.time()
+                self._cond.notify_all()
+            result, error, hint = None, None, None
+            try:
+                result = job["fn"]()
+            except Exception as e:
+                error, hint = str(e) or type(e).__name__, getattr(e, "hint", None)
+                print(f"job {job['id']} {job['op']} failed:\n" + traceback.format_exc())
+            with self._cond:
+                job.update(state="failed" if error else "done", result=result, error=error, hint=hint,
+                           finished_ts=time.time(), fn=None)
+                self._current = None
+                (self._done_internal if job["internal"] else self._done).append(job)
+                self._cond.notify_all()
@@ -0,0 +1,97 @@
+# backend/latency_probe.py
+import array
+import sys
+import threading
+import time
+from collections import deque
+
+
+class LatencyProbe:
+    """
+    End-to-end latency from TX markers to the RX mix on one machine.
+
+    The sender emits a tick every `interval_sec` (audiotestsrc "ticks" over silence) and
+    reports each tick's capture time with `emitted()`. A synced tap on the mix tee passes
+    the mixed PCM to `feed()`, which finds tick onsets with a threshold and pairs each one
+    with the latest unmatched tick sent before it. Both sides use time.monotonic_ns(), so
+    the difference covers payloading, the network stack, the jitterbuffer, the mixer and
+    the point where a synced sink would render. Output-device latency is not included.
+    Latencies longer than the interval cannot be paired, so keep it above the
+    jitterbuffer latency.
+    """
+    THRESHOLD = 0.25     # of full scale; ticks are sent at 0.8
+    MAX_RESULTS = 1000
+    MAX_PENDING = 16
+
+    def __init__(self, interval_sec=1.0, rate=48000, channels=1):
+        self.interval_sec = float(interval_sec)
+        self.rate = rate
+        self.channels = channels
+        self._th = int(self.THRESHOLD * 32767)
+        self._lock = threading.Lock()
+        self._pending = deque(maxlen=self.MAX_PENDING)  # emit times (ns) not yet detected
+        self._results = deque(maxlen=self.MAX_RESULTS)  # latencies (ms)
+        self._last_detect = None
+        self.started_ts = time.time()
+        self.running = True  # cleared when the measurement ends; results stay readable
+        self.stats = {"emitted": 0, "detected": 0, "unmatched": 0}
+
+    def emitted(self, t_ns):
+        """A tick's first sample was captured at t_ns (monotonic). Called from the TX streaming thread."""
+        with self._lock:
+            self._pending.append(t_ns)
+            self.stats["emitted"] += 1
+
+    def feed(self, pcm, now_ns=None):
+        """S16LE interleaved mix PCM about to be rendered; the first sample plays at now_ns."""
+        now_ns = time.monotonic_ns() if now_ns is None else now_ns
+        a = array.array("h")
+        a.frombytes(pcm[:len(pcm) - len(pcm) % 2])
+        if sys.byteorder != "little":
+            a.byteswap()
+        if not a or (max(a) < self._th and min(a) > -self._th):
+            return  # the common case stays in C
+        th = self._th
+        for i, v in enumerate(a):
+            if v >= th or v <= -th:
+                self._detected(now_ns + (i // self.channels) * 1_000_000_000 // self.rate)
+                return  # one tick per buffer at most; the interval is far longer
+
+    def _detected(self, t_ns):
+        with self._lock:
+            # skip the rest of the tick's burst
+            if self._last_detect is not None and t_ns - self._last_detect < self.interval_sec * 0.5e9:
+                return
+            self._last_detect = t_ns
+            match = None
+            while self._pending and self._pending[0] <= t_ns:
+                e = self._pending.popleft()
+                if match is not None:
+                    self.stats["unmatched"] += 1  # an earlier tick never showed up in the mix
+                match = e
+            if match is None:
+                return  # not one of ours (another talker, or noise)
+            if t_ns - match > self.interval_sec * 1e9:
+                self.stats["unmatched"] += 1
+                return
+            self._results.append((t_ns - match) / 1e6)
+            self.stats["detected"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            recent = list(self._results)[-20:]
+            lat = sorted(self._results)
+            s = dict(self.stats)
+        s["running"] = self.running
+        s["interval_ms"] = round(self.interval_sec * 1000.0)
+        s["started_ts"] = self.started_ts
+        s["samples"] = len(lat)
+        if lat:
+            def pct(q):
+                return round(lat[min(len(lat) - 1, int(q * len(lat)))], 2)
+            s.update({"min_ms": round(lat[0], 2), "median_ms": pct(0.5), "p99_ms": pct(0.99),
+                      "max_ms": round(lat[-1], 2), "mean_ms": round(sum(lat) / len(lat), 2)})
+        else:
+            s.update({"min_ms": None, "median_ms": None, "p99_ms": None, "max_ms": None, "mean_ms": None})
+        s["recent_ms"] = [round(v, 2) for v in recent]
+        return s
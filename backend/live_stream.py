@@ -0,0 +1,123 @@
+# backend/live_stream.py
+import queue
+import struct
+import threading
+
+
+def stream_wav_header(rate: int, channels: int, sampwidth: int = 2) -> bytes:
+    """WAV header for a stream of unknown length (sizes set to the maximum, as players expect)."""
+    block = channels * sampwidth
+    return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 0xFFFFFFFF, b"WAVE", b"fmt ", 16, 1,
+                       channels, rate, rate * block, block, sampwidth * 8, b"data", 0xFFFFFFFF)
+
+
+class _Listener:
+    def __init__(self, maxsize):
+        self.q = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def get(self, timeout):
+        return self.q.get(timeout=timeout)
+
+
+class LiveStreamHub:
+    """
+    Fans the live mix out to HTTP listeners.
+
+    PCM from the pipeline's tap is gathered into CHUNK_SEC chunks once and the same
+    bytes object is queued to every listener. Queues are bounded: when a client falls
+    behind, its oldest chunk is discarded, so a slow client hears a skip while the
+    pipeline and other listeners are unaffected. `on_active(bool)` is called with
+    whether anyone is listening whenever a listener comes or goes (it must be
+    idempotent), so the tap only runs while someone is listening.
+    """
+    MAX_LISTENERS = 4     # each stream holds a gunicorn thread
+    CHUNK_SEC = 0.1
+    QUEUE_CHUNKS = 20     # ~2 s of slack per client
+    KEEPALIVE_SEC = 1.0   # a listener idle this long is sent silence, so a gone client shows up as a write error
+
+    def __init__(self, on_active, rate=48000, channels=1, sampwidth=2):
+        self._on_active = on_active
+        self.rate, self.channels, self.sampwidth = rate, channels, sampwidth
+        self._chunk_bytes = int(self.CHUNK_SEC * rate) * channels * sampwidth
+        self._lock = threading.Lock()
+        self._transition = threading.Lock()  # serialises on_active calls, see _sync_active()
+        self._listeners = set()
+        self._pending = bytearray()
+        self.stats = {"chunks": 0, "dropped": 0}
+
+    def set_format(self, channels):
+        """Follow the RX stream's channel count (listeners joining later get the new header)."""
+        with self._lock:
+            self.channels = channels
+            self._chunk_bytes = int(self.CHUNK_SEC * self.rate) * channels * self.sampwidth
+            self._pending = bytearray()
+
+    def header(self):
+        return stream_wav_header(self.rate, self.channels, self.sampwidth)
+
+    def silence(self):
+        """One chunk of digital silence in the current format (the keepalive payload)."""
+        with self._lock:
+            return bytes(self._chunk_bytes)
+
+    def subscribe(self):
+        """Register a listener; raises RuntimeError when the listener limit is reached."""
+        with self._lock:
+            if len(self._listeners) >= self.MAX_LISTENERS:
+                raise RuntimeError("too many live listeners")
+            sub = _Listener(self.QUEUE_CHUNKS)
+            self._listeners.add(sub)
+        self._sync_active()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            if sub not in self._listeners:
+                return
+            self._listeners.discard(sub)
+            if not self._listeners:
+                self._pending = bytearray()
+        self._sync_active()
+
+    def resync(self):
+        """Re-apply the tap state, e.g. after the channel's receiver was replaced."""
+        self._sync_active()
+
+    def _sync_active(self):
+        # on_active runs outside _lock (it touches the pipeline), so a leave and a join can
+        # race to it; passing the state as of now, one call at a time, makes the last one win
+        with self._transition:
+            with self._lock:
+                active = bool(self._listeners)
+            self._on_active(active)
+
+    def listener_count(self):
+        with self._lock:
+            return len(self._listeners)
+
+    def push(self, pcm: bytes):
+        """Called from the pipeline tap (streaming thread); never blocks."""
+        with self._lock:
+            self._pending += pcm
+            if len(self._pending) < self._chunk_bytes:
+                return
+            chunk = bytes(self._pending)
+            self._pending = bytearray()
+            listeners = list(self._listeners)
+            self.stats["chunks"] += 1
+        for sub in listeners:
+            try:
+                sub.q.put_nowait(chunk)
+            except queue.Full:
+                try:
+                    sub.q.get_nowait()  # drop the oldest; keep latency bounded
+                except queue.Empty:
+                    pass
+                sub.dropped += 1
+                with self._lock:
+                    self.stats["dropped"] += 1
+                try:
+                    sub.q.put_nowait(chunk)
+                except queue.Full:
+                    pass
@@ -0,0 +1,156 @@
+# backend/loadgen.py
+"""
+Synthetic AES67 talkers for load tests: N L16 RTP streams, each with its own SSRC and
+tone, sent to a (loopback) multicast group from one thread.
+
+  python loadgen.py --talkers 8 --group 239.69.0.121 --port 5004 --seconds 60 \
+      [--ptime-us 4000[,1000,...]] [--channels 1] [--jitter-ms 2] [--loss-pct 0.5]
+
+Packet times are cycled over the talkers. Jitter delays each packet by a uniform
+0..jitter-ms (so large values also reorder); loss drops packets at random. A JSON
+summary (packets sent/dropped per talker, worst send lag) is printed on exit; bench.py
+reads it.
+"""
+import argparse
+import heapq
+import json
+import math
+import random
+import signal
+import socket
+import struct
+import sys
+import time
+
+RATE = 48000
+
+
+class Talker:
+    """One synthetic sender: RTP header state plus a looping one-second tone."""
+
+    def __init__(self, ssrc, ptime_us=4000, channels=1, freq=440, amplitude=0.1):
+        self.ssrc = ssrc & 0xFFFFFFFF
+        self.ptime_us = int(ptime_us)
+        self.channels = channels
+        self.freq = int(freq)
+        self.period = self.ptime_us / 1e6
+        self.spp = RATE * self.ptime_us // 1_000_000
+        self.seq = random.getrandbits(16)
+        self.ts = random.getrandbits(32)
+        # an integer frequency repeats exactly every second, so slices can wrap
+        frames = []
+        for i in range(RATE):
+            v = int(amplitude * 32767 * math.sin(2 * math.pi * self.freq * i / RATE))
+            frames.extend([v] * channels)
+        one = struct.pack(f">{len(frames)}h", *frames)
+        self._pcm = one + one
+        self._wrap = len(one)
+        self._pos = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def next_packet(self):
+        n = self.spp * self.channels * 2
+        payload = self._pcm[self._pos:self._pos + n]
+        self._pos = (self._pos + n) % self._wrap
+        pkt = struct.pack("!BBHII", 0x80, 96, self.seq, self.ts, self.ssrc) + payload
+        self.seq = (self.seq + 1) & 0xFFFF
+        self.ts = (self.ts + self.spp) & 0xFFFFFFFF
+        return pkt
+
+
+def make_talkers(n, ptimes_us=(4000,), channels=1, ssrc_base=None):
+    base = random.getrandbits(31) if ssrc_base is None else ssrc_base
+    return [Talker(base + i, ptimes_us[i % len(ptimes_us)], channels, freq=300 + 37 * i) for i in range(n)]
+
+
+def run(talkers, group, port, seconds, jitter_ms=0.0, loss_pct=0.0, ttl=1, iface_addr=None, stop=None):
+    """Send until `seconds` pass or stop() returns True; returns the summary dict."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+    if iface_addr:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(iface_addr))
+    dest = (group, int(port))
+    loss = max(0.0, float(loss_pct)) / 100.0
+    jitter = max(0.0, float(jitter_ms)) / 1000.0
+
+    t0 = time.monotonic() + 0.05
+    end = t0 + float(seconds)
+    # stagger first packets so talkers don't all send in the same instant
+    due = [(t0 + t.period * i / len(talkers), i) for i, t in enumerate(talkers)]
+    heapq.heapify(due)
+    delayed = []  # (send_at, n, packet) for jittered packets
+    n_delayed = 0
+    max_lag = 0.0
+    cpu0 = time.process_time()
+    while due:
+        nxt = min(due[0][0], delayed[0][0] if delayed else math.inf)
+        now = time.monotonic()
+        if nxt > now:
+            time.sleep(nxt - now)
+            now = time.monotonic()
+        while delayed and delayed[0][0] <= now:
+            sock.sendto(heapq.heappop(delayed)[2], dest)
+        while due and due[0][0] <= now:
+            when, i = heapq.heappop(due)
+            t = talkers[i]
+            max_lag = max(max_lag, now - when)
+            pkt = t.next_packet()
+            if loss and random.random() < loss:
+                t.dropped += 1
+            elif jitter:
+                n_delayed += 1
+                heapq.heappush(delayed, (when + random.uniform(0, jitter), n_delayed, pkt))
+                t.sent += 1
+            else:
+                sock.sendto(pkt, dest)
+                t.sent += 1
+            if when + t.period < end and not (stop and stop()):
+                heapq.heappush(due, (when + t.period, i))
+    for _at, _n, pkt in sorted(delayed):
+        sock.sendto(pkt, dest)
+    sock.close()
+    return {
+        "talkers": len(talkers),
+        "seconds": round(time.monotonic() - t0, 3),
+        "sent": sum(t.sent for t in talkers),
+        "dropped": sum(t.dropped for t in talkers),
+        "max_send_lag_ms": round(max_lag * 1000.0, 3),  # generator falling behind skews results
+        "cpu_sec": round(time.process_time() - cpu0, 3),
+        "per_talker": [{"ssrc": t.ssrc, "ptime_us": t.ptime_us, "freq": t.freq, "sent": t.sent, "dropped": t.dropped}
+                       for t in talkers],
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--talkers", type=int, default=4)
+    ap.add_argument("--group", default="239.69.0.121")
+    ap.add_argument("--port", type=int, default=5004)
+    ap.add_argument("--seconds", type=float, default=30.0)
+    ap.add_argument("--ptime-us", default="4000", help="comma-separated, cycled over talkers")
+    ap.add_argument("--channels", type=int, choices=(1, 2), default=1)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--loss-pct", type=float, default=0.0)
+    ap.add_argument("--ssrc-base", type=int, default=None)
+    ap.add_argument("--iface-addr", default=None, help="local IPv4 address to send from")
+    ap.add_argument("--seed", type=int, default=None)
+    a = ap.parse_args(argv)
+    if a.seed is not None:
+        random.seed(a.seed)
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    talkers = make_talkers(a.talkers, [int(p) for p in a.ptime_us.split(",") if p], a.channels, a.ssrc_base)
+    try:
+        summary = run(talkers, a.group, a.port, a.seconds, a.jitter_ms, a.loss_pct,
+                      iface_addr=a.iface_addr, stop=lambda: bool(stopping))
+    except KeyboardInterrupt:
+        return 130
+    json.dump(summary, sys.stdout)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# backend/meters.py
+"""
+Batch RMS/peak metering of interleaved S16 blocks.
+
+The RX pipeline interleaves the mix and every talker (one S16 mono channel each) into
+one buffer per meter period, so a single call here meters them all: one pass over a
+(frames x slots) block instead of one `level` element and bus message per stream.
+NumPy makes the pass vectorized; without it the same reduction runs per column with
+C-level array slicing and map() over every PY_STRIDE-th frame, which is enough for a
+meter (a full-rate pass costs ~0.1 us per sample) and needs nothing installed.
+"""
+import array
+import math
+import operator
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python reduction below
+    np = None
+
+FULL_SCALE = 32768.0
+PY_STRIDE = 4  # the pure-Python fallback reads every 4th frame (12 kHz effective)
+
+
+def _db(power):
+    """dBFS of a mean-square (or squared peak) value on the S16 scale; None for digital silence."""
+    return 10.0 * math.log10(power / (FULL_SCALE * FULL_SCALE)) if power > 0 else None
+
+
+def block_levels(pcm, channels):
+    """(rms_db list, peak_db list), one entry per interleaved S16LE channel of `pcm`."""
+    channels = max(1, int(channels))
+    frames = len(pcm) // (2 * channels)
+    if frames == 0:
+        return [None] * channels, [None] * channels
+    if np is not None:
+        a = np.frombuffer(pcm, dtype="<i2", count=frames * channels).reshape(frames, channels)
+        a = a.astype(np.float32)
+        ms = np.einsum("ij,ij->j", a, a) / frames
+        pk = np.abs(a).max(axis=0)
+        return [_db(float(v)) for v in ms], [_db(float(v) * float(v)) for v in pk]
+    a = array.array("h")
+    a.frombytes(pcm[:frames * channels * 2])
+    if sys.byteorder == "big":
+        a.byteswap()
+    rms, peak = [], []
+    step = channels * PY_STRIDE
+    for c in range(channels):
+        col = a[c::step]
+        rms.append(_db(sum(map(operator.mul, col, col)) / len(col)))
+        p = max(max(col), -min(col))
+        peak.append(_db(float(p) * p))
+    return rms, peak
+
+
+def backend():
+    return "numpy" if np is not None else "python"
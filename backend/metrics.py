@@ -0,0 +1,176 @@
+# backend/metrics.py
+import bisect
+import math
+import threading
+
+
+def _fmt(v):
+    if v is None:
+        return "NaN"
+    if isinstance(v, bool):
+        return "1" if v else "0"
+    if isinstance(v, float):
+        if math.isinf(v):
+            return "+Inf" if v > 0 else "-Inf"
+        if math.isnan(v):
+            return "NaN"
+        return repr(v)
+    return str(v)
+
+
+def _esc(v):
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_esc(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}  # label values tuple -> child state
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        k = self._key(labels)
+        with self._lock:
+            self._children[k] = self._children.get(k, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = list(self._children.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; observe() is a bisect plus two additions."""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def observe(self, value, **labels):
+        k = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            st = self._children.get(k)
+            if st is None:
+                st = self._children[k] = [[0] * (len(self.buckets) + 1), 0.0]
+            st[0][i] += 1
+            st[1] += value
+
+    def render(self):
+        with self._lock:
+            items = [(k, list(c), s) for k, (c, s) in self._children.items()]
+        out = []
+        for k, counts, total in items:
+            acc = 0
+            for b, c in zip(self.buckets, counts):
+                acc += c
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, k, ('le', _fmt(b)))} {acc}")
+            acc += counts[-1]
+            out.append(f"{self.name}_bucket{_labels(self.labelnames, k, ('le', '+Inf'))} {acc}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, k)} {_fmt(total)}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, k)} {acc}")
+        return out
+
+
+class Registry:
+    """
+    Metrics in Prometheus text exposition format (0.0.4).
+
+    Event-driven metrics (Counter/Histogram) are updated where things happen; state
+    owned elsewhere is read at scrape time by collectors, which return
+    [(name, kind, help, [(labels_dict, value), ...]), ...] built from existing snapshots.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn):
+        with self._lock:
+            self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        lines = []
+        for fn in collectors:
+            try:
+                families = fn()
+            except Exception as e:
+                print("metrics collector failed:", e)
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is None:  # unknown right now: omit rather than export NaN
+                        continue
+                    keys = tuple(labels)
+                    lines.append(f"{name}{_labels(keys, [labels[k] for k in keys])} {_fmt(value)}")
+        for m in metrics:
+            lines.extend(m.header())
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "aes67_http_request_duration_seconds", "HTTP handler latency (streaming responses: time to first byte).",
+    ("method", "endpoint", "status"),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)))
+
+STATE_CHANGE = REGISTRY.register(Histogram(
+    "aes67_pipeline_state_change_seconds", "Time for a pipeline to reach its target state.",
+    ("pipeline", "target"),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4)))
+
+BUS_LAG = REGISTRY.register(Histogram(
+    "aes67_bus_message_lag_seconds", "Delay between a bus message being posted and the bus loop handling it.",
+    ("pipeline",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1)))
+
+BUS_MESSAGES = REGISTRY.register(Counter(
+    "aes67_bus_messages_total", "Bus messages handled by the bus loops.", ("pipeline", "type")))
+
+
+def observe_bus_message(Gst, pipeline, msg):
+    """Record one handled bus message; lag uses the post timestamp GStreamer stamps on every message."""
+    try:
+        ts = msg.timestamp
+        if ts is not None and ts != Gst.CLOCK_TIME_NONE:
+            BUS_LAG.observe(max(0, Gst.util_get_timestamp() - ts) / 1e9, pipeline=pipeline)
+        BUS_MESSAGES.inc(pipeline=pipeline, type=Gst.MessageType.get_name(msg.type))
+    except Exception:
+        pass
@@ -0,0 +1,407 @@
+# backend/metrics_history.py
+"""
+Fixed-memory history of RX metrics, for questions like "what happened at 21:14?".
+
+Every SAMPLE_SEC one row per channel is written: packet and byte rate, mix level, and
+level / newly lost packets / jitter for up to MAX_TALKERS talkers. Rows live in
+preallocated float32 rings (array("f"), NaN = no data), one ring per resolution tier:
+the raw 10 Hz samples plus rollup tiers that keep min/max/mean per bucket. Nothing is
+allocated while recording, so memory is fixed from the moment a channel is first seen
+(see ChannelHistory.nbytes()). Per-talker raw samples cover TALKER_RAW_SEC only; older
+talker data comes from the 10 s rollups.
+
+query() serves any time range downsampled to N points from the coarsest tier that still
+resolves one point and covers the range.
+"""
+import math
+import threading
+import time
+from array import array
+
+NAN = float("nan")
+SAMPLE_SEC = 0.1
+SILENCE_DB = -120.0  # level recorded for a present talker (or running mix) with digital silence
+
+
+class _Tier:
+    """A ring of `rows` buckets of `step` seconds, `width` series per row (row-major)."""
+
+    def __init__(self, step, seconds, width, rollup):
+        self.step = float(step)
+        self.rows = max(1, int(round(seconds / self.step)))
+        self.width = width
+        self.rollup = rollup
+        blank = array("f", [NAN]) * (self.rows * width)
+        # raw tiers only use lo; rollups keep min/max/mean of the bucket's samples
+        self.lo = blank
+        self.hi = array("f", blank) if rollup else None
+        self.mean = array("f", blank) if rollup else None
+        self._cnt = [0] * width
+        self._sum = [0.0] * width
+        self.head = None  # absolute index (time // step) of the newest bucket
+
+    def arrays(self):
+        return [a for a in (self.lo, self.hi, self.mean) if a is not None]
+
+    def nbytes(self):
+        return sum(a.buffer_info()[1] * a.itemsize for a in self.arrays())
+
+    def retention(self):
+        return self.rows * self.step
+
+    def clear(self):
+        for a in self.arrays():
+            a[:] = array("f", [NAN]) * len(a)
+        self._cnt = [0] * self.width
+        self._sum = [0.0] * self.width
+        self.head = None
+
+    def clear_column(self, c):
+        col = array("f", [NAN]) * self.rows
+        for a in self.arrays():
+            a[c::self.width] = col
+        self._cnt[c] = 0
+        self._sum[c] = 0.0
+
+    def _blank_rows(self, ka, kb):
+        """NaN out absolute buckets ka..kb (fewer than `rows` of them), in at most two slices."""
+        w, rows = self.width, self.rows
+        i0, n = ka % rows, kb - ka + 1
+        for lo, hi in ((i0, min(rows, i0 + n)), (0, max(0, i0 + n - rows))):
+            if hi > lo:
+                blank = array("f", [NAN]) * ((hi - lo) * w)
+                for a in self.arrays():
+                    a[lo * w:hi * w] = blank
+
+    def add(self, t, row):
+        k = int(t // self.step)
+        if self.head is not None and k - self.head >= self.rows:
+            self.clear()  # the gap outlasts the ring: wipe it in one go
+        elif self.head is not None and k < self.head:
+            k = self.head  # a late sample joins the newest bucket; recorded history is never rewritten
+        w = self.width
+        if self.head is None or k > self.head:
+            self._blank_rows(self.head + 1 if self.head is not None else k, k)
+            self._cnt = [0] * w
+            self._sum = [0.0] * w
+            self.head = k
+        i = (k % self.rows) * w
+        if not self.rollup:
+            self.lo[i:i + w] = array("f", row)
+            return
+        lo, hi, mean, cnt, sm = self.lo, self.hi, self.mean, self._cnt, self._sum
+        for c, v in enumerate(row):
+            if v != v:
+                continue
+            n = cnt[c] = cnt[c] + 1
+            sm[c] += v
+            if n == 1:
+                lo[i + c] = hi[i + c] = v
+            else:
+                if v < lo[i + c]:
+                    lo[i + c] = v
+                if v > hi[i + c]:
+                    hi[i + c] = v
+            mean[i + c] = sm[c] / n
+
+    def column(self, a, c, ka, kb):
+        """Values of column c for absolute buckets ka..kb (inclusive, within the ring)."""
+        n = kb - ka + 1
+        w, rows = self.width, self.rows
+        i0 = ka % rows
+        if i0 + n <= rows:
+            return a[i0 * w + c:(i0 + n) * w:w].tolist()
+        first = rows - i0
+        return a[i0 * w + c::w].tolist() + a[c:(n - first) * w:w].tolist()
+
+
+def _pick(tiers, start, end, bucket):
+    """Coarsest tier with step <= bucket that covers start; else the finest covering one."""
+    newest = max(((t.head + 1) * t.step for t in tiers if t.head is not None), default=end)
+    covering = [t for t in tiers if newest - t.retention() <= start] or \
+        [max(tiers, key=lambda t: t.retention())]
+    fine = [t for t in covering if t.step <= bucket]
+    return max(fine, key=lambda t: t.step) if fine else min(covering, key=lambda t: t.step)
+
+
+def _extract(tier, cols, start, end):
+    """
+    (first bucket, step, {col: (min, max, mean lists)}) of a tier over [start, end), or
+    None. Plain list copies, so binning can run without the history lock.
+    """
+    if tier.head is None:
+        return None
+    ka = max(int(start // tier.step), tier.head - tier.rows + 1)
+    kb = min(int(math.ceil(end / tier.step)) - 1, tier.head)
+    if kb < ka:
+        return None
+    data = {}
+    for c in cols:
+        lo_v = tier.column(tier.lo, c, ka, kb)
+        data[c] = (lo_v, tier.column(tier.hi, c, ka, kb), tier.column(tier.mean, c, ka, kb)) if tier.rollup \
+            else (lo_v, lo_v, lo_v)
+    return ka, tier.step, data
+
+
+def _bin(extract, cols, start, end, points):
+    """{col: (min list, max list, mean list)} over `points` equal buckets of [start, end)."""
+    out = {c: ([None] * points, [None] * points, [None] * points) for c in cols}
+    if extract is None:
+        return out
+    ka, step, data = extract
+    bw = (end - start) / points
+    n = len(next(iter(data.values()))[0]) if data else 0
+    # point index of each bucket, by its start time (shared by all columns)
+    idx = [min(points - 1, max(0, int(((ka + j) * step - start) / bw))) for j in range(n)]
+    for c in cols:
+        lo_v, hi_v, mean_v = data[c]
+        lo, hi, mean = out[c]
+        sums = [0.0] * points
+        cnts = [0] * points
+        for j, p in enumerate(idx):
+            m = mean_v[j]
+            if m != m:
+                continue
+            if cnts[p] == 0:
+                lo[p], hi[p] = lo_v[j], hi_v[j]
+            else:
+                if lo_v[j] < lo[p]:
+                    lo[p] = lo_v[j]
+                if hi_v[j] > hi[p]:
+                    hi[p] = hi_v[j]
+            sums[p] += m
+            cnts[p] += 1
+        for p in range(points):
+            if cnts[p]:
+                mean[p] = sums[p] / cnts[p]
+    return out
+
+
+def _downsample(tier, cols, start, end, points):
+    """_extract + _bin in one call (for callers that already hold the lock or own the tier)."""
+    return _bin(_extract(tier, cols, start, end), cols, start, end, points)
+
+
+def _rounded(v):
+    return round(v, 2) if v is not None else None
+
+
+class ChannelHistory:
+    """
+    History of one RX channel. add() is called by HistoryRecorder every SAMPLE_SEC;
+    query() may run concurrently from request threads.
+    """
+    CHANNEL_SERIES = ("pps", "bps", "mix_level_db")
+    TALKER_SERIES = ("level_db", "lost", "jitter_ms")  # lost: packets newly counted lost in the sample
+    MAX_TALKERS = 16
+    TALKER_RAW_SEC = 3600.0
+
+    def __init__(self, hours=24.0):
+        sec = max(SAMPLE_SEC, float(hours) * 3600.0)
+        nc, nt = len(self.CHANNEL_SERIES), len(self.TALKER_SERIES) * self.MAX_TALKERS
+        self.tiers = [_Tier(SAMPLE_SEC, sec, nc, False), _Tier(1.0, sec, nc, True), _Tier(60.0, sec, nc, True)]
+        self.talker_tiers = [_Tier(SAMPLE_SEC, min(sec, self.TALKER_RAW_SEC), nt, False),
+                             _Tier(10.0, sec, nt, True)]
+        self.slots = [None] * self.MAX_TALKERS  # {"ssrc", "name", "first_seen", "last_seen", "lost"}
+        self._prev = None  # (t, packets_total, bytes_total)
+        self._lock = threading.Lock()
+
+    def nbytes(self):
+        return sum(t.nbytes() for t in self.tiers + self.talker_tiers)
+
+    def _slot(self, ssrc, name, t):
+        free = None
+        for i, s in enumerate(self.slots):
+            if s is None:
+                free = i if free is None else free
+            elif s["ssrc"] == ssrc:
+                s["last_seen"] = t
+                if name:
+                    s["name"] = name
+                return i
+        if free is None:
+            # reuse the talker silent longest, unless every slot was heard in this sample
+            free = min(range(len(self.slots)), key=lambda i: self.slots[i]["last_seen"])
+            if self.slots[free]["last_seen"] >= t:
+                return None
+            for tier in self.talker_tiers:
+                for c in range(len(self.TALKER_SERIES)):
+                    tier.clear_column(free * len(self.TALKER_SERIES) + c)
+        self.slots[free] = {"ssrc": ssrc, "name": name, "first_seen": t, "last_seen": t, "lost": None}
+        return free
+
+    def add(self, t, metrics, mix_level_db=None, peers=()):
+        """One sample: an RX metrics snapshot (packets_total/bytes_total), the mix level and peers_snapshot()."""
+        pps = bps = NAN
+        pkts, byts = metrics.get("packets_total"), metrics.get("bytes_total")
+        prev = self._prev
+        if prev is not None and pkts is not None and byts is not None:
+            dt = t - prev[0]
+            if 0 < dt <= 1.0 and pkts >= prev[1] and byts >= prev[2]:
+                pps, bps = (pkts - prev[1]) / dt, (byts - prev[2]) / dt
+        self._prev = (t, pkts, byts) if pkts is not None and byts is not None else None
+        mix = SILENCE_DB if mix_level_db is None and peers else mix_level_db
+        row = [pps, bps, NAN if mix is None else mix]
+        per = len(self.TALKER_SERIES)
+        trow = [NAN] * (per * self.MAX_TALKERS)
+        with self._lock:
+            for p in peers:
+                i = self._slot(p["ssrc"], p.get("name"), t)
+                if i is None:
+                    continue
+                s = self.slots[i]
+                lost = p.get("lost")
+                d = NAN
+                if lost is not None:
+                    d = max(0, lost - s["lost"]) if s["lost"] is not None else 0.0
+                    s["lost"] = lost
+                ld, jit = p.get("level_db"), p.get("jitter_ms")
+                trow[i * per:(i + 1) * per] = [SILENCE_DB if ld is None else ld, d, NAN if jit is None else jit]
+            for tier in self.tiers:
+                tier.add(t, row)
+            for tier in self.talker_tiers:
+                tier.add(t, trow)
+
+    def query(self, start, end, points, series=None, ssrcs=None):
+        """Series over [start, end) (unix seconds) as `points` min/max/mean buckets; None where no data."""
+        points = max(1, int(points))
+        bucket = (end - start) / points
+        want = set(series) if series else None
+        out = {"start": start, "end": end, "points": points, "bucket_sec": bucket,
+               "t": [round(start + p * bucket, 3) for p in range(points)]}
+        per = len(self.TALKER_SERIES)
+        cols = [c for c, name in enumerate(self.CHANNEL_SERIES) if want is None or name in want]
+        names = [(c, n) for c, n in enumerate(self.TALKER_SERIES) if want is None or n in want]
+        tcols = []
+        # copy what is needed under the lock; binning (the slow part) must not stall add()
+        with self._lock:
+            tier = _pick(self.tiers, start, end, bucket)
+            ext = _extract(tier, cols, start, end)
+            out["resolution_sec"] = tier.step
+            slots = [(i, dict(s)) for i, s in enumerate(self.slots)
+                     if s is not None and s["last_seen"] >= start and s["first_seen"] < end
+                     and (not ssrcs or s["ssrc"] in ssrcs)]
+            if names and slots:
+                ttier = _pick(self.talker_tiers, start, end, bucket)
+                tcols = [i * per + c for i, _ in slots for c, _ in names]
+                text = _extract(ttier, tcols, start, end)
+                out["talker_resolution_sec"] = ttier.step
+        data = _bin(ext, cols, start, end, points)
+        out["series"] = {self.CHANNEL_SERIES[c]: {"min": [_rounded(v) for v in data[c][0]],
+                                                 "max": [_rounded(v) for v in data[c][1]],
+                                                 "mean": [_rounded(v) for v in data[c][2]]} for c in cols}
+        talkers = []
+        if tcols:
+            data = _bin(text, tcols, start, end, points)
+            for i, s in slots:
+                talkers.append({
+                    "ssrc": s["ssrc"], "name": s["name"],
+                    "first_seen": round(s["first_seen"], 1), "last_seen": round(s["last_seen"], 1),
+                    "series": {n: {"min": [_rounded(v) for v in data[i * per + c][0]],
+                                   "max": [_rounded(v) for v in data[i * per + c][1]],
+                                   "mean": [_rounded(v) for v in data[i * per + c][2]]} for c, n in names},
+                })
+        out["talkers"] = talkers
+        return out
+
+
+class HistoryRecorder:
+    """
+    Samples all channels every SAMPLE_SEC on its own thread. `sample()` returns
+    {channel: (metrics, mix_level_db, peers)} for the channels receiving right now; a
+    ChannelHistory is allocated the first time a channel shows up and kept across RX
+    restarts until configure() changes the retention or the channel disappears.
+
+    Samples are stamped on a monotonic timeline anchored to the wall clock. When the
+    wall clock jumps ahead (suspend, NTP step), the timeline follows and the history
+    shows a gap. When it steps back, the timeline carries on, so nothing recorded is
+    overwritten; clock_skew() then says how far the stamps run ahead of the wall clock.
+    """
+    CLOCK_STEP_SEC = 1.0
+
+    def __init__(self, sample, hours=24.0):
+        self._sample = sample
+        self.hours = float(hours)
+        self._lock = threading.Lock()
+        self._hist = {}  # channel -> ChannelHistory
+        self._thread = None
+        self._stop = threading.Event()
+        self.overruns = 0
+        self._offset = time.time() - time.monotonic()
+
+    def configure(self, hours):
+        """Change the retention (drops recorded history); 0 stops recording."""
+        hours = max(0.0, float(hours))
+        with self._lock:
+            if hours != self.hours:
+                self._hist = {}
+            self.hours = hours
+        if hours > 0:
+            self.start()
+        else:
+            self.stop()
+
+    def retain(self, channels):
+        with self._lock:
+            for name in [n for n in self._hist if n not in channels]:
+                del self._hist[name]
+
+    def get(self, channel):
+        with self._lock:
+            return self._hist.get(channel)
+
+    def nbytes(self):
+        with self._lock:
+            return {n: h.nbytes() for n, h in self._hist.items()}
+
+    def now(self):
+        """Current time on the sample timeline (unix seconds)."""
+        t = time.monotonic() + self._offset
+        wall = time.time()
+        if wall - t > self.CLOCK_STEP_SEC:
+            self._offset += wall - t
+            t = wall
+        return t
+
+    def clock_skew(self):
+        """Seconds the sample timeline runs ahead of the wall clock (after a backward step)."""
+        return max(0.0, time.monotonic() + self._offset - time.time())
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-history", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        t = self._thread
+        if t is not None and t is not threading.current_thread():
+            t.join(timeout=1.0)
+        self._thread = None
+
+    def _run(self):
+        due = time.monotonic()
+        while not self._stop.is_set():
+            t = self.now()
+            try:
+                samples = self._sample()
+            except Exception as e:
+                print("metrics history sample failed:", e)
+                samples = {}
+            for name, (metrics, mix, peers) in samples.items():
+                with self._lock:
+                    h = self._hist.get(name)
+                    if h is None and self.hours > 0:
+                        h = self._hist[name] = ChannelHistory(self.hours)
+                if h is not None:
+                    h.add(t, metrics, mix, peers)
+            due += SAMPLE_SEC
+            wait = due - time.monotonic()
+            if wait < 0:
+                # fell behind (slow sample or suspended): skip ahead instead of bursting
+                self.overruns += 1
+                due = time.monotonic()
+                wait = 0
+            self._stop.wait(wait)
@@ -1,5 +1,7 @@
 import time
-import threading
+
+from metrics import STATE_CHANGE, observe_bus_message
+import gst_runtime
 
 
 class MicMonitor:
@@ -7,8 +9,7 @@ class MicMonitor:
         self.pipeline = None
         self.Gst = None
         self.level_db = None
-        self._stop_evt = threading.Event()
-        self._bus_thread = None
+        self._unwatch = None  # bus watch removal while running (gst_runtime main loop)
         self.device = ""
 
     def _norm_dev(self, dev: str) -> str:
@@ -28,41 +29,30 @@ class MicMonitor:
             return f"hw:{m.group(1)},{m.group(2)}"
         return d
 
-    def _bus_loop(self):
+    def _on_bus_message(self, msg):
+        """Bus watch on the shared main loop: each level message lands as soon as it is posted."""
         Gst = self.Gst
-        bus = self.pipeline.get_bus()
-        mask = Gst.MessageType.ERROR | Gst.MessageType.EOS | Gst.MessageType.ELEMENT
-        while not self._stop_evt.is_set():
-            msg = bus.timed_pop_filtered(100 * Gst.MSECOND, mask)
-            if not msg:
-                continue
-            t = msg.type
-            if t == Gst.MessageType.ERROR:
-                err, dbg = msg.parse_error()
-                print("MIC MON ERROR:", err, dbg)
-            elif t == Gst.MessageType.ELEMENT:
-                s = msg.get_structure()
-                if s and s.get_name() == "level":
-                    try:
-                        rms = s.get_value("rms")
-                        if isinstance(rms, (list, tuple)) and rms:
-                            self.level_db = float(rms[0])
-                        else:
-                            self.level_db = None
-                    except Exception:
+        t = msg.type
+        if t not in (Gst.MessageType.ERROR, Gst.MessageType.EOS, Gst.MessageType.ELEMENT):
+            return
+        observe_bus_message(Gst, "mic", msg)
+        if t == Gst.MessageType.ERROR:
+            err, dbg = msg.parse_error()
+            print("MIC MON ERROR:", err, dbg)
+        elif t == Gst.MessageType.ELEMENT:
+            s = msg.get_structure()
+            if s and s.get_name() == "level":
+                try:
+                    rms = s.get_value("rms")
+                    if isinstance(rms, (list, tuple)) and rms:
+                        self.level_db = float(rms[0])
+                    else:
                         self.level_db = None
+                except Exception:
+                    self.level_db = None
 
     def _build(self, dev: str, with_audio: bool):
-        try:
-            import gi  # type: ignore
-        except ModuleNotFoundError:
-            import sys
-            sys.path.append("/usr/lib/python3/dist-packages")
-            import gi  # type: ignore
-        gi.require_version('Gst', '1.0')
-        from gi.repository import Gst
-        self.Gst = Gst
-        Gst.init(None)
+        Gst = self.Gst = gst_runtime.gst()
 
         pipe = Gst.Pipeline.new("mic-monitor")
         src = Gst.ElementFactory.make("alsasrc", "src")
@@ -107,15 +97,19 @@ class MicMonitor:
     def _start_try(self, dev: str, with_audio: bool) -> bool:
         self._build(dev, with_audio)
         self.level_db = None
-        self._stop_evt.clear()
+        t0 = time.monotonic()
         self.pipeline.set_state(self.Gst.State.PAUSED)
         st = self.pipeline.get_state(timeout=2 * self.Gst.SECOND)
         self.pipeline.set_state(self.Gst.State.PLAYING)
         st = self.pipeline.get_state(timeout=2 * self.Gst.SECOND)
         ok = st and st[0] != self.Gst.StateChangeReturn.FAILURE
-        if ok and (not self._bus_thread or not self._bus_thread.is_alive()):
-            self._bus_thread = threading.Thread(target=self._bus_loop, daemon=True)
-            self._bus_thread.start()
+        if ok:
+            STATE_CHANGE.observe(time.monotonic() - t0, pipeline="mic", target="PLAYING")
+        if ok:
+            self._unwatch = gst_runtime.watch_bus(self.pipeline.get_bus(), self._on_bus_message)
+        else:
+            self.pipeline.set_state(self.Gst.State.NULL)
+            self.pipeline = None
         return ok
 
     def start(self, device: str, with_audio: bool = True) -> bool:
@@ -144,7 +138,9 @@ class MicMonitor:
 
     def stop(self):
         try:
-            self._stop_evt.set()
+            if self._unwatch is not None:
+                self._unwatch()
+                self._unwatch = None
             if self.pipeline is not None:
                 try:
                     self.pipeline.send_event(self.Gst.Event.new_eos())
@@ -160,3 +156,6 @@ class MicMonitor:
     def get_level(self):
         return self.level_db
 
+    def is_running(self):
+        return self.pipeline is not None
+
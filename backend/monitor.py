@@ -1,15 +1,18 @@
 import socket, struct, threading, time
+from rate_stats import RateWindow
 
 class RxMonitor:
     def __init__(self):
         self.thread=None; self.stop_evt=threading.Event(); self.lock=threading.Lock()
         self.group=None; self.port=None
         self.stats={"packets_total":0,"bytes_total":0,"pps_recent":0.0,"bps_recent":0.0,"last_packet_ts":None}
+        self.rate=RateWindow(window_sec=2.0)
 
     def _run(self, group, port):
         with self.lock:
             self.group, self.port = group, int(port)
             self.stats={"packets_total":0,"bytes_total":0,"pps_recent":0.0,"bps_recent":0.0,"last_packet_ts":None}
+            self.rate.reset()
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         try: sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         except OSError: pass
@@ -21,7 +24,6 @@ class RxMonitor:
         mreq = struct.pack("=4sl", socket.inet_aton(group), socket.INADDR_ANY)
         sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
         sock.settimeout(0.2)
-        window=[]; WINDOW_SEC=2.0
         try:
             while not self.stop_evt.is_set():
                 try:
@@ -30,17 +32,9 @@ class RxMonitor:
                     with self.lock:
                         s=self.stats
                         s["packets_total"]+=1; s["bytes_total"]+=n; s["last_packet_ts"]=now
-                    window.append((now,n)); cutoff=now-WINDOW_SEC
-                    while window and window[0][0]<cutoff: window.pop(0)
-                    if window:
-                        dt=max(1e-6, window[-1][0]-window[0][0])
-                        pps=len(window)/dt; bps=sum(sz for _,sz in window)/dt
-                    else: pps=bps=0.0
-                    with self.lock:
-                        s=self.stats; s["pps_recent"]=pps; s["bps_recent"]=bps
+                        self.rate.add(now, n)
                 except socket.timeout:
-                    with self.lock:
-                        s=self.stats; s["pps_recent"]*=0.9; s["bps_recent"]*=0.9
+                    pass  # rates decay as the window slides; see read_stats()
         finally:
             try: sock.setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP, mreq)
             except OSError: pass
@@ -56,6 +50,9 @@ class RxMonitor:
 
     def read_stats(self):
         with self.lock:
+            r=self.rate.snapshot(time.time())
             s=dict(self.stats); s["group"]=self.group; s["port"]=self.port
+            s["pps_recent"]=r["pps"]; s["bps_recent"]=r["bps"]
+            s["iat_p50_ms"]=r["iat_p50_ms"]; s["iat_p99_ms"]=r["iat_p99_ms"]; s["burst_max"]=r["burst_max"]
             s["receiving"] = (s["last_packet_ts"] is not None) and ((time.time()-s["last_packet_ts"])<2.5)
             return s
@@ -0,0 +1,127 @@
+# backend/rate_stats.py
+import math
+
+
+class RateWindow:
+    """
+    Sliding-window packet/byte rate with inter-arrival statistics.
+
+    Time is split into fixed buckets kept in a ring; each bucket holds packet and byte
+    counts plus an inter-arrival histogram, and running sums are adjusted as buckets
+    enter and leave the window. Updates and snapshots are O(1) in the packet rate.
+    Not thread-safe: callers hold their own stats lock.
+    """
+    IAT_MIN_SEC = 1e-5       # 10 us .. 10 s, log-spaced
+    IAT_BINS_PER_DECADE = 16
+    IAT_BINS = 6 * IAT_BINS_PER_DECADE
+
+    def __init__(self, window_sec=2.0, bucket_sec=0.05):
+        self.bucket_sec = float(bucket_sec)
+        self.n = max(2, int(round(window_sec / self.bucket_sec)))
+        self.window_sec = self.n * self.bucket_sec
+        self.reset()
+
+    def reset(self):
+        n, nb = self.n, self.IAT_BINS
+        self._pkts = [0] * n
+        self._bytes = [0] * n
+        self._hist = [[0] * nb for _ in range(n)]
+        self._sum_pkts = 0
+        self._sum_bytes = 0
+        self._sum_hist = [0] * nb
+        self._head = None        # absolute index of the newest bucket
+        self._first_ts = None    # first sample since reset (rate denominator while filling)
+        self._last_ts = None     # last per-packet arrival (for inter-arrival)
+        self._per_packet = False
+
+    def _advance(self, now):
+        b = int(now // self.bucket_sec)
+        if self._head is None:
+            self._head = b
+            return
+        if b <= self._head:
+            return
+        # Expire at most one full window of buckets
+        for k in range(max(self._head + 1, b - self.n + 1), b + 1):
+            i = k % self.n
+            if self._pkts[i] or self._bytes[i]:
+                self._sum_pkts -= self._pkts[i]
+                self._sum_bytes -= self._bytes[i]
+                self._pkts[i] = 0
+                self._bytes[i] = 0
+            h = self._hist[i]
+            if any(h):
+                sh = self._sum_hist
+                for j, c in enumerate(h):
+                    if c:
+                        sh[j] -= c
+                        h[j] = 0
+        self._head = b
+
+    def _iat_bin(self, iat):
+        if iat <= self.IAT_MIN_SEC:
+            return 0
+        j = int(math.log10(iat / self.IAT_MIN_SEC) * self.IAT_BINS_PER_DECADE)
+        return j if j < self.IAT_BINS else self.IAT_BINS - 1
+
+    def add(self, now, nbytes):
+        """Record one packet arriving at `now` (seconds)."""
+        self._advance(now)
+        if self._first_ts is None:
+            self._first_ts = now
+        i = self._head % self.n
+        self._pkts[i] += 1
+        self._bytes[i] += nbytes
+        self._sum_pkts += 1
+        self._sum_bytes += nbytes
+        if self._last_ts is not None and now >= self._last_ts:
+            j = self._iat_bin(now - self._last_ts)
+            self._hist[i][j] += 1
+            self._sum_hist[j] += 1
+        self._last_ts = now
+        self._per_packet = True
+
+    def add_many(self, now, packets, nbytes):
+        """Record a batch of packets counted elsewhere (no inter-arrival information)."""
+        self._advance(now)
+        if self._first_ts is None:
+            self._first_ts = now
+        if not packets and not nbytes:
+            return
+        i = self._head % self.n
+        self._pkts[i] += packets
+        self._bytes[i] += nbytes
+        self._sum_pkts += packets
+        self._sum_bytes += nbytes
+
+    def _percentile(self, q):
+        total = sum(self._sum_hist)
+        if not total:
+            return None
+        want = q * total
+        acc = 0
+        for j, c in enumerate(self._sum_hist):
+            acc += c
+            if acc >= want:
+                # geometric centre of the bin
+                return self.IAT_MIN_SEC * 10 ** ((j + 0.5) / self.IAT_BINS_PER_DECADE)
+        return None
+
+    def snapshot(self, now):
+        """Return pps/bps over the window plus p50/p99 inter-arrival (ms) and burst max."""
+        self._advance(now)
+        if self._first_ts is None:
+            return {"pps": 0.0, "bps": 0.0, "iat_p50_ms": None, "iat_p99_ms": None, "burst_max": None}
+        # Full buckets behind the head plus the elapsed part of the head bucket
+        span = (self.n - 1) * self.bucket_sec + (now - self._head * self.bucket_sec)
+        span = max(self.bucket_sec, min(span, now - self._first_ts))
+        p50 = self._percentile(0.50)
+        p99 = self._percentile(0.99)
+        return {
+            "pps": self._sum_pkts / span,
+            "bps": self._sum_bytes / span,
+            "iat_p50_ms": round(p50 * 1000.0, 3) if p50 is not None else None,
+            "iat_p99_ms": round(p99 * 1000.0, 3) if p99 is not None else None,
+            # most packets seen inside one bucket; only meaningful with per-packet adds
+            "burst_max": max(self._pkts) if self._per_packet else None,
+        }
@@ -0,0 +1,401 @@
+# backend/recorder.py
+import json
+import os
+import queue
+import struct
+import threading
+import time
+from pathlib import Path
+
+WAV_HEADER_BYTES = 44
+
+
+def wav_header(data_bytes: int, rate: int, channels: int, sampwidth: int = 2) -> bytes:
+    """Canonical 44-byte PCM WAV header."""
+    block = channels * sampwidth
+    return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + data_bytes, b"WAVE", b"fmt ", 16, 1,
+                       channels, rate, rate * block, block, sampwidth * 8, b"data", data_bytes)
+
+
+class SegmentRecorder:
+    """
+    Records PCM into fixed-length WAV segments with rotation and an index.
+
+    write() is called from the GStreamer streaming thread and only appends to a buffer;
+    roughly one second of audio at a time is handed to a writer thread, so the SD card
+    sees few large writes. Each segment's header is rewritten every HEADER_SYNC_SEC,
+    so a crash leaves every file playable up to the last sync. A new segment starts when
+    the duration or size cap is reached, or when audio resumes after a gap (so byte
+    offsets map linearly to wall time inside a segment). Closed segments older than
+    the retention window, or beyond the retention size, are deleted oldest first.
+    """
+    HEADER_SYNC_SEC = 5.0
+    FLUSH_SEC = 1.0
+    GAP_SEC = 1.0   # audio arriving this much later than expected starts a new segment
+    INDEX_NAME = "index.json"
+
+    def __init__(self, directory: Path, prefix="mix", segment_sec=300, max_segment_bytes=0,
+                 retention_sec=24 * 3600, retention_bytes=0, rate=48000, channels=1, sampwidth=2):
+        self.dir = Path(directory)
+        self.prefix = prefix
+        self.rate, self.channels, self.sampwidth = int(rate), int(channels), int(sampwidth)
+        self.frame_bytes = self.channels * self.sampwidth
+        self.bytes_per_sec = self.rate * self.frame_bytes
+        self.segment_bytes = int(max(1.0, float(segment_sec)) * self.rate) * self.frame_bytes
+        if max_segment_bytes:
+            cap = (int(max_segment_bytes) - WAV_HEADER_BYTES) // self.frame_bytes * self.frame_bytes
+            self.segment_bytes = max(self.frame_bytes, min(self.segment_bytes, cap))
+        self.retention_sec = float(retention_sec or 0)
+        self.retention_bytes = int(retention_bytes or 0)
+        self._flush_bytes = int(self.FLUSH_SEC * self.rate) * self.frame_bytes
+
+        self._lock = threading.Lock()      # guards _pending and _index
+        self._pending = bytearray()
+        self._pending_start = None         # wall time of the first pending sample
+        self._q = queue.Queue()
+        self._index = []                   # [{"file","start_ts","bytes"}], oldest first; last may be open
+        self._cur = None                   # open segment: {"entry","fh","synced"}
+        self._closed = False
+        self._thread = None
+
+    # ---------- public ----------
+    def start(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+        return self
+
+    def write(self, pcm: bytes):
+        """Append raw PCM (streaming thread). Never touches the disk."""
+        if self._closed or not pcm:
+            return
+        now = time.time()
+        with self._lock:
+            if not self._pending:
+                self._pending_start = now - len(pcm) / self.bytes_per_sec
+            self._pending += pcm
+            if len(self._pending) < self._flush_bytes:
+                return
+            chunk, start = bytes(self._pending), self._pending_start
+            self._pending = bytearray()
+        self._q.put((start, chunk))
+
+    def close(self):
+        """Flush buffered audio, finalise the open segment and stop the writer."""
+        if self._closed:
+            return
+        self._closed = True
+        with self._lock:
+            chunk, start = bytes(self._pending), self._pending_start
+            self._pending = bytearray()
+        if chunk:
+            self._q.put((start, chunk))
+        self._q.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+
+    def segments(self):
+        """Index entries with end times, oldest first."""
+        with self._lock:
+            out = []
+            for e in self._index:
+                dur = e["bytes"] / self.bytes_per_sec
+                out.append({"file": e["file"], "start_ts": round(e["start_ts"], 3),
+                            "end_ts": round(e["start_ts"] + dur, 3), "duration_sec": round(dur, 3),
+                            "bytes": e["bytes"] + WAV_HEADER_BYTES, "open": self._cur is not None and e is self._cur["entry"]})
+            return out
+
+    def plan_range(self, start_ts: float, end_ts: float):
+        """
+        Map a wall-clock range onto segment byte spans. Returns (parts, first_ts, data_bytes)
+        where parts is [(path, offset, length)]; gaps between segments are skipped.
+        """
+        parts, first, total = [], None, 0
+        for e in self.segments():
+            lo, hi = max(start_ts, e["start_ts"]), min(end_ts, e["end_ts"])
+            if hi <= lo:
+                continue
+            off = int((lo - e["start_ts"]) * self.rate) * self.frame_bytes
+            ln = int((hi - lo) * self.rate) * self.frame_bytes
+            ln = min(ln, e["bytes"] - WAV_HEADER_BYTES - off)
+            if ln <= 0:
+                continue
+            parts.append((self.dir / e["file"], WAV_HEADER_BYTES + off, ln))
+            first = lo if first is None else first
+            total += ln
+        return parts, first, total
+
+    def open_range(self, parts):
+        """
+        Open plan_range() parts up front, so rotation can't delete a file between sending the
+        length and streaming the data. Returns (opened, data_bytes); iter_range() closes them.
+        """
+        opened, total = [], 0
+        for path, off, ln in parts:
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue  # rotated away meanwhile
+            ln = max(0, min(ln, os.fstat(f.fileno()).st_size - off))
+            opened.append((f, off, ln))
+            total += ln
+        return opened, total
+
+    def iter_range(self, opened, chunk=64 * 1024):
+        """Yield exactly the bytes open_range() promised, closing its files."""
+        try:
+            for f, off, ln in opened:
+                f.seek(off)
+                while ln > 0:
+                    b = f.read(min(chunk, ln))
+                    if not b:
+                        yield bytes(ln)  # truncated under us: keep Content-Length honest
+                        break
+                    ln -= len(b)
+                    yield b
+        finally:
+            for f, _off, _ln in opened:
+                f.close()
+
+    # ---------- writer thread ----------
+    def _writer(self):
+        while True:
+            item = self._q.get()
+            if item is None:
+                break
+            try:
+                self._append(*item)
+            except OSError as e:
+                print("Recorder write failed:", e)
+        try:
+            self._close_segment()
+        except OSError as e:
+            print("Recorder close failed:", e)
+
+    def _append(self, start_ts, data):
+        cur = self._cur
+        if cur is not None:
+            expected = cur["entry"]["start_ts"] + cur["entry"]["bytes"] / self.bytes_per_sec
+            if abs(start_ts - expected) > self.GAP_SEC:
+                self._close_segment()
+        mv = memoryview(data)
+        while mv:
+            if self._cur is None:
+                self._open_segment(start_ts)
+            cur = self._cur
+            room = self.segment_bytes - cur["entry"]["bytes"]
+            part = mv[:room]
+            cur["fh"].write(part)
+            cur["fh"].flush()  # one ~FLUSH_SEC write; readers may use everything counted in "bytes"
+            with self._lock:
+                cur["entry"]["bytes"] += len(part)
+            mv = mv[len(part):]
+            start_ts += len(part) / self.bytes_per_sec
+            if cur["entry"]["bytes"] >= self.segment_bytes:
+                self._close_segment()
+            elif time.monotonic() - cur["synced"] >= self.HEADER_SYNC_SEC:
+                self._sync_header(cur)
+
+    def _open_segment(self, start_ts):
+        secs, ms = divmod(int(round(start_ts * 1000)), 1000)
+        stem = f"{self.prefix}-{time.strftime('%Y%m%d-%H%M%S', time.gmtime(secs))}-{ms:03d}"
+        name, n = f"{stem}.wav", 1
+        while (self.dir / name).exists():
+            name, n = f"{stem}_{n}.wav", n + 1
+        fh = open(self.dir / name, "wb")
+        fh.write(wav_header(0, self.rate, self.channels, self.sampwidth))
+        entry = {"file": name, "start_ts": start_ts, "bytes": 0}
+        with self._lock:
+            self._index.append(entry)
+        self._cur = {"entry": entry, "fh": fh, "synced": time.monotonic()}
+        self._save_index()
+
+    def _sync_header(self, cur):
+        fh = cur["fh"]
+        fh.flush()
+        pos = fh.tell()
+        fh.seek(0)
+        fh.write(wav_header(cur["entry"]["bytes"], self.rate, self.channels, self.sampwidth))
+        fh.seek(pos)
+        fh.flush()
+        cur["synced"] = time.monotonic()
+
+    def _close_segment(self):
+        cur, self._cur = self._cur, None
+        if cur is None:
+            return
+        self._sync_header(cur)
+        cur["fh"].close()
+        self._rotate()
+        self._save_index()
+
+    def _rotate(self):
+        now = time.time()
+        with self._lock:
+            closed = [e for e in self._index if self._cur is None or e is not self._cur["entry"]]
+            total = sum(e["bytes"] + WAV_HEADER_BYTES for e in self._index)
+            drop = []
+            for e in closed:
+                end = e["start_ts"] + e["bytes"] / self.bytes_per_sec
+                too_old = self.retention_sec and now - end > self.retention_sec
+                too_big = self.retention_bytes and total > self.retention_bytes
+                if not (too_old or too_big):
+                    break
+                drop.append(e)
+                total -= e["bytes"] + WAV_HEADER_BYTES
+            for e in drop:
+                self._index.remove(e)
+        for e in drop:
+            try:
+                (self.dir / e["file"]).unlink()
+            except FileNotFoundError:
+                pass
+
+    # ---------- index ----------
+    def _save_index(self):
+        with self._lock:
+            data = {"rate": self.rate, "channels": self.channels, "sampwidth": self.sampwidth,
+                    "segments": [dict(e) for e in self._index]}
+        tmp = self.dir / (self.INDEX_NAME + ".tmp")
+        with tmp.open("w") as f:
+            json.dump(data, f, indent=2)
+        tmp.replace(self.dir / self.INDEX_NAME)
+
+    @classmethod
+    def open_index(cls, directory: Path):
+        """Read-only view of an existing recording directory (no writer thread, no repairs)."""
+        data = cls._read_index_file(Path(directory))
+        rec = cls(directory, rate=data.get("rate") or 48000, channels=data.get("channels") or 1,
+                  sampwidth=data.get("sampwidth") or 2)
+        rec._closed = True
+        rec._load_index(data, repair=False)
+        return rec
+
+    @classmethod
+    def _read_index_file(cls, directory):
+        try:
+            with (directory / cls.INDEX_NAME).open() as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load_index(self, data=None, repair=True):
+        """Reload the previous index, dropping missing files and repairing headers left by a crash."""
+        if data is None:
+            data = self._read_index_file(self.dir)
+        fmt = (data.get("rate"), data.get("channels"), data.get("sampwidth"))
+        if fmt != (self.rate, self.channels, self.sampwidth):
+            data = {}  # format changed: keep the files, but don't mix them into range exports
+        index = []
+        for e in data.get("segments") or []:
+            p = self.dir / e.get("file", "")
+            try:
+                size = p.stat().st_size
+            except OSError:
+                continue
+            nbytes = max(0, size - WAV_HEADER_BYTES) // self.frame_bytes * self.frame_bytes
+            if repair:
+                try:
+                    with open(p, "r+b") as f:
+                        f.write(wav_header(nbytes, self.rate, self.channels, self.sampwidth))
+                except OSError:
+                    pass
+            index.append({"file": e["file"], "start_ts": float(e["start_ts"]), "bytes": nbytes})
+        with self._lock:
+            self._index = sorted(index, key=lambda e: e["start_ts"])
+        if repair:
+            self._rotate()
+            self._save_index()
+
+
+class PcmRing:
+    """
+    Fixed-size in-memory ring holding the most recent `seconds` of PCM.
+
+    The buffer is allocated once; writes copy into it (wrapping) under a lock and never
+    allocate a buffer of their own. Gaps in the input (e.g. a talker going quiet) are filled with silence so
+    that the ring stays linear in wall-clock time and a span can be located from the
+    timestamp of its newest sample alone.
+    """
+    GAP_SEC = 0.05   # shorter timing jitter is absorbed without padding
+    _ZEROS = memoryview(bytes(64 * 1024))  # silence source shared by every ring
+
+    def __init__(self, seconds: float, rate=48000, channels=1, sampwidth=2):
+        self.rate, self.channels, self.sampwidth = int(rate), int(channels), int(sampwidth)
+        self.frame_bytes = self.channels * self.sampwidth
+        self.bytes_per_sec = self.rate * self.frame_bytes
+        self.size = max(1, int(float(seconds) * self.rate)) * self.frame_bytes
+        self._buf = bytearray(self.size)
+        self._lock = threading.Lock()
+        self._head = 0          # total bytes ever written (absolute)
+        self._head_ts = None    # wall time just after the newest sample
+
+    @property
+    def seconds(self):
+        return self.size / self.bytes_per_sec
+
+    def _put(self, data):
+        n = len(data)
+        if n >= self.size:
+            # only the newest `size` bytes fit, but the timeline still advances by all of them
+            skipped = n - self.size
+            data, n = data[skipped:], self.size
+            self._head += skipped
+        i = self._head % self.size
+        first = min(n, self.size - i)
+        self._buf[i:i + first] = data[:first]
+        if first < n:
+            self._buf[:n - first] = data[first:]
+        self._head += n
+
+    def _silence(self, n):
+        # copied from one shared block of zeros, a chunk at a time, so a gap costs no buffer
+        n = min(n, self.size) // self.frame_bytes * self.frame_bytes
+        buf, zeros, step = self._buf, self._ZEROS, len(self._ZEROS)
+        i = self._head % self.size
+        left = n
+        while left:
+            k = min(left, step, self.size - i)
+            buf[i:i + k] = zeros[:k]
+            i = (i + k) % self.size
+            left -= k
+        self._head += n
+
+    def write(self, pcm, now=None):
+        """Append PCM that ended at `now` (wall seconds, default: time.time())."""
+        if not pcm:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._head_ts is not None:
+                gap = now - len(pcm) / self.bytes_per_sec - self._head_ts
+                if gap > self.GAP_SEC:
+                    self._silence(round(gap * self.rate) * self.frame_bytes)
+            self._put(memoryview(pcm))
+            self._head_ts = now
+
+    def info(self):
+        with self._lock:
+            filled = min(self._head, self.size) / self.bytes_per_sec
+            return {"seconds": round(self.seconds, 1), "filled_sec": round(filled, 3),
+                    "newest_ts": self._head_ts, "bytes": self.size}
+
+    def clip(self, start_ts: float, end_ts: float):
+        """Copy out [start_ts, end_ts) clamped to what the ring holds. Returns (first_ts, pcm bytes)."""
+        with self._lock:
+            if self._head_ts is None:
+                return None, b""
+            oldest_ts = self._head_ts - min(self._head, self.size) / self.bytes_per_sec
+            start_ts, end_ts = max(start_ts, oldest_ts), min(end_ts, self._head_ts)
+            if end_ts <= start_ts:
+                return None, b""
+            back_end = round((self._head_ts - end_ts) * self.rate) * self.frame_bytes
+            n = round((end_ts - start_ts) * self.rate) * self.frame_bytes
+            n = min(n, min(self._head, self.size) - back_end)
+            if n <= 0:
+                return None, b""
+            i = (self._head - back_end - n) % self.size
+            first = min(n, self.size - i)
+            out = bytes(self._buf[i:i + first]) + (bytes(self._buf[:n - first]) if first < n else b"")
+            return self._head_ts - (back_end + n) / self.bytes_per_sec, out
@@ -0,0 +1,119 @@
+# backend/rtp_quality.py
+
+
+class RtpSeqStats:
+    """
+    Per-SSRC receive statistics following RFC 3550:
+      - A.1 sequence validation (probation, wrap-around cycles, large jumps)
+      - A.3 cumulative loss (expected - received)
+      - A.8 interarrival jitter
+    plus duplicate/reorder detection over the last 64 sequence numbers.
+    Constant work per packet; used where packets pass through Python (probe counting).
+    """
+    RTP_SEQ_MOD = 1 << 16
+    MAX_DROPOUT = 3000
+    MAX_MISORDER = 100
+    MIN_SEQUENTIAL = 2
+    HISTORY_BITS = 64
+
+    def __init__(self, clock_rate=48000):
+        self.clock_rate = int(clock_rate) or 48000
+        self.probation = self.MIN_SEQUENTIAL
+        self.max_seq = None
+        self.base_seq = 0
+        self.bad_seq = self.RTP_SEQ_MOD + 1
+        self.cycles = 0
+        self.received = 0
+        self.duplicates = 0
+        self.reordered = 0
+        self.gaps = 0           # in-order arrivals that skipped at least one sequence number
+        self.jitter = 0.0       # RTP timestamp units
+        self._transit = None
+        self._recent = 0        # bit i set = max_seq - i was received
+
+    def _init_seq(self, seq):
+        self.base_seq = seq
+        self.max_seq = seq
+        self.bad_seq = self.RTP_SEQ_MOD + 1
+        self.cycles = 0
+        self.received = 0
+        self._recent = 1
+
+    def update(self, seq, rtp_ts, arrival_sec):
+        """Account one packet. Returns False for packets RFC 3550 treats as invalid."""
+        if self.max_seq is None:
+            self._init_seq(seq)
+            self.max_seq = (seq - 1) & 0xFFFF
+            self._recent = 0
+        udelta = (seq - self.max_seq) & 0xFFFF
+        if self.probation:
+            # source is not valid until MIN_SEQUENTIAL packets arrive in sequence
+            if udelta == 1:
+                self.probation -= 1
+                self.max_seq = seq
+                if self.probation == 0:
+                    self._init_seq(seq)
+                    self.received = 1
+                    self._jitter(rtp_ts, arrival_sec)
+                    return True
+            else:
+                self.probation = self.MIN_SEQUENTIAL - 1
+                self.max_seq = seq
+            return False
+        if udelta == 0:
+            self.duplicates += 1
+            return True
+        if udelta < self.MAX_DROPOUT:
+            # in order, with permissible gap
+            if seq < self.max_seq:
+                self.cycles += self.RTP_SEQ_MOD
+            if udelta > 1:
+                self.gaps += 1
+            self.max_seq = seq
+            self._recent = ((self._recent << udelta) | 1) & ((1 << self.HISTORY_BITS) - 1) if udelta < self.HISTORY_BITS else 1
+        elif udelta <= self.RTP_SEQ_MOD - self.MAX_MISORDER:
+            # the sequence number made a very large jump
+            if seq == self.bad_seq:
+                # two sequential packets: assume the sender restarted
+                self._init_seq(seq)
+            else:
+                self.bad_seq = (seq + 1) & 0xFFFF
+                return False
+        else:
+            # older than max_seq: duplicate or reordered
+            back = (self.max_seq - seq) & 0xFFFF
+            if back < self.HISTORY_BITS:
+                bit = 1 << back
+                if self._recent & bit:
+                    self.duplicates += 1
+                    return True
+                self._recent |= bit
+            self.reordered += 1
+        self.received += 1
+        self._jitter(rtp_ts, arrival_sec)
+        return True
+
+    def _jitter(self, rtp_ts, arrival_sec):
+        arrival = int(arrival_sec * self.clock_rate)
+        transit = (arrival - rtp_ts) & 0xFFFFFFFF
+        if self._transit is not None:
+            d = (transit - self._transit) & 0xFFFFFFFF
+            if d >= 0x80000000:
+                d = 0x100000000 - d
+            self.jitter += (d - self.jitter) / 16.0
+        self._transit = transit
+
+    def snapshot(self):
+        if self.max_seq is None or self.probation:
+            return {"received": self.received, "expected": 0, "lost": 0, "duplicates": self.duplicates,
+                    "reordered": self.reordered, "gaps": self.gaps, "jitter_ms": None}
+        expected = self.cycles + self.max_seq - self.base_seq + 1
+        return {
+            "received": self.received,
+            "expected": expected,
+            "lost": expected - self.received,
+            "duplicates": self.duplicates,
+            "reordered": self.reordered,
+            "gaps": self.gaps,
+            "jitter_ms": round(self.jitter * 1000.0 / self.clock_rate, 3),
+        }
@@ -1,51 +1,128 @@
 # backend/rx_worker.py
 import time
 from pathlib import Path
-from collections import deque
 import threading
+from collections import deque
+from rate_stats import RateWindow
+from rtp_quality import RtpSeqStats
+from metrics import STATE_CHANGE, observe_bus_message
+from recorder import SegmentRecorder, PcmRing
+from audio_format import (DEFAULT_FORMAT, rtp_caps, mix_raw_format, mix_buffer_ns, wire_raw_format, payloader,
+                          ptime_ns)
+from jitter_adapt import AdaptiveLatency
+from vad import VoiceGate
+from clock_drift import DriftEstimator, RateDither
+from meters import block_levels, backend as meter_backend
+import gst_runtime
 
 class RxPartylineWorker:
     """
     Party-line RX:
       - Join one (multicast) group:port
       - Demux by SSRC
-      - Per-SSRC branch: depay -> convert -> resample -> level -> queue -> mixer
+      - Per-SSRC branch: depay -> convert -> resample -> tee -> queue -> mixer
       - Optional sink: filesink (wav) or autoaudiosink
       - Exposes peers (name/ssrc/packets/level/last-seen)
+      - Per-talker quality (RFC 3550 loss/jitter, duplicates, reorders, jitterbuffer
+        late/lost drops) polled from rtpsession + rtpjitterbuffer stats
+      - Talkers silent for `idle_timeout` seconds lose their branch and mixer pad; the
+        branch is rebuilt when the SSRC shows up again
+      - Jitterbuffer latency fixed, or adapted per talker to its measured jitter
+      - Optional in-memory rings of the last N minutes (mix, and per talker) for
+        instant clip export
+      - Optional voice gate per talker, driven by the batch meter readings on the main
+        loop: below the threshold (after the hangover) a valve behind the talker's meter
+        tap turns its audio into GAP events, so the mixer and mix-minus outputs skip it;
+        talk-state changes are kept as events
+      - Mix-minus outputs: the mix without chosen SSRCs (e.g. a listener's own voice),
+        played/recorded like the main sink or re-sent as RTP
+      - Per-talker clock drift: skew estimated from RTP timestamps vs arrival times and
+        absorbed by the branch's audioresample (a capssetter relabels the input rate),
+        so jitterbuffers neither fill nor drain over a long show
+      - Meters: the mix and every talker feed one audiointerleave (a S16 mono channel
+        each); each meter period arrives as one block, and RMS/peak for all of them are
+        computed in one pass (meters.py) instead of a level element and bus message each
+
+    Packet/byte counters come from an `rtpsession` in front of the demuxer, whose
+    per-source stats are polled a few times per second on the shared main loop (see
+    gst_runtime), so no Python runs per RTP packet. If `rtpsession` is unavailable we fall back to a
+    buffer probe on each depayloader.
     """
-    def __init__(self, group, port, sink_mode, sink_path: Path, ssrc_names: dict, iface: str | None):
-        # Ensure GI bindings are importable even inside a venv without system-site-packages
-        try:
-            import gi  # type: ignore
-        except ModuleNotFoundError:
-            import sys
-            # Common system path for python3-gi on Debian/RPi OS
-            sys.path.append("/usr/lib/python3/dist-packages")
-            import gi  # type: ignore
-        gi.require_version('Gst', '1.0')
-        gi.require_version('GObject', '2.0')
-        from gi.repository import Gst, GObject
-
-        self.Gst = Gst
-        self.GObject = GObject
+    STATS_POLL_SEC = 0.25
+    REAP_CHECK_SEC = 1.0
+    SRC_SEEN_MAX = 256  # counters kept for reaped SSRCs so a returning talker isn't double-counted
+    MAX_TALKER_RINGS = 16  # per-talker rings kept (including talkers already reaped)
+    # "fixed": every talker gets latency_ms; "adaptive": per talker within [min_ms, max_ms]
+    JB_DEFAULTS = {"mode": "fixed", "latency_ms": 100, "min_ms": 10, "max_ms": 200}
+    RTP_HEADER_BYTES = 12  # fixed RTP header; AES67 streams carry no CSRC/extension
+    VAD_DEFAULTS = {"enabled": False, "threshold_db": -45.0, "hangover_ms": 300}
+    TALK_EVENTS_MAX = 256
+    DRIFT_DEFAULTS = {"enabled": True, "max_ppm": 200.0}
+    DRIFT_UPDATE_SEC = 1.0
+    METER_KEY_MIX = "mix"  # meter slot of the mix; talkers' slots are keyed by SSRC
+
+    def __init__(self, group, port, sink_mode, sink_path: Path, ssrc_names: dict, iface: str | None,
+                 idle_timeout: float = 30.0, sink_opts: dict | None = None,
+                 ring_minutes: float = 0.0, ring_talker_minutes: float = 0.0, fmt: dict | None = None,
+                 jb: dict | None = None, channel: str = "main", mix_minus: list | None = None,
+                 vad: dict | None = None, drift: dict | None = None, meter_hz: float = 20.0):
+        self.Gst = gst_runtime.gst()
+        self.channel = channel
+        self.label = f"rx/{channel}"  # pipeline label in metrics
         self.group = group
         self.port = int(port)
         self.iface = iface or ""  # e.g. "eth0" to force wired
         self.sink_mode = sink_mode
         self.sink_path = sink_path
+        self.sink_opts = dict(sink_opts or {})
+        self.fmt = dict(fmt or DEFAULT_FORMAT)  # see audio_format.stream_format()
+        self.jb_cfg = dict(self.JB_DEFAULTS, **(jb or {}))
+        self.vad_cfg = dict(self.VAD_DEFAULTS, **(vad or {}))
+        self.drift_cfg = dict(self.DRIFT_DEFAULTS, **(drift or {}))
+        self._last_drift = 0.0
+        self._warned_skew = False
+        self.talk_events = deque(maxlen=self.TALK_EVENTS_MAX)  # {"seq","ts","ssrc","name","talking"}
+        self._talk_seq = 0
+        self.on_talk = None  # optional callable(event), called from the main loop
+        self._gates_due = False  # an _update_gates call is queued on the main loop
+        self.recorder = None  # SegmentRecorder in "segments" sink mode
+        self.ring = None      # PcmRing of the mix (last ring_minutes)
+        self._ring_tap = None  # (bin, tee pad)
+        self.ring_minutes = 0.0
+        self.ring_talker_minutes = 0.0
+        self.talker_rings = {}  # ssrc -> PcmRing
+        self._live_tap = None   # (bin, tee pad) while someone listens to /listen
+        self._probe_tap = None  # (bin, tee pad) while the latency probe runs
+        self._tap_lock = threading.Lock()  # set_live_tap/set_probe_tap come from any thread
         self.ssrc_names = {int(k): v for k, v in (ssrc_names or {}).items()}
         self.active_peers = {}  # ssrc -> {"name","last_ts","packets","level_db"}
+        self._branches = {}     # ssrc -> {"elements": [...], "mixer_pad": pad}; changed under _stats_lock
+        self.idle_timeout = float(idle_timeout or 0)  # 0 disables reaping
+        self._last_reap = 0.0
         self.mix_level_db = None
+        self.mix_peak_db = None
+        self.meter_hz = float(meter_hz)
+        self.meter_in = None      # audiointerleave fed by every metered stream
+        self._meter_pads = {}     # slot key -> interleaver sink pad, in request order
+        self._meter_slots = ()    # slot keys in interleaved channel order
+        self._meter_lock = threading.Lock()
+        self.meter_levels = {"slots": (), "rms_db": [], "peak_db": [], "ts": None}  # latest block
         self._stats_lock = threading.Lock()
-        self._window = deque()  # (ts, bytes)
-        self._WINDOW_SEC = 2.0
-        self.stats = {"packets_total":0,"bytes_total":0,"pps_recent":0.0,"bps_recent":0.0,"last_packet_ts":None}
+        self._rate = RateWindow(window_sec=2.0)
+        self.stats = {"packets_total":0,"bytes_total":0,"pps_recent":0.0,"bps_recent":0.0,"last_packet_ts":None,
+                      "talkers_reaped":0}
+        self._src_seen = {}  # ssrc -> (packets, bytes) as last read from the session stats
+
+        self.mix_minus_cfg = []  # normalised outputs (see set_mix_minus)
+        self._minus = {}         # name -> running mix-minus output
+        self._minus_lock = threading.RLock()
 
-        self.Gst.init(None)
-        self.pipeline = self.Gst.Pipeline.new("rx-mix")
+        self.pipeline = self.Gst.Pipeline.new(f"rx-mix-{channel}")
         self._build()
-        self._stop_evt = threading.Event()
-        self._bus_thread = None
+        self.set_ring(ring_minutes, ring_talker_minutes)
+        self.set_mix_minus(mix_minus)
+        self._unwatch = None  # bus watch / timer removal while running
+        self._cancel_tick = None
 
     def _build(self):
         Gst = self.Gst
@@ -66,69 +143,869 @@ class RxPartylineWorker:
             # requires gstreamer >=1.14
             self.udpsrc.set_property("multicast-iface", self.iface)
 
-        # AES67 default: L16 at 48kHz. Set explicit RTP caps so depay loaders can negotiate.
-        # If you need L24, we can make this configurable.
-        caps = Gst.Caps.from_string(
-            "application/x-rtp,media=audio,encoding-name=L16,clock-rate=48000"
-        )
+        # Explicit RTP caps (L16/L24, channels) so depayloaders can negotiate
+        caps = Gst.Caps.from_string(rtp_caps(self.fmt))
         self.udpsrc.set_property("caps", caps)
+        if self.fmt["ptime_us"] < 4000:
+            # short packet times mean many more packets per second: give the socket headroom
+            try:
+                self.udpsrc.set_property("buffer-size", 4 * 1024 * 1024)
+            except Exception:
+                pass
 
         self.demux = Gst.ElementFactory.make("rtpssrcdemux", "demux")
         if not self.demux:
             raise RuntimeError("Missing GStreamer element: rtpssrcdemux (install gstreamer1.0-plugins-good)")
+        # Native per-SSRC counters (RFC 3550 source stats); optional, see class docstring
+        self.session = Gst.ElementFactory.make("rtpsession", "rxsess")
+        if not self.session:
+            print("WARN: rtpsession missing, counting packets with a per-buffer probe")
         self.mixer = Gst.ElementFactory.make("audiomixer", "mixer")
         if not self.mixer:
             raise RuntimeError("Missing GStreamer element: audiomixer (install gstreamer1.0-plugins-good)")
+        try:
+            self.mixer.set_property("output-buffer-duration", mix_buffer_ns(self.fmt))
+        except Exception:
+            pass
         self.aconv = Gst.ElementFactory.make("audioconvert", "aconv")
         if not self.aconv:
             raise RuntimeError("Missing GStreamer element: audioconvert (install gstreamer1.0-plugins-base)")
         self.ares = Gst.ElementFactory.make("audioresample", "ares")
         if not self.ares:
             raise RuntimeError("Missing GStreamer element: audioresample (install gstreamer1.0-plugins-base)")
-        # Level meter for the mixed output
-        self.level_mix = Gst.ElementFactory.make("level", "level_mix")
-        if not self.level_mix:
-            raise RuntimeError("Missing GStreamer element: level (install gstreamer1.0-plugins-good)")
-        self.level_mix.set_property("interval", 100_000_000)
-        self.level_mix.set_property("post-messages", True)
-        self.level_mix.set_property("peak-ttl", 500_000_000)
-
-        for e in [self.udpsrc, self.demux, self.mixer, self.aconv, self.ares, self.level_mix]:
+        for e in [self.udpsrc, self.demux, self.mixer, self.aconv, self.ares]:
             self.pipeline.add(e)
-        self.udpsrc.link(self.demux)
+        if self.session:
+            self.pipeline.add(self.session)
+            req = getattr(self.session, "request_pad_simple", None) or self.session.get_request_pad
+            rtp_sink = req("recv_rtp_sink")
+            if self.udpsrc.get_static_pad("src").link(rtp_sink) != Gst.PadLinkReturn.OK:
+                raise RuntimeError("Could not link udpsrc to rtpsession")
+            # recv_rtp_src is created together with the recv_rtp_sink request pad
+            if not self.session.link_pads("recv_rtp_src", self.demux, "sink"):
+                raise RuntimeError("Could not link rtpsession to rtpssrcdemux")
+        else:
+            self.udpsrc.link(self.demux)
+
+        # Tail: mix -> convert -> resample -> tee -> sink bin (swappable at runtime), meters
+        self.mix_tee = Gst.ElementFactory.make("tee", "mix_tee")
+        if not self.mix_tee:
+            raise RuntimeError("Missing GStreamer element: tee (install gstreamer1.0-plugins-base)")
+        self.mix_tee.set_property("allow-not-linked", True)
+        self.pipeline.add(self.mix_tee)
+        self.mixer.link(self.aconv)
+        self.aconv.link(self.ares)
+        self.ares.link(self.mix_tee)
+        self.sink_bin, self.recorder = self._make_sink_bin(self.sink_mode, self.sink_path, self.sink_opts)
+        self.pipeline.add(self.sink_bin)
+        self._sink_tee_pad = self._link_tee(self.sink_bin)
+        self._build_meter()
+
+        # Dynamic pads per SSRC
+        self.demux.connect("pad-added", self._on_pad_added)
+
+        # Messages are dispatched by the shared main loop while running
+        self.bus = self.pipeline.get_bus()
+
+    def _make_pcm_tap(self, on_pcm, leaky=False, sync=False):
+        """
+        Bin: queue -> S16LE/48k (stream channels) -> appsink calling on_pcm(bytes) for every buffer
+        (streaming thread, keep it cheap). A leaky tap drops audio rather than ever
+        holding up the mix; a synced tap delivers each buffer when a sink would play it.
+        The appsink is named "out" (see _retire_branch).
+        """
+        Gst = self.Gst
+        b = Gst.Bin.new(None)
+        q = Gst.ElementFactory.make("queue", None)
+        if leaky:
+            q.set_property("leaky", 2)  # downstream: drop oldest
+            q.set_property("max-size-time", 500_000_000)
+        conv = Gst.ElementFactory.make("audioconvert", None)
+        res = Gst.ElementFactory.make("audioresample", None)
+        caps = Gst.ElementFactory.make("capsfilter", None)
+        caps.set_property("caps", Gst.Caps.from_string(
+            f"audio/x-raw,format=S16LE,channels={self.fmt['channels']},rate=48000"))
+        sink = Gst.ElementFactory.make("appsink", "out")
+        if not sink:
+            raise RuntimeError("Missing GStreamer element: appsink (install gstreamer1.0-plugins-base)")
+        sink.set_property("emit-signals", True)
+        sink.set_property("sync", sync)
+
+        def _on_sample(appsink):
+            sample = appsink.emit("pull-sample")
+            buf = sample.get_buffer() if sample is not None else None
+            if buf is not None:
+                ok, info = buf.map(Gst.MapFlags.READ)
+                if ok:
+                    try:
+                        on_pcm(bytes(info.data))
+                    finally:
+                        buf.unmap(info)
+            return Gst.FlowReturn.OK
+
+        sink.connect("new-sample", _on_sample)
+        chain = [q, conv, res, caps, sink]
+        for e in chain:
+            b.add(e)
+        for a, c in zip(chain, chain[1:]):
+            a.link(c)
+        b.add_pad(Gst.GhostPad.new("sink", q.get_static_pad("sink")))
+        return b
 
-        # Tail sink (mix -> convert -> resample -> sink)
-        if self.sink_mode == "auto":
-            self.sink = Gst.ElementFactory.make("autoaudiosink", "sink")
-            if not self.sink:
+    def _make_sink_bin(self, mode, path, opts=None):
+        """
+        queue -> autoaudiosink, queue -> wavenc -> filesink, or (segments) a PCM tap feeding
+        a SegmentRecorder; wrapped in a bin with a ghost sink pad.
+        Returns (bin, recorder or None).
+        """
+        Gst = self.Gst
+        if mode == "segments":
+            opts = opts or {}
+            rec = SegmentRecorder(
+                Path(path),
+                channels=self.fmt["channels"],
+                segment_sec=float(opts.get("segment_sec") or 300),
+                max_segment_bytes=int(float(opts.get("max_segment_mb") or 0) * 1024 * 1024),
+                retention_sec=float(opts.get("retention_hours") or 0) * 3600,
+                retention_bytes=int(float(opts.get("retention_mb") or 0) * 1024 * 1024),
+            ).start()
+            return self._make_pcm_tap(rec.write), rec
+        b = Gst.Bin.new(None)
+        q = Gst.ElementFactory.make("queue", None)
+        if mode == "auto":
+            sink = Gst.ElementFactory.make("autoaudiosink", "out")
+            if not sink:
                 raise RuntimeError("Missing GStreamer element: autoaudiosink (install gstreamer1.0-alsa or proper audio sink)")
-            self.sink.set_property("sync", True)
-            self.pipeline.add(self.sink)
-            self.mixer.link(self.aconv)
-            self.aconv.link(self.ares)
-            self.ares.link(self.level_mix)
-            self.level_mix.link(self.sink)
+            sink.set_property("sync", True)
+            chain = [q, sink]
         else:
-            self.wavenc = Gst.ElementFactory.make("wavenc", "wavenc")
-            if not self.wavenc:
+            wavenc = Gst.ElementFactory.make("wavenc", None)
+            if not wavenc:
                 raise RuntimeError("Missing GStreamer element: wavenc (install gstreamer1.0-plugins-good)")
-            self.sink = Gst.ElementFactory.make("filesink", "fsink")
-            if not self.sink:
+            sink = Gst.ElementFactory.make("filesink", "out")
+            if not sink:
                 raise RuntimeError("Missing GStreamer element: filesink (install gstreamer1.0-plugins-base)")
-            self.sink.set_property("location", str(self.sink_path))
-            self.pipeline.add(self.wavenc)
-            self.pipeline.add(self.sink)
-            self.mixer.link(self.aconv)
-            self.aconv.link(self.ares)
-            self.ares.link(self.level_mix)
-            self.level_mix.link(self.wavenc)
-            self.wavenc.link(self.sink)
+            sink.set_property("location", str(path))
+            chain = [q, wavenc, sink]
+        for e in chain:
+            b.add(e)
+        for a, c in zip(chain, chain[1:]):
+            a.link(c)
+        b.add_pad(Gst.GhostPad.new("sink", q.get_static_pad("sink")))
+        return b, None
 
-        # Dynamic pads per SSRC
-        self.demux.connect("pad-added", self._on_pad_added)
+    def _link_tee(self, branch):
+        req = getattr(self.mix_tee, "request_pad_simple", None) or self.mix_tee.get_request_pad
+        tpad = req("src_%u")
+        if tpad.link(branch.get_static_pad("sink")) != self.Gst.PadLinkReturn.OK:
+            raise RuntimeError("Could not link mix tee to output branch")
+        return tpad
 
-        # Prepare bus for polling (we run our own bus thread)
-        self.bus = self.pipeline.get_bus()
+    def _retire_branch(self, branch, tpad, on_done=None):
+        """Detach a tee branch while audio keeps flowing; EOS it so wavenc finalises, then drop it."""
+        Gst = self.Gst
+        once = threading.Lock()
+
+        def _teardown():
+            if not once.acquire(blocking=False):
+                return
+            self.mix_tee.release_request_pad(tpad)
+            branch.set_state(Gst.State.NULL)
+            try:
+                self.pipeline.remove(branch)
+            except Exception:
+                pass
+            if on_done is not None:
+                on_done()
+
+        def _on_eos(_pad, info):
+            ev = info.get_event()
+            if ev is not None and ev.type == Gst.EventType.EOS:
+                # never change state from the branch's own streaming thread
+                gst_runtime.call_soon(_teardown)
+            return Gst.PadProbeReturn.OK
+
+        def _on_idle(pad, _info):
+            sinkpad = branch.get_static_pad("sink")
+            pad.unlink(sinkpad)
+            sinkpad.send_event(Gst.Event.new_eos())
+            return Gst.PadProbeReturn.REMOVE
+
+        branch.get_by_name("out").get_static_pad("sink").add_probe(Gst.PadProbeType.EVENT_DOWNSTREAM, _on_eos)
+        tpad.add_probe(Gst.PadProbeType.IDLE, _on_idle)
+        gst_runtime.after(2.0, _teardown)  # in case EOS never arrives
+
+    def set_sink(self, mode, path, opts=None):
+        """Swap the output branch (auto/file/segments, path, segment options) without stopping the mix."""
+        opts = dict(opts or {})
+        if mode == self.sink_mode and str(path) == str(self.sink_path) and opts == self.sink_opts:
+            return
+        old_rec = self.recorder
+        if old_rec is not None and mode == "segments" and Path(path) == old_rec.dir:
+            # two writers on one directory would fight over index.json: finish the old one,
+            # so the new recorder loads the index it leaves behind
+            old_rec.close()
+        new_bin, new_rec = self._make_sink_bin(mode, path, opts)
+        self.pipeline.add(new_bin)
+        new_bin.sync_state_with_parent()
+        new_pad = self._link_tee(new_bin)
+        old_bin, old_pad, old_rec = self.sink_bin, self._sink_tee_pad, self.recorder
+        self.sink_bin, self._sink_tee_pad, self.recorder = new_bin, new_pad, new_rec
+        self.sink_mode, self.sink_path, self.sink_opts = mode, path, opts
+        self._retire_branch(old_bin, old_pad, on_done=old_rec.close if old_rec else None)
+        print(f"RX sink switched to {mode} {path if mode != 'auto' else ''}")
+
+    def set_ssrc_names(self, ssrc_names: dict):
+        names = {int(k): v for k, v in (ssrc_names or {}).items()}
+        self.ssrc_names = names
+        for ssrc, rec in list(self.active_peers.items()):
+            rec["name"] = names.get(ssrc, f"SSRC {ssrc}" if ssrc is not None else "unknown")
+
+    def set_source(self, group, port, iface):
+        """Re-join a (multicast) group/port/interface; jitterbuffers and mixer keep running."""
+        group, port, iface = group, int(port), iface or ""
+        if (group, port, iface) == (self.group, self.port, self.iface):
+            return
+        Gst = self.Gst
+        # udpsrc opens its socket on NULL->READY, so cycle it through NULL
+        self.udpsrc.set_state(Gst.State.NULL)
+        self.udpsrc.set_property("multicast-group", group)
+        self.udpsrc.set_property("port", port)
+        self.udpsrc.set_property("multicast-iface", iface or None)
+        self.group, self.port, self.iface = group, port, iface
+        if not self.udpsrc.sync_state_with_parent():
+            raise RuntimeError(f"RX could not join {group}:{port}")
+        print(f"RX re-joined {group}:{port} {iface}")
+
+    def reconfigure(self, group, port, sink_mode, sink_path: Path, ssrc_names: dict, iface: str | None,
+                    idle_timeout: float = 30.0, sink_opts: dict | None = None,
+                    ring_minutes: float = 0.0, ring_talker_minutes: float = 0.0, fmt: dict | None = None,
+                    jb: dict | None = None, mix_minus: list | None = None, vad: dict | None = None,
+                    drift: dict | None = None, meter_hz: float = 20.0):
+        """
+        Apply new settings to the running pipeline. Returns False when a full rebuild is
+        required instead (nothing has been changed in that case).
+        """
+        if fmt is not None and dict(fmt) != self.fmt:
+            return False  # caps are fixed at build time
+        self.set_ssrc_names(ssrc_names)
+        self.idle_timeout = float(idle_timeout or 0)
+        self.set_source(group, port, iface)
+        self.set_sink(sink_mode, sink_path, sink_opts)
+        self.set_ring(ring_minutes, ring_talker_minutes)
+        self.set_jitterbuffer(jb)
+        self.set_vad(vad)
+        self.set_mix_minus(mix_minus)
+        self.set_drift(drift)
+        self.set_meter_rate(meter_hz)
+        return True
+
+    # ---------- jitterbuffer latency ----------
+    def _new_adapter(self, initial_ms):
+        c = self.jb_cfg
+        return AdaptiveLatency(c["min_ms"], c["max_ms"], ptime_ms=self.fmt["ptime_us"] / 1000.0,
+                               initial_ms=initial_ms)
+
+    def set_jitterbuffer(self, jb):
+        """Switch fixed/adaptive latency or change its bounds; applied to running branches."""
+        cfg = dict(self.JB_DEFAULTS, **(jb or {}))
+        if cfg == self.jb_cfg:
+            return
+        self.jb_cfg = cfg
+        with self._stats_lock:
+            for br in self._branches.values():
+                if cfg["mode"] == "adaptive":
+                    br["adapt"] = self._new_adapter(br["jb_latency_ms"])
+                    self._set_jb_latency(br, br["adapt"].latency_ms)
+                else:
+                    br["adapt"] = None
+                    self._set_jb_latency(br, cfg["latency_ms"])
+
+    def _set_jb_latency(self, br, ms):
+        try:
+            br["jbuf"].set_property("latency", int(ms))
+            br["jb_latency_ms"] = int(ms)
+        except Exception as e:
+            print("WARN: could not set jitterbuffer latency:", e)
+
+    def _adapt_latency(self, br, q, now):
+        """Feed the talker's jitter/late counters to its controller (stats lock held)."""
+        ad = br.get("adapt")
+        if ad is not None:
+            new = ad.update(now, q.get("jitter_ms"), q.get("late"))
+            if new is not None:
+                self._set_jb_latency(br, new)
+            q["jb_target_ms"] = ad.target_ms
+        q["jb_latency_ms"] = br["jb_latency_ms"]
+
+    def set_live_tap(self, on_pcm):
+        """Attach (callable) or detach (None) the leaky PCM tap feeding live listeners."""
+        with self._tap_lock:
+            if on_pcm is not None and self._live_tap is None:
+                tap = self._make_pcm_tap(on_pcm, leaky=True)
+                self.pipeline.add(tap)
+                tap.sync_state_with_parent()
+                self._live_tap = (tap, self._link_tee(tap))
+            elif on_pcm is None and self._live_tap is not None:
+                old, self._live_tap = self._live_tap, None
+                self._retire_branch(*old)
+
+    def set_probe_tap(self, on_pcm):
+        """Attach (callable) or detach (None) the synced mix tap the latency probe listens on."""
+        with self._tap_lock:
+            if on_pcm is not None and self._probe_tap is None:
+                tap = self._make_pcm_tap(on_pcm, leaky=True, sync=True)
+                self.pipeline.add(tap)
+                tap.sync_state_with_parent()
+                self._probe_tap = (tap, self._link_tee(tap))
+            elif on_pcm is None and self._probe_tap is not None:
+                old, self._probe_tap = self._probe_tap, None
+                self._retire_branch(*old)
+
+    # ---------- meters ----------
+    def _build_meter(self):
+        """audiointerleave -> appsink: one block per meter period holding every metered stream."""
+        Gst = self.Gst
+        inter = Gst.ElementFactory.make("audiointerleave", "meter_in")
+        sink = Gst.ElementFactory.make("appsink", "meter_out")
+        if not inter or not sink:
+            print("WARN: Missing GStreamer element: audiointerleave (install gstreamer1.0-plugins-bad); "
+                  "levels are not metered")
+            return
+        try:
+            inter.set_property("channel-positions-from-input", False)  # keep slots in pad order
+        except Exception:
+            pass
+        sink.set_property("emit-signals", True)
+        sink.set_property("sync", False)
+        sink.set_property("max-buffers", 2)
+        sink.set_property("drop", True)
+        sink.connect("new-sample", self._on_meter_block)
+        for e in (inter, sink):
+            self.pipeline.add(e)
+        inter.link(sink)
+        self.meter_in = inter
+        self.set_meter_rate(self.meter_hz)
+        req = getattr(self.mix_tee, "request_pad_simple", None) or self.mix_tee.get_request_pad
+        self._add_meter_slot(self.METER_KEY_MIX, req("src_%u"))
+
+    def set_meter_rate(self, hz):
+        """Meter blocks per second (the interleaver's output buffer duration); applied live."""
+        self.meter_hz = max(1.0, min(50.0, float(hz)))
+        if self.meter_in is not None:
+            try:
+                self.meter_in.set_property("output-buffer-duration", int(1e9 / self.meter_hz))
+            except Exception as e:
+                print("WARN: could not set meter rate:", e)
+
+    def _add_meter_slot(self, key, src_pad):
+        """Meter what src_pad (a tee request pad) carries: queue -> S16 mono -> a new interleaver channel."""
+        Gst = self.Gst
+        if self.meter_in is None:
+            return []
+        q = Gst.ElementFactory.make("queue", None)
+        q.set_property("leaky", 2)  # a slow meter drops audio, never holds up the talker
+        q.set_property("max-size-time", 200_000_000)
+        q.set_property("max-size-buffers", 0)
+        q.set_property("max-size-bytes", 0)
+        conv = Gst.ElementFactory.make("audioconvert", None)
+        caps = Gst.ElementFactory.make("capsfilter", None)
+        caps.set_property("caps", Gst.Caps.from_string("audio/x-raw,format=S16LE,channels=1,rate=48000"))
+        chain = [q, conv, caps]
+        for e in chain:
+            self.pipeline.add(e)
+            e.sync_state_with_parent()
+        q.link(conv)
+        conv.link(caps)
+        req = getattr(self.meter_in, "request_pad_simple", None) or self.meter_in.get_request_pad
+        mpad = req("sink_%u")
+        if caps.get_static_pad("src").link(mpad) != Gst.PadLinkReturn.OK or \
+                src_pad.link(q.get_static_pad("sink")) != Gst.PadLinkReturn.OK:
+            print(f"WARN: could not link meter for {key}")
+        with self._meter_lock:
+            self._meter_pads[key] = mpad
+            self._meter_slots = self._slot_order()
+        return chain
+
+    def _drop_meter_slot(self, key):
+        """Release a talker's interleaver channel (its feed elements go with the branch)."""
+        with self._meter_lock:
+            mpad = self._meter_pads.pop(key, None)
+        if mpad is None:
+            return
+        peer = mpad.get_peer()
+        if peer is not None:
+            peer.unlink(mpad)
+        self.meter_in.release_request_pad(mpad)
+        with self._meter_lock:
+            self._meter_slots = self._slot_order()
+
+    def _slot_order(self):
+        items = list(self._meter_pads.items())
+        try:
+            items.sort(key=lambda kv: kv[1].get_property("channel"))
+        except Exception:
+            pass  # request order, which the interleaver keeps when it renumbers after a release
+        return tuple(k for k, _ in items)
+
+    def _on_meter_block(self, appsink):
+        """One meter period for every slot: reduce it in one pass and publish (appsink streaming thread)."""
+        Gst = self.Gst
+        sample = appsink.emit("pull-sample")
+        buf = sample.get_buffer() if sample is not None else None
+        if buf is None:
+            return Gst.FlowReturn.OK
+        try:
+            channels = int(sample.get_caps().get_structure(0).get_value("channels"))
+        except Exception:
+            return Gst.FlowReturn.OK
+        slots = self._meter_slots
+        if channels != len(slots):
+            return Gst.FlowReturn.OK  # a talker joined or left mid-block; the next block has the new layout
+        ok, info = buf.map(Gst.MapFlags.READ)
+        if not ok:
+            return Gst.FlowReturn.OK
+        try:
+            rms, peak = block_levels(bytes(info.data), channels)
+        finally:
+            buf.unmap(info)
+        levels = {"slots": slots, "rms_db": rms, "peak_db": peak, "ts": time.time()}
+        with self._stats_lock:  # peers are added/reaped and snapshotted under it
+            self.meter_levels = levels
+            for key, r, p in zip(slots, rms, peak):
+                if key == self.METER_KEY_MIX:
+                    self.mix_level_db, self.mix_peak_db = r, p
+                else:
+                    rec = self.active_peers.get(key)
+                    if rec is not None:
+                        rec["level_db"], rec["peak_db"] = r, p
+        if self.vad_cfg["enabled"] and not self._gates_due:
+            self._gates_due = True
+            gst_runtime.call_soon(self._update_gates)
+        return Gst.FlowReturn.OK
+
+    # ---------- clock drift ----------
+    def set_drift(self, drift):
+        """Turn drift compensation on/off or change its clamp; branches slew to the new correction."""
+        self.drift_cfg = dict(self.DRIFT_DEFAULTS, **(drift or {}))
+
+    def _sample_drift(self, br):
+        """One-shot probe on the jitterbuffer input: the next packet feeds the talker's drift estimator."""
+        if br.get("drift_probe"):
+            return
+        Gst = self.Gst
+
+        def _probe(_pad, info):
+            br["drift_probe"] = False
+            self._feed_drift(br, info.get_buffer())
+            return Gst.PadProbeReturn.REMOVE
+        br["drift_probe"] = True
+        br["jbuf"].get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, _probe)
+
+    def _feed_drift(self, br, buf):
+        # udpsrc stamps each packet with its arrival in pipeline running time
+        if buf is None or buf.pts == self.Gst.CLOCK_TIME_NONE or buf.get_size() < 12:
+            return
+        br["drift"].add(buf.pts / 1e9, int.from_bytes(buf.extract_dup(4, 4), "big"))
+
+    def _update_drift(self):
+        """Move each talker's rate correction towards its estimate (main loop, once a second)."""
+        now = time.monotonic()
+        lim = float(self.drift_cfg["max_ppm"])
+        with self._stats_lock:
+            branches = list(self._branches.values())
+        for br in branches:
+            est = br["drift"].ppm
+            if not self.drift_cfg["enabled"]:
+                est = 0.0
+            elif est is not None:
+                est = max(-lim, min(lim, est))  # beyond this it is a wrong nominal rate, not drift
+            rate = br["dither"].update(now, est)
+            if br["skew"] is not None and rate != br["skew_rate"]:
+                br["skew"].set_property("caps", self.Gst.Caps.from_string(f"audio/x-raw,rate={rate}"))
+                br["skew_rate"] = rate
+
+    # ---------- voice gate ----------
+    def set_vad(self, vad):
+        """Enable/disable the per-talker voice gate or change its threshold/hangover; applied live."""
+        cfg = dict(self.VAD_DEFAULTS, **(vad or {}))
+        if cfg == self.vad_cfg:
+            return
+        self.vad_cfg = cfg
+        for ssrc, br in list(self._branches.items()):
+            gate = br.get("gate")
+            if gate is not None and cfg["enabled"]:
+                gate.configure(cfg["threshold_db"], cfg["hangover_ms"])
+            elif gate is not None:
+                self._detach_gate(ssrc, br)
+            else:
+                self._attach_gate(ssrc, br)
+
+    def _attach_gate(self, ssrc, br):
+        """Gate a talker: its valve starts shut and follows the meter readings (see _update_gates)."""
+        if ssrc is None or not self.vad_cfg["enabled"] or br.get("gate") is not None:
+            return
+        br["gate"] = VoiceGate(self.vad_cfg["threshold_db"], self.vad_cfg["hangover_ms"])
+        br["valve"].set_property("drop", True)
+        with self._stats_lock:
+            rec = self.active_peers.get(ssrc)
+            if rec is not None:
+                rec["talking"] = False
+
+    def _detach_gate(self, ssrc, br):
+        br.pop("gate", None)
+        br["valve"].set_property("drop", False)
+        with self._stats_lock:
+            rec = self.active_peers.get(ssrc)
+            if rec is not None:
+                rec["talking"] = None
+
+    def _update_gates(self):
+        """Step every gate with its talker's latest meter peak (main loop, once per meter block)."""
+        self._gates_due = False
+        now = time.monotonic()
+        with self._stats_lock:
+            gated = [(ssrc, br, (self.active_peers.get(ssrc) or {}).get("peak_db"))
+                     for ssrc, br in self._branches.items() if br.get("gate") is not None]
+        for ssrc, br, peak in gated:
+            gate = br["gate"]
+            if gate.update(peak, now):
+                br["valve"].set_property("drop", not gate.open)
+                self._talk_changed(ssrc, gate.open)
+
+    def _talk_changed(self, ssrc, talking):
+        with self._stats_lock:
+            rec = self.active_peers.get(ssrc)
+            if rec is None:
+                return
+            rec["talking"] = talking
+            name = rec["name"]
+        self._talk_event(ssrc, name, talking)
+
+    def _talk_event(self, ssrc, name, talking):
+        with self._stats_lock:
+            self._talk_seq += 1
+            ev = {"seq": self._talk_seq, "ts": time.time(), "ssrc": ssrc, "name": name, "talking": talking}
+            self.talk_events.append(ev)
+        cb = self.on_talk
+        if cb is not None:
+            try:
+                cb(ev)
+            except Exception as e:
+                print("talk event handler failed:", e)
+
+    def talk_events_since(self, seq=0):
+        """Talk-state changes after `seq` (oldest first), plus the latest seq."""
+        with self._stats_lock:
+            return [ev for ev in self.talk_events if ev["seq"] > seq], self._talk_seq
+
+    # ---------- mix-minus outputs ----------
+    @staticmethod
+    def _minus_spec(o):
+        """Normalised mix-minus output: name, exclude (SSRCs), output "sink" or "rtp" and its settings."""
+        spec = {"name": str(o["name"]), "exclude": sorted({int(x) & 0xFFFFFFFF for x in o.get("exclude") or []})}
+        if o.get("output") == "rtp":
+            spec.update(output="rtp", host=str(o["host"]), port=int(o["port"]),
+                        ssrc=int(o["ssrc"]) & 0xFFFFFFFF if o.get("ssrc") is not None else None,
+                        iface=o.get("iface") or "")
+        else:
+            sink = o.get("sink") or {}
+            spec.update(output="sink", mode=sink.get("mode") or "auto", path=str(sink.get("path") or ""),
+                        opts={k: v for k, v in sink.items() if k not in ("mode", "path")})
+        return spec
+
+    def set_mix_minus(self, outputs):
+        """
+        Run exactly these mix-minus outputs (list of dicts, see server._mix_minus_params).
+        Each is the total mix plus the negated excluded talkers, summed by one small
+        audiomixer, so an output costs 1 + len(exclude) inputs however many talk. Outputs
+        whose exclude list alone changed are adjusted in place; others are rebuilt.
+        """
+        specs = []
+        for o in outputs or []:
+            try:
+                specs.append(self._minus_spec(o))
+            except Exception as e:
+                print(f"WARN: ignoring mix-minus output {o!r}: {e}")
+        if specs == self.mix_minus_cfg:
+            return
+        wanted = {sp["name"]: sp for sp in specs}
+        with self._minus_lock:
+            for name, out in list(self._minus.items()):
+                sp = wanted.get(name)
+                if sp is not None and {**sp, "exclude": None} == {**out["spec"], "exclude": None}:
+                    self._set_minus_exclude(out, sp)
+                    continue
+                del self._minus[name]
+                self._retire_minus(out)
+            for name, sp in wanted.items():
+                if name not in self._minus:
+                    try:
+                        self._minus[name] = self._build_minus(sp)
+                    except Exception as e:
+                        print(f"RX[{self.channel}] mix-minus {name} failed: {e}")
+        self.mix_minus_cfg = specs
+
+    def _make_rtp_out(self, spec):
+        """Bin: convert -> big-endian wire format -> payloader -> udpsink named "out"."""
+        Gst = self.Gst
+        b = Gst.Bin.new(None)
+        conv = Gst.ElementFactory.make("audioconvert", None)
+        caps = Gst.ElementFactory.make("capsfilter", None)
+        caps.set_property("caps", Gst.Caps.from_string(
+            f"audio/x-raw,format={wire_raw_format(self.fmt)},rate=48000,channels={self.fmt['channels']}"))
+        pay = Gst.ElementFactory.make(payloader(self.fmt), None)
+        if not pay:
+            raise RuntimeError(f"Missing GStreamer element: {payloader(self.fmt)} (install gstreamer1.0-plugins-good)")
+        pay.set_property("pt", 96)
+        pay.set_property("min-ptime", ptime_ns(self.fmt))
+        pay.set_property("max-ptime", ptime_ns(self.fmt))
+        if spec["ssrc"] is not None:
+            pay.set_property("ssrc", spec["ssrc"])
+        sink = Gst.ElementFactory.make("udpsink", "out")
+        if not sink:
+            raise RuntimeError("Missing GStreamer element: udpsink (install gstreamer1.0-plugins-good)")
+        sink.set_property("host", spec["host"])
+        sink.set_property("port", spec["port"])
+        sink.set_property("auto-multicast", True)
+        sink.set_property("ttl-mc", 16)
+        sink.set_property("sync", False)
+        sink.set_property("async", False)
+        if spec["iface"]:
+            sink.set_property("multicast-iface", spec["iface"])
+        chain = [conv, caps, pay, sink]
+        for e in chain:
+            b.add(e)
+        for a, c in zip(chain, chain[1:]):
+            a.link(c)
+        b.add_pad(Gst.GhostPad.new("sink", conv.get_static_pad("sink")))
+        return b
+
+    def _build_minus(self, spec):
+        """
+        Bin: [total from the mix tee] -> queue -> audiomixer -> output, with a
+        queue -> audioamplify(-1) input added per excluded talker (see _attach_minus_input).
+        """
+        Gst = self.Gst
+        b = Gst.Bin.new(f"minus_{spec['name']}")
+        q = Gst.ElementFactory.make("queue", None)
+        mm = Gst.ElementFactory.make("audiomixer", None)
+        try:
+            mm.set_property("output-buffer-duration", mix_buffer_ns(self.fmt))
+        except Exception:
+            pass
+        rec = None
+        if spec["output"] == "rtp":
+            if (spec["host"], spec["port"]) == (self.group, self.port):
+                print(f"WARN: mix-minus {spec['name']} sends to the group it is mixed from; "
+                      "every receiver on it (us too) will hear it as one more talker")
+            out = self._make_rtp_out(spec)
+        else:
+            out, rec = self._make_sink_bin(spec["mode"], Path(spec["path"]), spec["opts"])
+        for e in (q, mm, out):
+            b.add(e)
+        q.link(mm)
+        mm.link(out)
+        b.add_pad(Gst.GhostPad.new("sink", q.get_static_pad("sink")))
+        self.pipeline.add(b)
+        b.sync_state_with_parent()
+        m = {"spec": spec, "bin": b, "mixer": mm, "recorder": rec, "exclude": set(spec["exclude"]),
+             "inputs": {}, "tee_pad": self._link_tee(b)}
+        branches = self._branch_snapshot()
+        for ssrc in m["exclude"]:
+            br = branches.get(ssrc)
+            if br is not None:
+                self._attach_minus_input(m, ssrc, br)
+        dest = f"{spec['host']}:{spec['port']}" if spec["output"] == "rtp" else f"{spec['mode']} {spec['path']}"
+        print(f"RX[{self.channel}] mix-minus {spec['name']} -> {dest}, without {spec['exclude']}")
+        return m
+
+    def _attach_minus_input(self, out, ssrc, br):
+        """Subtract one talker: its tee -> queue -> audioamplify(-1) -> the output's mixer."""
+        Gst = self.Gst
+        if ssrc in out["inputs"]:
+            return
+        q = Gst.ElementFactory.make("queue", None)
+        neg = Gst.ElementFactory.make("audioamplify", None)
+        if not neg:
+            raise RuntimeError("Missing GStreamer element: audioamplify (install gstreamer1.0-plugins-good)")
+        neg.set_property("amplification", -1.0)
+        b = out["bin"]
+        for e in (q, neg):
+            b.add(e)
+        q.link(neg)
+        neg.link(out["mixer"])
+        ghost = Gst.GhostPad.new(None, q.get_static_pad("sink"))
+        ghost.set_active(True)
+        b.add_pad(ghost)
+        for e in (q, neg):
+            e.sync_state_with_parent()
+        req = getattr(br["tee"], "request_pad_simple", None) or br["tee"].get_request_pad
+        tpad = req("src_%u")
+        if tpad.link(ghost) != Gst.PadLinkReturn.OK:
+            print(f"WARN: could not link talker {ssrc} into mix-minus {out['spec']['name']}")
+        out["inputs"][ssrc] = {"elements": [q, neg], "ghost": ghost, "tee": br["tee"], "tee_pad": tpad,
+                               "mixer_pad": neg.get_static_pad("src").get_peer()}
+
+    def _drop_minus_input(self, out, inp):
+        """Release a negated input that no longer receives audio (unlinked, or its talker was reaped)."""
+        Gst = self.Gst
+        tpad = inp["tee_pad"]
+        if tpad.get_peer() is not None:
+            tpad.unlink(inp["ghost"])
+        try:
+            inp["tee"].release_request_pad(tpad)
+        except Exception:
+            pass
+        for e in inp["elements"]:
+            e.set_state(Gst.State.NULL)
+        mpad = inp["mixer_pad"]
+        if mpad is not None:
+            out["mixer"].release_request_pad(mpad)
+        b = out["bin"]
+        b.remove_pad(inp["ghost"])
+        for e in inp["elements"]:
+            b.remove(e)
+
+    def _unlink_minus_input(self, out, ssrc):
+        """Stop subtracting a live talker: unlink at an idle point, release on the main loop."""
+        Gst = self.Gst
+        inp = out["inputs"].pop(ssrc, None)
+        if inp is None:
+            return
+
+        def _on_idle(pad, _info):
+            pad.unlink(inp["ghost"])
+            gst_runtime.call_soon(self._drop_minus_input, out, inp)
+            return Gst.PadProbeReturn.REMOVE
+
+        inp["tee_pad"].add_probe(Gst.PadProbeType.IDLE, _on_idle)
+
+    def _set_minus_exclude(self, out, spec):
+        new = set(spec["exclude"])
+        for ssrc in out["exclude"] - new:
+            self._unlink_minus_input(out, ssrc)
+        out["exclude"] = new
+        out["spec"] = spec
+        branches = self._branch_snapshot()
+        for ssrc in new:
+            br = branches.get(ssrc)
+            if br is not None:
+                self._attach_minus_input(out, ssrc, br)
+
+    def _branch_snapshot(self):
+        """ssrc -> branch as of now; _branches is only changed under _stats_lock."""
+        with self._stats_lock:
+            return dict(self._branches)
+
+    def _retire_minus(self, out):
+        """Stop subtracting, then retire the output like any tee branch (EOS finalises a WAV)."""
+        for ssrc in list(out["inputs"]):
+            self._unlink_minus_input(out, ssrc)
+        rec = out["recorder"]
+        self._retire_branch(out["bin"], out["tee_pad"], on_done=rec.close if rec else None)
+        print(f"RX[{self.channel}] mix-minus {out['spec']['name']} removed")
+
+    def mix_minus_snapshot(self):
+        with self._minus_lock:
+            outs = list(self._minus.values())
+        res = []
+        for out in outs:
+            sp = out["spec"]
+            res.append({
+                "name": sp["name"],
+                "output": sp["output"],
+                "dest": f"{sp['host']}:{sp['port']}" if sp["output"] == "rtp" else sp["path"] or sp["mode"],
+                "exclude": sp["exclude"],
+                "subtracting": sorted(out["inputs"]),  # excluded talkers currently heard (and removed)
+            })
+        return res
+
+    # ---------- "last N minutes" rings ----------
+    def set_ring(self, minutes, talker_minutes=0.0):
+        """(Re)size the mix ring and per-talker rings; 0 disables. Resizing discards the held audio."""
+        minutes = max(0.0, float(minutes or 0))
+        talker_minutes = max(0.0, float(talker_minutes or 0))
+        if minutes != self.ring_minutes:
+            old = self._ring_tap
+            self.ring, self._ring_tap = None, None
+            if minutes > 0:
+                ring = PcmRing(minutes * 60.0, channels=self.fmt["channels"])
+                tap = self._make_pcm_tap(ring.write, leaky=True)
+                self.pipeline.add(tap)
+                tap.sync_state_with_parent()
+                self._ring_tap = (tap, self._link_tee(tap))
+                self.ring = ring
+            if old is not None:
+                self._retire_branch(*old)
+            self.ring_minutes = minutes
+        if talker_minutes != self.ring_talker_minutes:
+            for br in self._branch_snapshot().values():
+                self._detach_talker_ring(br)
+            with self._stats_lock:
+                self.talker_rings = {}
+            self.ring_talker_minutes = talker_minutes
+            if talker_minutes > 0:
+                for ssrc, br in self._branch_snapshot().items():
+                    self._attach_talker_ring(ssrc, br)
+
+    def _attach_talker_ring(self, ssrc, br):
+        """Copy a talker's conditioned (mix format) audio into its ring with a buffer probe."""
+        if ssrc is None or self.ring_talker_minutes <= 0:
+            return
+        Gst = self.Gst
+        stale_br = None
+        with self._stats_lock:
+            ring = self.talker_rings.get(ssrc)
+            if ring is None:
+                if len(self.talker_rings) >= self.MAX_TALKER_RINGS:
+                    # evict the ring whose talker was heard least recently
+                    stale = min(self.talker_rings, key=lambda k: self.talker_rings[k].info()["newest_ts"] or 0)
+                    del self.talker_rings[stale]
+                    stale_br = self._branches.get(stale)
+                ring = self.talker_rings[ssrc] = PcmRing(
+                    self.ring_talker_minutes * 60.0, channels=self.fmt["channels"],
+                    sampwidth=4 if mix_raw_format(self.fmt) == "S32LE" else 2)
+        if stale_br is not None:
+            # its probe would keep the evicted ring alive (and filled) until the branch goes
+            self._detach_talker_ring(stale_br)
+
+        def _probe(_pad, info):
+            buf = info.get_buffer()
+            if buf is not None:
+                ok, m = buf.map(Gst.MapFlags.READ)
+                if ok:
+                    try:
+                        ring.write(bytes(m.data))
+                    finally:
+                        buf.unmap(m)
+            return Gst.PadProbeReturn.OK
+
+        pad = br["tee"].get_static_pad("sink")
+        br["ring_probe"] = (pad, pad.add_probe(Gst.PadProbeType.BUFFER, _probe))
+
+    def _detach_talker_ring(self, br):
+        probe = br.pop("ring_probe", None)
+        if probe is not None:
+            probe[0].remove_probe(probe[1])
+
+    def clip(self, start_ts, end_ts, ssrc=None):
+        """Copy a recent span out of the mix ring (or one talker's). Returns (ring, first_ts, pcm)."""
+        with self._stats_lock:
+            ring = self.ring if ssrc is None else self.talker_rings.get(ssrc)
+        if ring is None:
+            return None, None, b""
+        first, pcm = ring.clip(start_ts, end_ts)
+        return ring, first, pcm
+
+    def ring_info(self):
+        with self._stats_lock:
+            talkers = dict(self.talker_rings)
+        return {
+            "mix": self.ring.info() if self.ring is not None else None,
+            "talkers": [{"ssrc": ssrc, "name": self.ssrc_names.get(ssrc, f"SSRC {ssrc}"), **r.info()}
+                        for ssrc, r in talkers.items()],
+        }
 
     def _on_pad_added(self, demux, pad):
         Gst = self.Gst
@@ -143,12 +1020,10 @@ class RxPartylineWorker:
         except Exception:
             print(f"WARN: could not parse SSRC from pad name: {name}")
             ssrc = None
-            lvl_name = None
         else:
             caps = pad.get_current_caps()
             caps_str = caps.to_string() if caps else ""
             print(f"RX demux SSRC detected: {ssrc} caps: {caps_str}")
-            lvl_name = f"level_{ssrc}"
 
         # Per-SSRC jitterbuffer BEFORE depay, not one global buffer
         jbuf = Gst.ElementFactory.make("rtpjitterbuffer", None)
@@ -156,7 +1031,10 @@ class RxPartylineWorker:
             print("WARN: missing rtpjitterbuffer element for SSRC", name)
             return
         jbuf.set_property("mode", 2)       # 2=slave to RTP timestamps
-        jbuf.set_property("latency", 100)  # ms jitter buffer (per talker)
+        # per-talker latency: fixed, or the adaptive controller's starting point
+        adapt = self._new_adapter(self.jb_cfg["latency_ms"]) if self.jb_cfg["mode"] == "adaptive" else None
+        jb_latency = adapt.latency_ms if adapt else int(self.jb_cfg["latency_ms"])
+        jbuf.set_property("latency", jb_latency)
         jbuf.set_property("do-lost", True)
         try:
             jbuf.set_property("drop-on-late", True)
@@ -192,10 +1070,10 @@ class RxPartylineWorker:
             depay = Gst.ElementFactory.make("rtpL16depay", None)
         if not depay:
             raise RuntimeError("Missing GStreamer depay (rtpL16depay/rtpL24depay). Install gstreamer1.0-plugins-good.")
-        # If channels not specified in caps, assume mono to avoid not-negotiated
+        # If channels not specified in caps, assume the configured count to avoid not-negotiated
         try:
             if channels_in_caps is None:
-                depay.set_property("channels", 1)
+                depay.set_property("channels", self.fmt["channels"])
         except Exception:
             pass
         aconv = Gst.ElementFactory.make("audioconvert", None)
@@ -204,17 +1082,28 @@ class RxPartylineWorker:
         ares = Gst.ElementFactory.make("audioresample", None)
         if not ares:
             raise RuntimeError("Missing GStreamer element: audioresample (install gstreamer1.0-plugins-base)")
-        # per-talker level meter; set element name at creation so bus messages carry it
-        lvl = Gst.ElementFactory.make("level", lvl_name) if lvl_name else Gst.ElementFactory.make("level", None)
-        if not lvl:
-            raise RuntimeError("Missing GStreamer element: level (install gstreamer1.0-plugins-good)")
-        # Post messages ~10 times/sec, RMS over window
-        lvl.set_property("interval", 100_000_000)  # 100ms in ns
-        lvl.set_property("post-messages", True)
-        lvl.set_property("peak-ttl", 500_000_000)
+        # meter tee -> valve (voice gate) -> talker tee: the meter always hears the talker,
+        # the mixer and mix-minus outputs (negated talker) take it behind the gate
+        mtee = Gst.ElementFactory.make("tee", None)
+        mtee.set_property("allow-not-linked", True)
+        valve = Gst.ElementFactory.make("valve", None)
+        try:
+            Gst.util_set_object_arg(valve, "drop-mode", "transform-to-gap")  # GStreamer >= 1.20
+        except Exception:
+            pass  # older valves drop buffers; the mixer's timeout covers the hole
+        ttee = Gst.ElementFactory.make("tee", None)
+        ttee.set_property("allow-not-linked", True)
         q = Gst.ElementFactory.make("queue", None)
+        # drift compensation: the talker's input rate is relabelled here and audioresample converts it to ours
+        skew = Gst.ElementFactory.make("capssetter", None)
+        if skew:
+            skew.set_property("caps", Gst.Caps.from_string("audio/x-raw,rate=48000"))
+        elif not self._warned_skew:
+            self._warned_skew = True
+            print("WARN: Missing GStreamer element: capssetter (install gstreamer1.0-plugins-good); "
+                  "clock drift is measured but not compensated")
 
-        for e in [jbuf, depay, aconv, ares, lvl, q]:
+        for e in [jbuf, depay, aconv, ares, mtee, valve, ttee, q] + ([skew] if skew else []):
             self.pipeline.add(e)
             e.sync_state_with_parent()
 
@@ -228,27 +1117,62 @@ class RxPartylineWorker:
 
         # Convert + resample, then enforce common caps for mixer
         depay.link(aconv)
-        aconv.link(ares)
+        if skew:
+            aconv.link(skew)
+            skew.link(ares)
+        else:
+            aconv.link(ares)
         capsfilter = Gst.ElementFactory.make("capsfilter", None)
         if not capsfilter:
             print("WARN: capsfilter missing, proceeding without explicit caps")
-            ares.link(lvl)
+            ares.link(mtee)
         else:
-            mix_caps = Gst.Caps.from_string("audio/x-raw,format=S16LE,rate=48000,channels=1")
+            mix_caps = Gst.Caps.from_string(
+                f"audio/x-raw,format={mix_raw_format(self.fmt)},rate=48000,channels={self.fmt['channels']}")
             capsfilter.set_property("caps", mix_caps)
             self.pipeline.add(capsfilter)
             capsfilter.sync_state_with_parent()
             ares.link(capsfilter)
-            capsfilter.link(lvl)
-        lvl.link(q)
+            capsfilter.link(mtee)
+        mtee.link(valve)
+        valve.link(ttee)
+        ttee.link(q)
         q.link(self.mixer)
+        req = getattr(mtee, "request_pad_simple", None) or mtee.get_request_pad
+        meter = self._add_meter_slot(ssrc, req("src_%u"))
+
+        # Remember the branch so an idle talker can be torn down again
+        elements = [jbuf, depay, aconv, ares, mtee, valve, ttee, q] + ([capsfilter] if capsfilter else []) + \
+                   ([skew] if skew else []) + meter
+        branch = {"elements": elements, "mixer_pad": q.get_static_pad("src").get_peer(), "jbuf": jbuf, "seq": None,
+                  "depay": depay, "tee": ttee, "valve": valve, "adapt": adapt, "jb_latency_ms": jb_latency,
+                  "skew": skew, "skew_rate": 48000, "drift": DriftEstimator(rate_in_caps or 48000),
+                  "dither": RateDither(48000), "drift_probe": False}
+        with self._stats_lock:
+            self._branches[ssrc] = branch
+        self._attach_talker_ring(ssrc, branch)
+        if ssrc is not None:
+            with self._minus_lock:
+                for out in self._minus.values():
+                    if ssrc in out["exclude"]:
+                        self._attach_minus_input(out, ssrc, branch)
 
         # Track peer
         label = self.ssrc_names.get(ssrc, f"SSRC {ssrc}" if ssrc is not None else "unknown")
-        self.active_peers[ssrc] = {"name": label, "last_ts": time.time(), "packets": 0, "level_db": None}
+        with self._stats_lock:
+            self.active_peers[ssrc] = {"name": label, "last_ts": time.time(), "packets": 0, "level_db": None,
+                                       "peak_db": None,
+                                       "quality": {}, "talking": None}
+        self._attach_gate(ssrc, branch)
+
+        # Native counting needs nothing per branch; stats are polled from the session
+        if self.session:
+            return
 
-        # Count packets
-        sinkpad = depay.get_static_pad("sink")
+        # Fallback: count packets in Python on every buffer, ahead of the jitterbuffer so
+        # sequence accounting sees arrival order
+        sinkpad = jbuf.get_static_pad("sink")
+        seq_stats = branch["seq"] = RtpSeqStats(rate_in_caps or 48000)
 
         def _probe_cb(_pad, info):
             now = time.time()
@@ -259,106 +1183,228 @@ class RxPartylineWorker:
             try:
                 buf = info.get_buffer()
                 n = int(buf.get_size()) if buf is not None else 0
+                hdr = buf.extract_dup(2, 6) if n >= 12 else None  # seq(16) + timestamp(32)
             except Exception:
                 n = 0
+                hdr = None
+            if hdr:
+                seq_stats.update(int.from_bytes(hdr[0:2], "big"), int.from_bytes(hdr[2:6], "big"), now)
+                if buf.pts != Gst.CLOCK_TIME_NONE:
+                    branch["drift"].add(buf.pts / 1e9, int.from_bytes(hdr[2:6], "big"))
             with self._stats_lock:
                 self.stats["packets_total"] += 1
                 self.stats["bytes_total"] += n
                 self.stats["last_packet_ts"] = now
-                self._window.append((now, n))
-                cutoff = now - self._WINDOW_SEC
-                while self._window and self._window[0][0] < cutoff:
-                    self._window.popleft()
-                if self._window:
-                    dt = max(1e-6, self._window[-1][0] - self._window[0][0])
-                    pps = len(self._window) / dt
-                    bps = sum(sz for _, sz in self._window) / dt
-                else:
-                    pps = bps = 0.0
-                self.stats["pps_recent"] = pps
-                self.stats["bps_recent"] = bps
+                self._rate.add(now, n)
             return Gst.PadProbeReturn.OK
 
         sinkpad.add_probe(Gst.PadProbeType.BUFFER, _probe_cb)
 
-        # Listen for level messages tagged with this branch (name set at creation)
+    def _reap_branch(self, ssrc):
+        """Unlink and release one talker's branch and mixer pad (main loop, never streaming)."""
+        Gst = self.Gst
+        with self._stats_lock:
+            br = self._branches.pop(ssrc, None)
+            rec = self.active_peers.pop(ssrc, None)
+            self.stats["talkers_reaped"] += 1
+        if br:
+            for e in br["elements"]:
+                e.set_state(Gst.State.NULL)
+            with self._minus_lock:
+                for out in self._minus.values():
+                    inp = out["inputs"].pop(ssrc, None)
+                    if inp is not None:
+                        self._drop_minus_input(out, inp)
+            self._drop_meter_slot(ssrc)
+            mpad = br["mixer_pad"]
+            if mpad is not None:
+                peer = mpad.get_peer()
+                if peer is not None:
+                    peer.unlink(mpad)
+                self.mixer.release_request_pad(mpad)
+            for e in br["elements"]:
+                self.pipeline.remove(e)
+        # Only now drop the demuxer's pads for this SSRC: the next packet triggers pad-added,
+        # and the new branch must not share the SSRC-keyed meter/mix-minus slots released above
+        try:
+            self.demux.emit("clear-ssrc", ssrc)
+        except Exception as e:
+            print(f"WARN: clear-ssrc {ssrc} failed: {e}")
+        name = rec["name"] if rec else ssrc
+        if rec and rec.get("talking"):
+            self._talk_event(ssrc, rec["name"], False)
+        print(f"RX reaped idle talker {name} (SSRC {ssrc})")
+
+    def _reap_idle(self):
+        if self.idle_timeout <= 0:
+            return
+        now = time.time()
+        with self._stats_lock:
+            idle = [ssrc for ssrc, rec in self.active_peers.items()
+                    if ssrc is not None and now - (rec["last_ts"] or 0) > self.idle_timeout]
+        for ssrc in idle:
+            self._reap_branch(ssrc)
+        # Bound the counter memory for talkers that never came back
+        with self._stats_lock:
+            if len(self._src_seen) > self.SRC_SEEN_MAX:
+                for ssrc in [k for k in self._src_seen if k not in self.active_peers][:len(self._src_seen) - self.SRC_SEEN_MAX]:
+                    del self._src_seen[ssrc]
+
+    def _source_stats(self, ssrc):
+        """Packets/bytes plus RFC 3550 loss and jitter for one SSRC from the rtpsession, or None."""
+        try:
+            internal = self.session.get_property("internal-session")
+            src = internal.emit("get-source-by-ssrc", ssrc) if internal else None
+            if src is None:
+                return None
+            st = src.get_property("stats")
+            packets = int(st.get_value("packets-received") or 0)
+            octets = int(st.get_value("octets-received") or 0)
+            lost = int(st.get_value("packets-lost") or 0)
+            jitter = int(st.get_value("jitter") or 0)  # RTP timestamp units
+            try:
+                rate = int(st.get_value("clock-rate") or 0) or 48000
+            except Exception:
+                rate = 48000
+        except Exception:
+            return None
+        return {
+            "packets": packets,
+            # octets-received is payload only; add the RTP header so bytes match the old probe
+            "bytes": octets + packets * self.RTP_HEADER_BYTES,
+            "lost": lost,
+            "jitter_ms": round(jitter * 1000.0 / rate, 3),
+        }
+
+    def _jb_stats(self, jbuf):
+        """rtpjitterbuffer counters: packets dropped as late, duplicates, lost (do-lost events)."""
+        try:
+            st = jbuf.get_property("stats")
+            return {
+                "late": int(st.get_value("num-late") or 0),
+                "duplicates": int(st.get_value("num-duplicates") or 0),
+                "jb_lost": int(st.get_value("num-lost") or 0),
+            }
+        except Exception:
+            return {}
+
+    def _poll_stats(self):
+        """Fold native session/jitterbuffer counters into peers/totals. Runs on the main loop."""
+        now = time.time()
+        d_packets = d_bytes = 0
+        with self._stats_lock:
+            for ssrc, rec in list(self.active_peers.items()):
+                if ssrc is None:
+                    continue
+                br = self._branches.get(ssrc)
+                q = dict(self._jb_stats(br["jbuf"])) if br else {}
+                if br:
+                    q["jb_latency_ms"] = br["jb_latency_ms"]
+                if br and br["seq"] is not None:
+                    # probe counting: sequence accounting was done per packet in Python
+                    sq = br["seq"].snapshot()
+                    q.update({"lost": sq["lost"], "expected": sq["expected"], "jitter_ms": sq["jitter_ms"],
+                              "duplicates": sq["duplicates"], "reordered": sq["reordered"]})
+                    self._adapt_latency(br, q, now)
+                    rec["quality"] = q
+                    continue
+                cur = self._source_stats(ssrc) if self.session else None
+                if br:
+                    self._sample_drift(br)  # the fallback probe feeds every packet instead
+                rec["quality"] = q
+                if cur is None:
+                    continue
+                q["lost"] = cur["lost"]
+                q["expected"] = cur["packets"] + max(0, cur["lost"])
+                q["jitter_ms"] = cur["jitter_ms"]
+                if br:
+                    self._adapt_latency(br, q, now)
+                cur = (cur["packets"], cur["bytes"])
+                prev = self._src_seen.get(ssrc, (0, 0))
+                # A source re-created inside the session restarts its counters
+                dp = cur[0] - prev[0] if cur[0] >= prev[0] else cur[0]
+                db = cur[1] - prev[1] if cur[1] >= prev[1] else cur[1]
+                self._src_seen[ssrc] = cur
+                if dp > 0:
+                    rec["packets"] += dp
+                    rec["last_ts"] = now
+                    d_packets += dp
+                    d_bytes += db
+            s = self.stats
+            if d_packets:
+                s["packets_total"] += d_packets
+                s["bytes_total"] += d_bytes
+                s["last_packet_ts"] = now
+            self._rate.add_many(now, d_packets, d_bytes)
+
+    def _tick(self):
+        """Periodic work on the main loop: counters every STATS_POLL_SEC, idle reaping every REAP_CHECK_SEC."""
+        self._poll_stats()
+        if time.monotonic() - self._last_drift >= self.DRIFT_UPDATE_SEC:
+            self._last_drift = time.monotonic()
+            self._update_drift()
+        if time.time() - self._last_reap >= self.REAP_CHECK_SEC:
+            self._last_reap = time.time()
+            self._reap_idle()
 
-    def _bus_loop(self):
+    def _on_bus_message(self, msg):
         Gst = self.Gst
-        bus = self.bus
-        mask = Gst.MessageType.ERROR | Gst.MessageType.EOS | Gst.MessageType.ELEMENT
-        while not self._stop_evt.is_set():
-            msg = bus.timed_pop_filtered(100 * Gst.MSECOND, mask)
-            if not msg:
-                continue
-            t = msg.type
-            if t == Gst.MessageType.ERROR:
-                err, dbg = msg.parse_error()
-                print("RX ERROR:", err, dbg)
-            elif t == Gst.MessageType.EOS:
-                print("RX EOS")
-            elif t == Gst.MessageType.ELEMENT:
-                s = msg.get_structure()
-                if s and s.get_name() == "level":
-                    src = msg.src
-                    name = src.get_name() if src else None
-                    try:
-                        rms = s.get_value("rms")
-                        if isinstance(rms, (list, tuple)) and rms:
-                            db = float(rms[0])
-                        else:
-                            db = None
-                    except Exception:
-                        db = None
-                    if name == "level_mix":
-                        try:
-                            import math
-                            self.mix_level_db = db if (db is not None and math.isfinite(db)) else None
-                        except Exception:
-                            self.mix_level_db = None
-                    elif name and name.startswith("level_"):
-                        try:
-                            ssrc = int(name.split("_", 1)[1])
-                            if ssrc in self.active_peers:
-                                try:
-                                    import math
-                                    self.active_peers[ssrc]["level_db"] = db if (db is not None and math.isfinite(db)) else None
-                                except Exception:
-                                    self.active_peers[ssrc]["level_db"] = None
-                                self.active_peers[ssrc]["last_ts"] = time.time()
-                        except Exception:
-                            pass
+        t = msg.type
+        if t not in (Gst.MessageType.ERROR, Gst.MessageType.EOS):
+            return
+        observe_bus_message(Gst, self.label, msg)
+        if t == Gst.MessageType.ERROR:
+            err, dbg = msg.parse_error()
+            print(f"RX[{self.channel}] ERROR:", err, dbg)
+        else:
+            print(f"RX[{self.channel}] EOS")
 
     def start(self):
-        self._stop_evt.clear()
         # Bring up pipeline and wait until it's PLAYING to improve stability
+        t0 = time.monotonic()
         self.pipeline.set_state(self.Gst.State.PAUSED)
         self.pipeline.get_state(timeout=2 * self.Gst.SECOND)
+        STATE_CHANGE.observe(time.monotonic() - t0, pipeline=self.label, target="PAUSED")
         self.pipeline.set_state(self.Gst.State.PLAYING)
         self.pipeline.get_state(timeout=2 * self.Gst.SECOND)
-        if not self._bus_thread or not self._bus_thread.is_alive():
-            self._bus_thread = threading.Thread(target=self._bus_loop, daemon=True)
-            self._bus_thread.start()
+        STATE_CHANGE.observe(time.monotonic() - t0, pipeline=self.label, target="PLAYING")
+        if self._unwatch is None:
+            self._unwatch = gst_runtime.watch_bus(self.bus, self._on_bus_message)
+            self._cancel_tick = gst_runtime.every(self.STATS_POLL_SEC, self._tick)
 
     def stop(self):
+        if self._unwatch is not None:
+            self._cancel_tick()
+            self._unwatch()
+            self._unwatch = self._cancel_tick = None
         # Try to gracefully finalize WAV (if used)
         try:
             self.pipeline.send_event(self.Gst.Event.new_eos())
-            bus = self.pipeline.get_bus()
-            bus.timed_pop_filtered(2 * self.Gst.SECOND, self.Gst.MessageType.EOS)
+            self.bus.timed_pop_filtered(2 * self.Gst.SECOND, self.Gst.MessageType.EOS)
         except Exception:
             pass
-        self._stop_evt.set()
-        if self._bus_thread and self._bus_thread.is_alive():
-            try:
-                self._bus_thread.join(timeout=1.0)
-            except Exception:
-                pass
+        t0 = time.monotonic()
         self.pipeline.set_state(self.Gst.State.NULL)
+        STATE_CHANGE.observe(time.monotonic() - t0, pipeline=self.label, target="NULL")
+        if self.recorder is not None:
+            self.recorder.close()
+        with self._minus_lock:
+            for out in self._minus.values():
+                if out["recorder"] is not None:
+                    out["recorder"].close()
 
     def peers_snapshot(self):
         now = time.time()
         out = []
+        gate_db = {}  # recent peak the gate measured, also while it is shut
+        drift = {}    # ssrc -> (estimated ppm, applied ppm)
+        for ssrc, br in list(self._branches.items()):
+            gate = br.get("gate")
+            if gate is not None and gate.peak_db is not None:
+                gate_db[ssrc] = round(gate.peak_db, 1)
+            est = br["drift"].ppm
+            drift[ssrc] = (round(est, 2) if est is not None else None,
+                           round(br["dither"].applied_ppm, 2) if br["skew"] is not None else None)
         for ssrc, rec in list(self.active_peers.items()):
             idle = now - rec["last_ts"] if rec["last_ts"] else 999
             # Sanitize per-talker level (avoid NaN/Inf)
@@ -371,19 +1417,45 @@ class RxPartylineWorker:
                     ld_out = round(ld, 1)
             except Exception:
                 ld_out = None
+            q = rec.get("quality") or {}
+            expected = q.get("expected") or 0
             out.append({
                 "ssrc": ssrc,
                 "name": rec["name"],
                 "packets": rec["packets"],
                 "level_db": ld_out,
-                "last_seen_sec": round(idle, 2)
+                "peak_db": round(rec["peak_db"], 1) if rec.get("peak_db") is not None else None,
+                "last_seen_sec": round(idle, 2),
+                "lost": q.get("lost"),
+                "loss_pct": round(100.0 * max(0, q.get("lost") or 0) / expected, 2) if expected else None,
+                "jitter_ms": q.get("jitter_ms"),
+                "duplicates": q.get("duplicates"),
+                "reordered": q.get("reordered"),  # needs per-packet accounting; null with native counters
+                "late": q.get("late"),
+                "jb_lost": q.get("jb_lost"),
+                "jb_latency_ms": q.get("jb_latency_ms"),
+                "jb_target_ms": q.get("jb_target_ms"),  # adaptive mode only
+                "talking": rec.get("talking"),  # null when the voice gate is off
+                "gate_db": gate_db.get(ssrc),
+                "drift_ppm": drift.get(ssrc, (None, None))[0],       # + : the talker's clock runs fast
+                "drift_comp_ppm": drift.get(ssrc, (None, None))[1],  # correction applied by the resampler
             })
         # sort by name, then ssrc for stability
         return sorted(out, key=lambda x: (x["name"] or "", x["ssrc"] or 0))
 
     def metrics_snapshot(self):
         with self._stats_lock:
+            r = self._rate.snapshot(time.time())
             s = dict(self.stats)
+        s["pps_recent"] = r["pps"]
+        s["bps_recent"] = r["bps"]
+        s["iat_p50_ms"] = r["iat_p50_ms"]
+        s["iat_p99_ms"] = r["iat_p99_ms"]
+        s["burst_max"] = r["burst_max"]
+        s["channel"] = self.channel
+        s["talking"] = sum(1 for rec in list(self.active_peers.values()) if rec.get("talking"))
+        s["meter"] = {"hz": self.meter_hz, "slots": len(self._meter_slots),
+                      "backend": meter_backend() if self.meter_in is not None else None}
         s["group"] = self.group
         s["port"] = self.port
         s["receiving"] = (s["last_packet_ts"] is not None) and ((time.time() - s["last_packet_ts"]) < 2.5)
@@ -0,0 +1,440 @@
+# backend/sap.py
+"""
+SAP (RFC 2974) / SDP (RFC 4566) stream discovery, as AES67 devices use it.
+
+SapService keeps one UDP socket on 239.255.255.255:9875 and one thread that
+  - maintains an in-memory index of announced sessions, keyed by the SDP origin
+    (o= without the version, so a re-announced edit replaces its entry), dropping an
+    entry on a SAP deletion or when it has not been re-announced for 10x its observed
+    announcement interval or `min_timeout_sec` (RFC 2974: one hour), whichever is longer
+  - announces our own sessions (set_announcements()) every `interval_sec` with the
+    RFC's +-1/3 random spread, and sends deletions when they are withdrawn or on stop.
+
+RFC 2974 derives the interval from a 4 kbit/s scope budget (at least 300 s); AES67
+devices commonly announce every 30 s so receivers find streams quickly, and that is
+the default here.
+"""
+import random
+import socket
+import struct
+import threading
+import time
+import zlib
+
+from audio_format import ENCODINGS, PTIMES_US, RATE
+
+SAP_GROUP = "239.255.255.255"  # administratively scoped SAP address used by AES67
+SAP_PORT = 9875
+MIME = b"application/sdp\0"
+
+
+# ---------- SDP ----------
+def _int(v):
+    """int(v), or None for anything that is not a plain integer (announcements are untrusted)."""
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_sdp(text):
+    """The fields of an audio session we use; media-level c= wins over session-level. None if not SDP."""
+    d = {"name": None, "origin": None, "group": None, "port": None, "encoding": None, "rate": None,
+         "channels": None, "pt": None, "ptime_ms": None, "source": None, "ts_refclk": None, "mediaclk": None}
+    in_audio = seen_media = False
+    rtpmaps = {}
+    for raw in text.replace("\r\n", "\n").split("\n"):
+        if len(raw) < 2 or raw[1] != "=":
+            continue
+        k, v = raw[0], raw[2:].strip()
+        if k == "o":
+            p = v.split()
+            if len(p) == 6:
+                d["origin"] = {"user": p[0], "sess_id": p[1], "version": p[2], "addr": p[5]}
+        elif k == "s" and not seen_media:
+            d["name"] = v
+        elif k == "m":
+            seen_media = True
+            p = v.split()
+            in_audio = d["port"] is None and len(p) >= 4 and p[0] == "audio"
+            if in_audio:
+                d["port"] = _int(p[1].split("/")[0])
+                d["pt"] = _int(p[3])
+                in_audio = d["port"] is not None and d["pt"] is not None
+                if not in_audio:
+                    d["port"] = d["pt"] = None
+        elif k == "c" and (in_audio or not seen_media):
+            p = v.split()
+            if len(p) == 3:
+                d["group"] = p[2].split("/")[0]
+        elif k == "a" and (in_audio or not seen_media):
+            name, _, val = v.partition(":")
+            if name == "rtpmap":
+                pt, _, enc = val.partition(" ")
+                if _int(pt) is not None:
+                    rtpmaps[_int(pt)] = enc.split("/")
+            elif name == "ptime":
+                try:
+                    d["ptime_ms"] = float(val)
+                except ValueError:
+                    pass
+            elif name == "source-filter":
+                p = val.split()
+                if len(p) >= 5:
+                    d["source"] = p[4]
+            elif name == "ts-refclk":
+                d["ts_refclk"] = val
+            elif name == "mediaclk":
+                d["mediaclk"] = val
+    if d["origin"] is None:
+        return None
+    enc = rtpmaps.get(d["pt"])
+    if enc:
+        d["encoding"] = enc[0].upper()
+        d["rate"] = _int(enc[1]) if len(enc) > 1 else None
+        d["channels"] = _int(enc[2]) if len(enc) > 2 else 1
+    return d
+
+
+def sdp_format(d):
+    """
+    (stream format for RX, None) from a parsed SDP (see audio_format.stream_format), or
+    (None, reason) when we cannot receive it. Packet times snap to the nearest profile.
+    """
+    if d.get("group") is None or d.get("port") is None:
+        return None, "no audio destination"
+    if d.get("encoding") not in ENCODINGS:
+        return None, f"encoding {d.get('encoding')} not supported (L16/L24)"
+    if d.get("rate") != RATE:
+        return None, f"{d.get('rate')} Hz not supported (48 kHz only)"
+    if d.get("channels") not in (1, 2):
+        return None, f"{d.get('channels')} channels not supported (mono/stereo)"
+    ptime_us = round((d.get("ptime_ms") or 1.0) * 1000)  # AES67 default is 1 ms
+    ptime_us = min(PTIMES_US, key=lambda p: abs(p - ptime_us))
+    return {"encoding": d["encoding"], "channels": d["channels"], "ptime_us": ptime_us}, None
+
+
+def make_sdp(name, sess_id, origin_addr, group, port, fmt, version=1, ttl=16):
+    """SDP for one of our AES67 streams (payload type 96, local media clock: we run no PTP)."""
+    ptime = f"{fmt['ptime_us'] / 1000.0:g}"
+    lines = [
+        "v=0",
+        f"o=- {sess_id} {version} IN IP4 {origin_addr}",
+        f"s={name}",
+        f"c=IN IP4 {group}/{ttl}",
+        "t=0 0",
+        f"m=audio {int(port)} RTP/AVP 96",
+        f"a=rtpmap:96 {fmt['encoding']}/{RATE}/{fmt['channels']}",
+        f"a=ptime:{ptime}",
+        "a=recvonly",
+        "a=ts-refclk:local",
+        "a=mediaclk:direct=0",
+    ]
+    return "\r\n".join(lines) + "\r\n"
+
+
+# ---------- SAP ----------
+def pack_sap(sdp, origin_addr, delete=False):
+    """SAPv1 announcement (or deletion) for an IPv4 origin; the id hash follows the SDP text."""
+    msg_hash = (zlib.crc32(sdp.encode()) & 0xFFFF) or 1
+    head = struct.pack("!BBH4s", 0x20 | (0x04 if delete else 0), 0, msg_hash, socket.inet_aton(origin_addr))
+    return head + MIME + sdp.encode()
+
+
+def parse_sap(data):
+    """(is_deletion, msg_hash, origin address, sdp text) or None for anything we cannot read."""
+    if len(data) < 8:
+        return None
+    b0, auth_len, msg_hash = struct.unpack("!BBH", data[:4])
+    if b0 >> 5 != 1 or b0 & 0x02:  # version 1 only; encrypted payloads are skipped
+        return None
+    alen = 16 if b0 & 0x10 else 4
+    if len(data) < 4 + alen:
+        return None
+    raw = data[4:4 + alen]
+    origin = socket.inet_ntop(socket.AF_INET6 if alen == 16 else socket.AF_INET, raw)
+    payload = data[4 + alen + 4 * auth_len:]
+    if b0 & 0x01:
+        try:
+            payload = zlib.decompress(payload)
+        except zlib.error:
+            return None
+    if not payload.startswith(b"v=0"):
+        mime, sep, rest = payload.partition(b"\0")
+        if not sep or mime.strip().lower() != b"application/sdp":
+            return None
+        payload = rest
+    return bool(b0 & 0x04), msg_hash, origin, payload.decode("utf-8", "replace")
+
+
+def _iface_addr(iface):
+    """IPv4 address of a network interface name (e.g. "eth0"), or None."""
+    if not iface:
+        return None
+    try:
+        import fcntl
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            req = struct.pack("256s", iface[:15].encode())
+            return socket.inet_ntoa(fcntl.ioctl(s.fileno(), 0x8915, req)[20:24])  # SIOCGIFADDR
+        finally:
+            s.close()
+    except Exception:
+        return None
+
+
+def local_addr(iface=None, toward=SAP_GROUP):
+    """Our address on `iface`, else the one the routing table would send `toward` from."""
+    addr = _iface_addr(iface)
+    if addr:
+        return addr
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect((toward, SAP_PORT))  # no packet is sent for UDP connect
+        return s.getsockname()[0]
+    except OSError:
+        return "127.0.0.1"
+    finally:
+        s.close()
+
+
+class SapService:
+    MIN_TIMEOUT_SEC = 3600.0  # RFC 2974
+    EXPIRE_CHECK_SEC = 1.0
+
+    def __init__(self, on_change=None):
+        self.on_change = on_change  # callable(session view, event) with event "new"/"changed"/"removed"
+        self.lock = threading.Lock()
+        self.stop_evt = threading.Event()
+        self.thread = None
+        self.sessions = {}  # id -> entry (see _view)
+        self._by_hash = {}  # (origin, msg hash) -> id, for deletions without an SDP body
+        self._ads = {}      # sdp text -> origin address, announced every interval
+        self._withdrawn = []  # (sdp, origin) deletions still to send
+        self._announce_due = 0.0
+        self.iface = None
+        self.interval_sec = 30.0
+        self.min_timeout_sec = self.MIN_TIMEOUT_SEC
+        self.listen = True
+        self.stats = {"received": 0, "ignored": 0, "announced": 0, "expired": 0, "deleted": 0}
+
+    # ---------- lifecycle ----------
+    def start(self, iface=None, interval_sec=30.0, min_timeout_sec=MIN_TIMEOUT_SEC, listen=True):
+        self.stop()
+        self.iface = iface or None
+        self.configure(interval_sec, min_timeout_sec, listen)
+        self.stop_evt.clear()
+        self.thread = threading.Thread(target=self._run, name="sap", daemon=True)
+        self.thread.start()
+
+    def configure(self, interval_sec=30.0, min_timeout_sec=MIN_TIMEOUT_SEC, listen=True):
+        """listen=False keeps announcing but empties and stops filling the index."""
+        self.interval_sec = max(1.0, float(interval_sec))
+        self.min_timeout_sec = max(0.0, float(min_timeout_sec))
+        self.listen = bool(listen)
+        if not self.listen:
+            with self.lock:
+                self.sessions.clear()
+                self._by_hash.clear()
+
+    def stop(self):
+        """Stop listening; our announcements are withdrawn with SAP deletions first."""
+        if self.thread and self.thread.is_alive():
+            self.stop_evt.set()
+            self.thread.join(timeout=2.0)
+        self.thread = None
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def set_announcements(self, sdps, origin_addr):
+        """Announce exactly these SDP texts from origin_addr; dropped ones get a deletion."""
+        with self.lock:
+            new = {sdp: origin_addr for sdp in sdps}
+            self._withdrawn.extend((sdp, o) for sdp, o in self._ads.items() if sdp not in new)
+            if set(new) != set(self._ads):
+                self._announce_due = 0.0  # send new/changed descriptions right away
+            self._ads = new
+
+    # ---------- socket thread ----------
+    def _open(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        try: sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        except OSError: pass
+        sock.bind(("", SAP_PORT))
+        ifaddr = _iface_addr(self.iface) or "0.0.0.0"
+        mreq = struct.pack("=4s4s", socket.inet_aton(SAP_GROUP), socket.inet_aton(ifaddr))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 16)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)  # local receivers see our streams too
+        if ifaddr != "0.0.0.0":
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(ifaddr))
+        return sock, mreq
+
+    def _run(self):
+        try:
+            sock, mreq = self._open()
+        except OSError as e:
+            print("SAP: cannot listen on", f"{SAP_GROUP}:{SAP_PORT}:", e)
+            return
+        last_expire = 0.0
+        try:
+            while not self.stop_evt.is_set():
+                now = time.monotonic()
+                sock.settimeout(max(0.01, min(self.EXPIRE_CHECK_SEC, self._announce_due - now)))
+                try:
+                    data, addr = sock.recvfrom(65535)
+                except socket.timeout:
+                    data = None
+                if data is not None:
+                    try:
+                        self._handle(data, addr[0], time.monotonic())
+                    except Exception as e:  # one bad packet must not end discovery and our announcements
+                        print("SAP: dropped packet from", addr[0], e)
+                        with self.lock:
+                            self.stats["ignored"] += 1
+                now = time.monotonic()
+                self._send_pending(sock, now)
+                if now - last_expire >= self.EXPIRE_CHECK_SEC:
+                    last_expire = now
+                    self._expire(now)
+        finally:
+            with self.lock:
+                bye = list(self._ads.items()) + self._withdrawn
+                self._withdrawn = []
+            for sdp, origin in bye:
+                self._send(sock, pack_sap(sdp, origin, delete=True))
+            try: sock.setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP, mreq)
+            except OSError: pass
+            sock.close()
+
+    def _send(self, sock, pkt):
+        try:
+            sock.sendto(pkt, (SAP_GROUP, SAP_PORT))
+        except OSError as e:
+            print("SAP send failed:", e)
+
+    def _send_pending(self, sock, now):
+        with self.lock:
+            withdrawn, self._withdrawn = self._withdrawn, []
+            ads = list(self._ads.items()) if now >= self._announce_due else []
+            if now >= self._announce_due:
+                self._announce_due = now + self.interval_sec * random.uniform(2 / 3, 4 / 3)
+        for sdp, origin in withdrawn:
+            self._send(sock, pack_sap(sdp, origin, delete=True))
+        for sdp, origin in ads:
+            self._send(sock, pack_sap(sdp, origin))
+        if ads:
+            with self.lock:
+                self.stats["announced"] += len(ads)
+
+    # ---------- index ----------
+    @staticmethod
+    def _session_id(o):
+        ident = " ".join((o["user"], o["sess_id"], o["addr"]))
+        return f"{zlib.crc32(ident.encode()):08x}"
+
+    def _handle(self, data, src, now):
+        if not self.listen:
+            return
+        try:
+            msg = parse_sap(data)
+            sdp = parse_sdp(msg[3]) if msg else None
+        except Exception:
+            msg = sdp = None
+        with self.lock:
+            if msg is None:
+                self.stats["ignored"] += 1
+                return
+            self.stats["received"] += 1
+            is_del, msg_hash, origin, text = msg
+            sid = self._session_id(sdp["origin"]) if sdp else self._by_hash.get((origin, msg_hash))
+            # only a deletion may omit the description (o= missing): it is found by its hash
+            if sid is None or (sdp is None and not is_del):
+                self.stats["ignored"] += 1
+                return
+            if is_del:
+                e = self.sessions.pop(sid, None)
+                self.stats["deleted"] += e is not None
+                event = "removed" if e is not None else None
+            else:
+                e = self.sessions.get(sid)
+                fmt, reason = sdp_format(sdp)
+                if e is None:
+                    e = self.sessions[sid] = {"id": sid, "first_seen": time.time(), "count": 0,
+                                              "interval_sec": None, "_last": None}
+                    event = "new"
+                else:
+                    event = "changed" if e["sdp"] != text else None
+                    gap = now - e["_last"]
+                    # smoothed announcement interval; the timeout scales with it
+                    e["interval_sec"] = gap if e["interval_sec"] is None else 0.7 * e["interval_sec"] + 0.3 * gap
+                e.update({"sdp": text, "desc": sdp, "format": fmt, "reason": reason, "announcer": src,
+                          "msg_hash": msg_hash, "last_seen": time.time(), "_last": now})
+                e["count"] += 1
+                self._by_hash[(origin, msg_hash)] = sid
+            view = self._view(e, now) if e is not None else None
+        if event and self.on_change is not None:
+            try:
+                self.on_change(view, event)
+            except Exception as ex:
+                print("SAP change handler failed:", ex)
+
+    def _timeout(self, e):
+        return max(self.min_timeout_sec, 10.0 * (e["interval_sec"] or 0.0))
+
+    def _expire(self, now):
+        with self.lock:
+            gone = [sid for sid, e in self.sessions.items() if now - e["_last"] > self._timeout(e)]
+            removed = [self._view(self.sessions.pop(sid), now) for sid in gone]
+            self.stats["expired"] += len(gone)
+            self._by_hash = {k: v for k, v in self._by_hash.items() if v in self.sessions}
+        for view in removed:
+            if self.on_change is not None:
+                try:
+                    self.on_change(view, "removed")
+                except Exception as ex:
+                    print("SAP change handler failed:", ex)
+
+    def _view(self, e, now=None):
+        now = time.monotonic() if now is None else now
+        d = e["desc"]
+        return {
+            "id": e["id"], "name": d["name"], "group": d["group"], "port": d["port"],
+            "encoding": d["encoding"], "rate": d["rate"], "channels": d["channels"], "ptime_ms": d["ptime_ms"],
+            "source": d["source"], "origin": d["origin"]["addr"], "announcer": e["announcer"],
+            "ts_refclk": d["ts_refclk"], "format": e["format"], "usable": e["format"] is not None,
+            "reason": e["reason"], "first_seen": e["first_seen"], "last_seen": e["last_seen"],
+            "announcements": e["count"],
+            "interval_sec": round(e["interval_sec"], 1) if e["interval_sec"] is not None else None,
+            "expires_in_sec": round(self._timeout(e) - (now - e["_last"]), 1),
+            "own": e["sdp"] in self._ads,
+        }
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self.lock:
+            sessions = sorted((self._view(e, now) for e in self.sessions.values()),
+                              key=lambda s: (s["name"] or "", s["id"]))
+            return {"listening": self.is_running() and self.listen, "running": self.is_running(), "interval_sec": self.interval_sec,
+                    "min_timeout_sec": self.min_timeout_sec, "announcing": len(self._ads),
+                    "stats": dict(self.stats), "sessions": sessions}
+
+    def sdp(self, sid):
+        with self.lock:
+            e = self.sessions.get(sid)
+            return e["sdp"] if e else None
+
+    def lookup(self, group, port):
+        """
+        The usable announced session sent to group:port, or None. When several sources
+        announce the same destination, the one known longest wins (ties by id), so the
+        answer does not flip with every re-announcement.
+        """
+        with self.lock:
+            hits = [e for e in self.sessions.values()
+                    if e["desc"]["group"] == group and e["desc"]["port"] == int(port) and e["format"]]
+            if not hits:
+                return None
+            e = min(hits, key=lambda e: (e["first_seen"], e["id"]))
+            return self._view(e)
@@ -1,22 +1,37 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file
+from flask import Flask, request, jsonify, send_from_directory, send_file, Response, g
 from flask_cors import CORS
 import traceback
-import os, time, threading, subprocess, shlex
+import os, time, threading, subprocess, shlex, queue, zlib
 from pathlib import Path
 from mic_monitor import MicMonitor
 
-from config_store import load_config, save_config
+from config_store import (load_config, save_config, flush as flush_config, subscribe as config_subscribe,
+                          get_version as config_version, DEFAULT_CFG)
 from monitor import RxMonitor
-from tx import start_tx, stop_tx, is_running as tx_running
+from tx import (start_tx, stop_tx, is_running as tx_running, tx_stats, apply_tx_config, set_tx_probe,
+                TX_LIVE_KEYS, TX_FORMAT_KEYS, TX_DEST_KEYS)
 from rx_worker import RxPartylineWorker
+from telemetry import TelemetryHub
+from metrics import REGISTRY, HTTP_LATENCY
+from recorder import SegmentRecorder, wav_header
+from live_stream import LiveStreamHub
+from audio_format import stream_format
+from latency_probe import LatencyProbe
+from channels import DEFAULT_CHANNEL, channel_configs, tx_destinations, validate as validate_channels
+from jobs import JobRunner, JobError
+from sap import SapService, make_sdp, local_addr
+from metrics_history import HistoryRecorder
+import gst_runtime
 
 app = Flask(__name__, static_folder="../frontend/build", static_url_path="")
 # Enable CORS for development (allows calls from :3000 dev server or other hosts)
 CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=False)
 
-rx_worker = None
+rx_workers = {}  # channel name -> running RxPartylineWorker (see channels.py)
 rxmon = RxMonitor()
 micmon = MicMonitor()
+jobs = JobRunner()  # start/stop/restart and config application run here, one at a time
+sap = SapService()  # SAP/SDP stream index and our announcements (see _sap_refresh)
 _update_lock = threading.Lock()
 _update_state = {"running": False, "ok": None, "branch": "", "output": ""}
 
@@ -32,15 +47,52 @@ def _sanitize(obj):
     return obj
 
 # ---------- API ----------
+def _rx(channel=None):
+    """Running worker for a channel (default: main), or None."""
+    return rx_workers.get(channel or DEFAULT_CHANNEL)
+
+@app.before_request
+def _check_channel():
+    # /ch/<channel>/... routes: unknown names are a 404, not a silently empty answer
+    channel = (request.view_args or {}).get("channel")
+    if channel is not None and channel not in channel_configs(load_config()):
+        return jsonify({"ok": False, "error": f"unknown channel: {channel}"}), 404
+
 @app.get("/status")
 def status():
     cfg = load_config()
     return jsonify({
         "config": cfg,
         "tx_running": tx_running(),
-        "rx_running": (rx_worker is not None)
+        "rx_running": _rx() is not None,
+        "rx_channels": sorted(rx_workers),
+        "main_loop": gst_runtime.snapshot(),
     })
 
+@app.get("/channels")
+def channels_list():
+    """Configured channels with their groups, TX assignment and RX state."""
+    return jsonify(_sanitize({"channels": list(_channel_summaries().values())}))
+
+def _channel_summaries():
+    cfg = load_config()
+    talk = cfg.get("tx_channels") if isinstance(cfg.get("tx_channels"), list) else [DEFAULT_CHANNEL]
+    out = {}
+    for name, c in channel_configs(cfg).items():
+        w = rx_workers.get(name)
+        m = w.metrics_snapshot() if w is not None else {}
+        out[name] = {
+            "name": name,
+            "rx": f"{c['rx_multicast']}:{c['rx_port']}",
+            "tx": f"{c['tx_multicast']}:{c['tx_port']}",
+            "talk": name in talk,
+            "running": w is not None,
+            "receiving": bool(m.get("receiving")),
+            "talkers": len(w.active_peers) if w is not None else 0,
+            "mix_level_db": _round(getattr(w, "mix_level_db", None), 1),
+        }
+    return out
+
 @app.post("/config")
 def update_config():
     cfg = load_config()
@@ -51,70 +103,138 @@ def update_config():
     if "tx_ssrc" in incoming:
         try: incoming["tx_ssrc"] = int(incoming["tx_ssrc"]) & 0xFFFFFFFF
         except Exception: incoming["tx_ssrc"] = 12345678
+    if any(k in incoming for k in ("channels", "rx_multicast", "rx_port")):
+        # checked against the main channel's RX group as it will be after this update
+        bad = validate_channels(incoming.get("channels", cfg.get("channels") or []), {**cfg, **incoming})
+        if bad:
+            return jsonify({"ok": False, "error": bad}), 400
     cfg.update(incoming)
     try:
         cfg.setdefault("ssrc_names", {})[str(int(cfg["tx_ssrc"]))] = cfg.get("tx_name") or f"SSRC {cfg['tx_ssrc']}"
     except Exception: pass
-    save_config(cfg)
-    return jsonify({"ok": True, "config": cfg})
-
-@app.post("/restart")
-def restart_both():
-    cfg = load_config()
-    # Start RX first to ensure IGMP join and jitterbuffer are ready, then TX
-    start_rx_internal(cfg)
     try:
-        time.sleep(0.25)
-    except Exception:
-        pass
+        saved = save_config(cfg).wait(timeout=5.0)
+    except (OSError, TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": f"Config applied but not saved to config.json: {e}"}), 500
+    if not saved:
+        # applied in memory; the write is still queued behind a slow disk
+        return jsonify({"ok": True, "saved": False, "pending": True, "config": cfg}), 202
+    return jsonify({"ok": True, "saved": True, "config": cfg})
+
+# ---------- Lifecycle jobs ----------
+# Starting/stopping pipelines can take seconds (state waits, EOS drains, device retries).
+# Handlers enqueue a job and answer 202 with its id; ?wait=1 blocks until it finishes.
+GI_HINT = (
+    "GStreamer Python bindings not found. Install: "
+    "sudo apt update && sudo apt install -y python3-gi gir1.2-gstreamer-1.0 "
+    "gstreamer1.0-tools gstreamer1.0-alsa gstreamer1.0-plugins-base "
+    "gstreamer1.0-plugins-good gstreamer1.0-plugins-bad gstreamer1.0-plugins-ugly"
+)
+
+def _job_response(op, fn, key=None, **info):
+    # key: the resource acted on; the config version keeps a request from joining a job
+    # that is already running with older settings (see JobRunner.submit)
+    job, coalesced = jobs.submit(op, fn, key=key, stamp=config_version(), **info)
+    if request.args.get("wait") in ("1", "true", "yes"):
+        job = jobs.wait(job["id"], timeout=30) or job
+        if job["state"] == "failed":
+            return jsonify({"ok": False, "error": job["error"], "hint": job["hint"], "job": job}), 500
+        if job["state"] == "done":
+            return jsonify({"ok": True, "job": job, **(job["result"] or {})})
+        # still queued/running after the wait: answer as without ?wait
+    resp = jsonify({"ok": True, "job": job, "coalesced": coalesced})
+    resp.status_code = 202
+    resp.headers["Location"] = f"/jobs/{job['id']}"
+    return resp
+
+def _release_mic():
     try:
-        # Ensure mic monitor isn't holding the capture device
-        micmon.stop()
+        micmon.stop()  # the monitor may hold the capture device
     except Exception:
         pass
-    start_tx(cfg)
-    return jsonify({"ok": True, "rx": "started", "tx": "started"})
 
-@app.post("/start/tx")
-def start_tx_only():
+def _job_restart():
     cfg = load_config()
-    try:
-        micmon.stop()
-    except Exception:
-        pass
+    # Start RX first to ensure IGMP join and jitterbuffer are ready, then TX
+    jobs.progress("starting RX")
+    start_rx_internal(cfg, rebuild=True)
+    time.sleep(0.25)
+    jobs.progress("starting TX")
+    _release_mic()
     start_tx(cfg)
-    return jsonify({"ok": True, "tx": "started"})
+    _sap_refresh()
+    return {"rx": "started", "tx": "started"}
 
-@app.post("/start/rx")
-def start_rx_only():
-    cfg = load_config()
+def _job_start_tx():
+    jobs.progress("starting TX")
+    _release_mic()
+    start_tx(load_config())
+    _sap_refresh()
+    return {"tx": "started"}
+
+def _job_start_rx(channel):
+    jobs.progress(f"starting RX {channel or 'all channels'}")
     try:
-        start_rx_internal(cfg)
-        return jsonify({"ok": True, "rx": "started"})
+        start_rx_internal(load_config(), channel=channel)
     except ModuleNotFoundError as e:
-        err = str(e)
-        if "gi" in err.lower():
-            hint = (
-                "GStreamer Python bindings not found. Install: "
-                "sudo apt update && sudo apt install -y python3-gi gir1.2-gstreamer-1.0 "
-                "gstreamer1.0-tools gstreamer1.0-alsa gstreamer1.0-plugins-base "
-                "gstreamer1.0-plugins-good gstreamer1.0-plugins-bad gstreamer1.0-plugins-ugly"
-            )
-            print("/start/rx error (gi missing):\n" + traceback.format_exc())
-            return jsonify({"ok": False, "error": err, "hint": hint}), 500
-        print("/start/rx error:\n" + traceback.format_exc())
-        return jsonify({"ok": False, "error": err}), 500
-    except Exception as e:
-        print("/start/rx error (generic):\n" + traceback.format_exc())
-        return jsonify({"ok": False, "error": str(e)}), 500
+        if "gi" in str(e).lower():
+            raise JobError(str(e), GI_HINT) from e
+        raise
+    return {"rx": "started", "channels": sorted(rx_workers)}
+
+def _job_stop_rx(channel):
+    jobs.progress(f"stopping RX {channel or 'all channels'}")
+    stop_rx_internal(channel)
+    return {"rx": "stopped", "channels": sorted(rx_workers)}
+
+def _job_stop_tx():
+    stop_tx()
+    _sap_refresh()
+    return {"tx": "stopped"}
+
+@app.post("/restart")
+def restart_both():
+    return _job_response("restart", _job_restart, key="*")
+
+@app.post("/start/tx")
+def start_tx_only():
+    return _job_response("start-tx", _job_start_tx, key="tx")
+
+def _rx_target(channel):
+    """Channel a start/stop route acts on: the prefixed one, main when unprefixed, None (all) with ?all=1."""
+    if channel is None and request.args.get("all") in ("1", "true", "yes"):
+        return None
+    return channel or DEFAULT_CHANNEL
+
+@app.post("/start/rx")
+@app.post("/ch/<channel>/start/rx")
+def start_rx_only(channel=None):
+    channel = _rx_target(channel)
+    return _job_response("start-rx", lambda: _job_start_rx(channel), key=f"rx:{channel}" if channel else "rx",
+                         channel=channel)
 
 @app.post("/stop/tx")
 def stop_tx_only():
-    stop_tx(); return jsonify({"ok": True, "tx": "stopped"})
+    return _job_response("stop-tx", _job_stop_tx, key="tx")
 
 @app.post("/stop/rx")
-def stop_rx_only():
-    stop_rx_internal(); return jsonify({"ok": True, "rx": "stopped"})
+@app.post("/ch/<channel>/stop/rx")
+def stop_rx_only(channel=None):
+    channel = _rx_target(channel)
+    return _job_response("stop-rx", lambda: _job_stop_rx(channel), key=f"rx:{channel}" if channel else "rx",
+                         channel=channel)
+
+@app.get("/jobs")
+def jobs_list():
+    """Queued/running jobs and the last finished ones."""
+    return jsonify(_sanitize(jobs.snapshot()))
+
+@app.get("/jobs/<job_id>")
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "unknown job"}), 404
+    return jsonify(_sanitize(job))
 
 @app.post("/restart/backend")
 def restart_backend():
@@ -124,54 +244,728 @@ def restart_backend():
             time.sleep(0.5)
         except Exception:
             pass
+        try:
+            flush_config()  # os._exit skips atexit handlers
+        except Exception:
+            pass
         os._exit(0)
 
     threading.Thread(target=_do_exit, daemon=True).start()
     return jsonify({"ok": True, "backend": "restarting"})
 
+@app.get("/tx/stats")
+def tx_stats_route():
+    return jsonify(_sanitize(tx_stats()))
+
 @app.get("/rx/metrics")
-def rx_metrics():
-    if rx_worker is not None:
-        m = rx_worker.metrics_snapshot()
-        m["mix_level_db"] = getattr(rx_worker, "mix_level_db", None)
+@app.get("/ch/<channel>/rx/metrics")
+def rx_metrics(channel=None):
+    worker = _rx(channel)
+    if worker is not None:
+        m = worker.metrics_snapshot()
+        m["mix_level_db"] = getattr(worker, "mix_level_db", None)
+        m["mix_peak_db"] = getattr(worker, "mix_peak_db", None)
         return jsonify(_sanitize(m))
+    if channel not in (None, DEFAULT_CHANNEL):
+        return jsonify({"channel": channel, "receiving": False, "packets_total": 0})
     return jsonify(_sanitize(rxmon.read_stats()))
 
 @app.get("/rx/peers")
-def rx_peers():
-    if rx_worker is None:
+@app.get("/ch/<channel>/rx/peers")
+def rx_peers(channel=None):
+    worker = _rx(channel)
+    if worker is None:
         return jsonify({"peers": [], "mix_level_db": None})
     return jsonify(_sanitize({
-        "peers": rx_worker.peers_snapshot(),
-        "mix_level_db": getattr(rx_worker, "mix_level_db", None)
+        "peers": worker.peers_snapshot(),
+        "mix_level_db": getattr(worker, "mix_level_db", None),
+        "mix_peak_db": getattr(worker, "mix_peak_db", None),
     }))
 
+@app.get("/rx/talk")
+@app.get("/ch/<channel>/rx/talk")
+def rx_talk(channel=None):
+    """Talk-state changes from the voice gate after ?since=<seq> (also pushed as "talk" SSE events)."""
+    try:
+        since = int(request.args.get("since", 0))
+    except ValueError:
+        return jsonify({"ok": False, "error": "since must be an integer"}), 400
+    worker = _rx(channel)
+    if worker is None:
+        return jsonify({"events": [], "seq": 0, "talking": []})
+    events, seq = worker.talk_events_since(since)
+    talking = [p["ssrc"] for p in worker.peers_snapshot() if p.get("talking")]
+    return jsonify({"events": events, "seq": seq, "talking": talking})
+
+@app.get("/rx/mix-minus")
+@app.get("/ch/<channel>/rx/mix-minus")
+def rx_mix_minus(channel=None):
+    """Running mix-minus outputs and which excluded talkers are currently being subtracted."""
+    worker = _rx(channel)
+    return jsonify({"outputs": worker.mix_minus_snapshot() if worker is not None else []})
+
+# ---------- Live telemetry (SSE) ----------
+def _round(v, nd):
+    return round(v, nd) if isinstance(v, float) else v
+
+def _telemetry_state():
+    """Everything the UI polls, in one dict; rounded so unchanged values don't produce deltas."""
+    worker = _rx()
+    if worker is not None:
+        m = worker.metrics_snapshot()
+        peers = worker.peers_snapshot()
+        mix = getattr(worker, "mix_level_db", None)
+    else:
+        m = rxmon.read_stats()
+        peers = []
+        mix = None
+    m["pps_recent"] = _round(m.get("pps_recent"), 1)
+    m["bps_recent"] = _round(m.get("bps_recent"), 0)
+    return _sanitize({
+        "metrics": m,
+        "peers": {str(p["ssrc"]): p for p in peers},
+        "mix_level_db": _round(mix, 1),
+        "mic_db": _round(micmon.get_level(), 1),
+        "tx_running": tx_running(),
+        "rx_running": worker is not None,
+        "tx": {k: _round(v, 1) for k, v in tx_stats().items()},
+        "channels": _channel_summaries(),
+    })
+
+telemetry = TelemetryHub(_telemetry_state)
+
+@app.get("/events")
+def events():
+    """Server-Sent Events: one "snapshot", then "delta" events every ?interval= ms (100..5000)."""
+    try:
+        sub = telemetry.subscribe(request.args.get("interval", 500))
+    except RuntimeError as e:
+        return jsonify({"ok": False, "error": str(e)}), 503
+
+    def _stream():
+        try:
+            yield b"retry: 2000\n\n"
+            while True:
+                try:
+                    yield sub.get(timeout=15)
+                except queue.Empty:
+                    yield b": ping\n\n"  # keeps proxies open and detects closed clients
+        finally:
+            telemetry.unsubscribe(sub)
+
+    resp = Response(_stream(), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-store"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+# ---------- Prometheus metrics ----------
+@app.before_request
+def _metrics_start_timer():
+    g.t0 = time.perf_counter()
+
+@app.after_request
+def _metrics_observe(resp):
+    t0 = getattr(g, "t0", None)
+    if t0 is not None:
+        # route template, not the raw path, keeps label cardinality bounded
+        rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        HTTP_LATENCY.observe(time.perf_counter() - t0, method=request.method, endpoint=rule,
+                             status=str(resp.status_code))
+    return resp
+
+def _collect_metrics():
+    """Scrape-time families built from the same snapshots the JSON endpoints use; RX series carry a channel label."""
+    workers = dict(rx_workers)
+    fam = []
+    def add(name, kind, help_text, samples):
+        fam.append((name, kind, help_text, samples))
+
+    snaps = {name: w.metrics_snapshot() for name, w in workers.items()}
+    if not snaps:
+        snaps = {DEFAULT_CHANNEL: rxmon.read_stats()}
+    def each(fn):
+        return [({"channel": name}, fn(name, m)) for name, m in snaps.items()]
+    add("aes67_rx_running", "gauge", "RX mixer pipeline is running.", each(lambda n, m: n in workers))
+    add("aes67_rx_receiving", "gauge", "RTP packets seen in the last 2.5 s.", each(lambda n, m: bool(m.get("receiving"))))
+    add("aes67_rx_packets_total", "counter", "RTP packets received.", each(lambda n, m: m.get("packets_total") or 0))
+    add("aes67_rx_bytes_total", "counter", "RTP bytes received (headers included).",
+        each(lambda n, m: m.get("bytes_total") or 0))
+    add("aes67_rx_packets_per_second", "gauge", "Packet rate over the last 2 s.", each(lambda n, m: m.get("pps_recent")))
+    add("aes67_rx_bytes_per_second", "gauge", "Byte rate over the last 2 s.", each(lambda n, m: m.get("bps_recent")))
+    add("aes67_rx_interarrival_seconds", "gauge", "Packet inter-arrival percentiles over the last 2 s.",
+        [({"channel": n, "quantile": q}, _ms_to_s(m.get(k))) for n, m in snaps.items()
+         for q, k in (("0.5", "iat_p50_ms"), ("0.99", "iat_p99_ms"))])
+    if workers:
+        add("aes67_rx_talkers_reaped_total", "counter", "Idle talker branches released.",
+            [({"channel": n}, snaps[n].get("talkers_reaped") or 0) for n in workers])
+        add("aes67_rx_mix_level_dbfs", "gauge", "Mix RMS level.",
+            [({"channel": n}, getattr(w, "mix_level_db", None)) for n, w in workers.items()])
+        add("aes67_rx_mix_peak_dbfs", "gauge", "Mix peak level over the last meter period.",
+            [({"channel": n}, getattr(w, "mix_peak_db", None)) for n, w in workers.items()])
+        peers = {n: w.peers_snapshot() for n, w in workers.items()}
+        add("aes67_rx_talkers", "gauge", "Talkers with a live mixer branch.",
+            [({"channel": n}, len(ps)) for n, ps in peers.items()])
+        add("aes67_rx_talkers_talking", "gauge", "Talkers whose voice gate is open.",
+            [({"channel": n}, snaps[n].get("talking") or 0) for n in workers])
+        per = {
+            "packets": ("aes67_rx_talker_packets_total", "counter", "RTP packets received per talker."),
+            # RFC 3550 "lost" is expected - received: late duplicates push it back down, so not a counter
+            "lost": ("aes67_rx_talker_lost_packets", "gauge",
+                     "RFC 3550 cumulative packets lost per talker (can decrease; may be negative)."),
+            "late": ("aes67_rx_talker_late_packets_total", "counter", "Packets dropped by the jitterbuffer as late."),
+            "jb_lost": ("aes67_rx_talker_jitterbuffer_lost_total", "counter", "Packets the jitterbuffer gave up on."),
+            "duplicates": ("aes67_rx_talker_duplicate_packets_total", "counter", "Duplicate packets per talker."),
+            "level_db": ("aes67_rx_talker_level_dbfs", "gauge", "Talker RMS level."),
+            "peak_db": ("aes67_rx_talker_peak_dbfs", "gauge", "Talker peak level over the last meter period."),
+            "last_seen_sec": ("aes67_rx_talker_idle_seconds", "gauge", "Seconds since the talker's last packet."),
+            "talking": ("aes67_rx_talker_talking", "gauge", "Voice gate open for the talker (rx_vad only)."),
+            "drift_ppm": ("aes67_rx_talker_clock_drift_ppm", "gauge", "Estimated talker clock skew (+ = fast)."),
+            "drift_comp_ppm": ("aes67_rx_talker_drift_compensation_ppm", "gauge",
+                               "Rate correction applied by the talker's resampler."),
+        }
+        def talker(n, p):
+            return {"channel": n, "ssrc": p["ssrc"], "name": p["name"] or ""}
+        for key, (name, kind, help_text) in per.items():
+            add(name, kind, help_text, [(talker(n, p), p.get(key))
+                                       for n, ps in peers.items() for p in ps if p.get(key) is not None])
+        add("aes67_rx_talker_jitter_seconds", "gauge", "RFC 3550 interarrival jitter per talker.",
+            [(talker(n, p), _ms_to_s(p["jitter_ms"]))
+             for n, ps in peers.items() for p in ps if p.get("jitter_ms") is not None])
+
+    add("aes67_rx_history_bytes", "gauge", "Memory preallocated for the metrics history.",
+        [({"channel": n}, b) for n, b in history.nbytes().items()])
+
+    t = tx_stats()
+    add("aes67_tx_running", "gauge", "TX sender is playing.", [({}, t.get("state") == "playing")])
+    add("aes67_tx_packets_total", "counter", "RTP packets sent.", [({}, t.get("packets_sent") or 0)])
+    add("aes67_tx_capture_xruns_total", "counter", "Capture overruns reported by the mic source.",
+        [({}, t.get("capture_xruns") or 0)])
+    add("aes67_tx_packets_per_second", "gauge", "Send rate over the last 2 s.", [({}, t.get("pps_recent"))])
+    add("aes67_tx_queue_fill_ratio", "gauge", "Send queue fill.",
+        [({}, (t["queue_fill_pct"] / 100.0) if t.get("queue_fill_pct") is not None else None)])
+
+    add("aes67_mic_monitor_running", "gauge", "Local mic monitor is running.", [({}, micmon.is_running())])
+    add("aes67_mic_level_dbfs", "gauge", "Mic monitor RMS level.", [({}, micmon.get_level())])
+    ml = gst_runtime.snapshot()
+    add("aes67_mainloop_bus_watches", "gauge", "Pipeline buses watched by the shared GLib main loop.",
+        [({}, ml["watches"])])
+    add("aes67_mainloop_timers", "gauge", "Periodic main-loop timers (stats polling).", [({}, ml["timers"])])
+    add("aes67_mainloop_messages_total", "counter", "Bus messages dispatched by the main loop.",
+        [({}, ml["messages"])])
+    add("aes67_mainloop_callback_max_seconds", "gauge", "Slowest main-loop callback since start.",
+        [({}, ml["max_callback_ms"] / 1000.0)])
+    ss = sap.snapshot()
+    add("aes67_sap_listening", "gauge", "SAP listener is running.", [({}, ss["listening"])])
+    add("aes67_sap_sessions", "gauge", "Streams in the SAP index, by whether RX can take their format.",
+        [({"usable": u}, sum(1 for s in ss["sessions"] if s["usable"] == (u == "true"))) for u in ("true", "false")])
+    add("aes67_sap_announcements", "gauge", "Our streams being announced.", [({}, ss["announcing"])])
+    add("aes67_sap_packets_received_total", "counter", "SAP packets received.", [({}, ss["stats"]["received"])])
+    add("aes67_telemetry_subscribers", "gauge", "Open /events streams.", [({}, telemetry.subscriber_count())])
+    hubs = dict(lives)
+    add("aes67_live_listeners", "gauge", "Open /listen streams.",
+        [({"channel": n}, h.listener_count()) for n, h in hubs.items()])
+    add("aes67_live_chunks_dropped_total", "counter", "Live audio chunks dropped for slow listeners.",
+        [({"channel": n}, h.stats["dropped"]) for n, h in hubs.items()])
+    return fam
+
+def _ms_to_s(v):
+    return v / 1000.0 if isinstance(v, (int, float)) else None
+
+REGISTRY.add_collector(_collect_metrics)
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition of RX/TX/mic state plus HTTP, bus and state-change histograms."""
+    resp = Response(REGISTRY.render(), mimetype="text/plain")
+    resp.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+# ---------- Live listening ----------
+lives = {}  # channel name -> LiveStreamHub
+
+def _live(channel):
+    """The channel's listener hub; its tap runs only while someone listens."""
+    hub = lives.get(channel)
+    if hub is None:
+        def _set_live_active(active):
+            worker = rx_workers.get(channel)
+            if worker is not None:
+                try:
+                    worker.set_live_tap(hub.push if active else None)
+                except Exception as e:
+                    print("live tap update failed:", e)
+        hub = lives.setdefault(channel, LiveStreamHub(_set_live_active))
+    return hub
+
+@app.get("/listen")
+@app.get("/ch/<channel>/listen")
+def listen(channel=None):
+    """Live mix as an endless 48 kHz WAV stream (play it with an <audio> element)."""
+    channel = channel or DEFAULT_CHANNEL
+    if _rx(channel) is None:
+        return jsonify({"ok": False, "error": "RX not running"}), 409
+    live = _live(channel)
+    try:
+        sub = live.subscribe()
+    except RuntimeError as e:
+        return jsonify({"ok": False, "error": str(e)}), 503
+
+    def _stream():
+        try:
+            yield live.header()
+            while True:
+                try:
+                    yield sub.get(timeout=live.KEEPALIVE_SEC)
+                except queue.Empty:
+                    if _rx(channel) is None:
+                        return  # RX stopped; end the stream
+                    # nothing queued (silent or stalled mix): writing is the only way to notice a gone client
+                    yield live.silence()
+        finally:
+            live.unsubscribe(sub)
+
+    resp = Response(_stream(), mimetype="audio/wav")
+    resp.headers["Cache-Control"] = "no-store"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
+# ---------- Latency probe ----------
+probe = None  # LatencyProbe while measuring
+probe_channel = DEFAULT_CHANNEL  # channel whose mix the probe listens to
+
+@app.post("/probe/latency/start")
+def latency_probe_start():
+    """
+    Replace the TX audio with ticks every ?interval_ms (250..5000, default 1000) and time
+    them through the local RX mix of ?channel (default main). Needs TX and RX running on
+    the same group/port. Runs as a job on the sender and the channel's receiver.
+    """
+    body = request.get_json(silent=True) or {}
+    channel = body.get("channel") or request.args.get("channel") or DEFAULT_CHANNEL
+    if _rx(channel) is None or not tx_running():
+        return jsonify({"ok": False, "error": "Start RX and TX first"}), 409
+    try:
+        interval = max(250, min(5000, int(body.get("interval_ms") or request.args.get("interval_ms") or 1000)))
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "interval_ms must be a number"}), 400
+    return _job_response("probe-start", lambda: _job_probe_start(channel, interval),
+                         key=_probe_key(channel, probe_channel), channel=channel)
+
+@app.post("/probe/latency/stop")
+def latency_probe_stop():
+    """Restore the configured TX source; the last results stay readable."""
+    return _job_response("probe-stop", _job_probe_stop, key=_probe_key(probe_channel), channel=probe_channel)
+
+def _probe_key(*channels):
+    # the probe swaps the sender's source and taps receivers: one key naming all of them
+    return "+".join(["tx"] + sorted({f"rx:{c}" for c in channels}))
+
+def _job_probe_start(channel, interval):
+    global probe, probe_channel
+    cfg = load_config()
+    worker = _rx(channel)
+    if worker is None or not tx_running():
+        raise JobError("Start RX and TX first")
+    p = LatencyProbe(interval / 1000.0, channels=worker.fmt["channels"])
+    try:
+        switched = set_tx_probe(p, cfg)
+    except Exception:
+        set_tx_probe(None, cfg)
+        raise
+    if not switched:
+        set_tx_probe(None, cfg)
+        raise JobError("TX could not switch to probe ticks")
+    old, probe = probe, p
+    old_worker = _rx(probe_channel)
+    if old_worker is not None:
+        old_worker.set_probe_tap(None)  # a running probe's tap feeds the old object
+    probe_channel = channel
+    worker.set_probe_tap(p.feed)
+    return {"probe": _probe_state(), "replaced": old is not None}
+
+def _job_probe_stop():
+    p = probe
+    if p is None:
+        return {"probe": _probe_state()}
+    try:
+        set_tx_probe(None, load_config())
+    except Exception as e:
+        print("latency probe: restoring TX source failed:", e)
+    worker = _rx(probe_channel)
+    if worker is not None:
+        worker.set_probe_tap(None)
+    p.running = False
+    return {"probe": _probe_state()}
+
+def _probe_state():
+    p = probe
+    if p is None:
+        return {"running": False}
+    s = p.snapshot()
+    # the settings the numbers were measured with, so runs can be compared
+    full = load_config()
+    cfg = channel_configs(full).get(probe_channel) or full
+    s["channel"] = probe_channel
+    s["settings"] = {
+        "format": _rx_format(cfg), "jb": _jb_params(cfg), "sink": _sink_mode(cfg),
+        "loopback": (cfg["rx_multicast"], int(cfg["rx_port"])) in tx_destinations(full),
+    }
+    return s
+
+@app.get("/probe/latency")
+def latency_probe_status():
+    """min/median/p99 (ms) of TX tick -> RX mix latency, plus counts and the last 20 values."""
+    return jsonify(_sanitize(_probe_state()))
+
 # ---------- helpers ----------
-def start_rx_internal(cfg):
-    global rx_worker
-    stop_rx_internal()
-    sink_mode = (cfg.get("rx_sink") or {}).get("mode","file")
-    outpath = Path(__file__).with_name((cfg.get("rx_sink") or {}).get("path","mix.wav"))
+_tx_changes = {}  # TX keys changed since the pending apply-tx-config job was queued
+_tx_changes_lock = threading.Lock()
+
+def _on_tx_config(changed, cfg):
+    """Queue applying frequency/source/SSRC/format edits to a running sender (coalesced)."""
+    with _tx_changes_lock:
+        _tx_changes.update(changed)
+    jobs.submit("apply-tx-config", _job_apply_tx_config, coalesce_running=False, internal=True)
+
+def _job_apply_tx_config():
+    with _tx_changes_lock:
+        changed = dict(_tx_changes)
+        _tx_changes.clear()
+    if not changed or not tx_running():
+        return {"applied": False}
+    if "tx_source" in changed or "tx_mic_device" in changed:
+        _release_mic()  # release the capture device for the new source
+    apply_tx_config(changed, load_config())
+    _sap_refresh()
+    return {"applied": True, "keys": sorted(changed)}
+
+config_subscribe(TX_LIVE_KEYS + TX_FORMAT_KEYS + TX_DEST_KEYS, _on_tx_config)
+
+# RX settings the running pipeline can take without a rebuild (see RxPartylineWorker.reconfigure)
+RX_LIVE_KEYS = ("rx_multicast", "rx_port", "rx_sink", "rx_iface", "ssrc_names", "rx_idle_timeout_sec",
+                "rx_ring_minutes", "rx_ring_talker_minutes", "rx_jb_mode", "rx_jb_latency_ms",
+                "rx_jb_min_ms", "rx_jb_max_ms", "rx_vad", "rx_vad_threshold_db", "rx_vad_hangover_ms",
+                "rx_mix_minus", "tx_ssrc", "channels", "rx_sdp_caps", "rx_drift_comp", "rx_drift_max_ppm",
+                "rx_meter_hz", *TX_FORMAT_KEYS)  # format keys force a rebuild; tx_ssrc is "self" in mix-minus
+
+# rx_sink keys only the "segments" recorder uses
+SEGMENT_OPTS = ("segment_sec", "max_segment_mb", "retention_hours", "retention_mb")
+
+def _minutes(cfg, key):
+    try:
+        return max(0.0, float(cfg.get(key) or 0))
+    except Exception:
+        return 0.0
+
+def _jb_params(cfg):
+    """Jitterbuffer settings for RxPartylineWorker (see JB_DEFAULTS there)."""
+    def ms(key, default, lo=0, hi=2000):
+        try:
+            return max(lo, min(hi, int(cfg.get(key, default))))
+        except Exception:
+            return default
+    lo = ms("rx_jb_min_ms", 10)
+    return {
+        "mode": "adaptive" if cfg.get("rx_jb_mode") == "adaptive" else "fixed",
+        "latency_ms": ms("rx_jb_latency_ms", 100),
+        "min_ms": lo,
+        "max_ms": ms("rx_jb_max_ms", 200, lo=lo),
+    }
+
+def _vad_params(cfg):
+    """Voice gate settings for RxPartylineWorker (see VAD_DEFAULTS there)."""
+    try:
+        th = max(-90.0, min(0.0, float(cfg.get("rx_vad_threshold_db", -45))))
+    except Exception:
+        th = -45.0
+    try:
+        hang = max(0, min(5000, int(cfg.get("rx_vad_hangover_ms", 300))))
+    except Exception:
+        hang = 300
+    return {"enabled": bool(cfg.get("rx_vad")), "threshold_db": th, "hangover_ms": hang}
+
+def _meter_hz(cfg):
+    try:
+        return max(1.0, min(50.0, float(cfg.get("rx_meter_hz", 20))))
+    except Exception:
+        return 20.0
+
+def _drift_params(cfg):
+    """Clock-drift compensation settings for RxPartylineWorker (see DRIFT_DEFAULTS there)."""
+    try:
+        lim = max(1.0, min(2000.0, float(cfg.get("rx_drift_max_ppm", 200))))
+    except Exception:
+        lim = 200.0
+    return {"enabled": bool(cfg.get("rx_drift_comp", True)), "max_ppm": lim}
+
+def _mix_minus_params(cfg):
+    """
+    rx_mix_minus entries with exclusions resolved to SSRCs: "self" is our tx_ssrc, other
+    strings are SSRCs or names from ssrc_names. Sink paths are relative to backend/.
+    """
+    by_name = {str(v): k for k, v in (cfg.get("ssrc_names") or {}).items()}
+    out = []
+    for o in cfg.get("rx_mix_minus") or []:
+        if not isinstance(o, dict) or not o.get("name"):
+            continue
+        exclude = []
+        for x in o.get("exclude") or []:
+            if x == "self":
+                x = cfg.get("tx_ssrc") or 12345678
+            x = by_name.get(str(x), x)
+            try:
+                exclude.append(int(x))
+            except (TypeError, ValueError):
+                print(f"WARN: mix-minus {o['name']}: unknown talker {x!r}")
+        o = dict(o, exclude=exclude)
+        sink = dict(o.get("sink") or {})
+        if o.get("output") != "rtp" and sink.get("mode", "auto") != "auto":
+            default = f"recordings-{o['name']}" if sink.get("mode") == "segments" else f"mix-{o['name']}.wav"
+            sink["path"] = str(Path(__file__).parent / (sink.get("path") or default))
+            o["sink"] = sink
+        out.append(o)
+    return out
+
+def _rx_format(cfg):
+    """
+    The format announced (SAP/SDP) for the channel's group:port when rx_sdp_caps is on,
+    else the configured one, so RX caps are right before the first packet arrives.
+    """
+    if cfg.get("rx_sdp_caps", True):
+        s = sap.lookup(cfg["rx_multicast"], cfg["rx_port"])
+        if s is not None:
+            return s["format"]
+    return stream_format(cfg)
+
+def _sink_mode(cfg):
+    """The channel's rx_sink mode; an entry without one gets the default (segments)."""
+    return (cfg.get("rx_sink") or {}).get("mode") or DEFAULT_CFG["rx_sink"]["mode"]
+
+def _rx_params(cfg):
+    """Keyword arguments for RxPartylineWorker() / reconfigure() from the config."""
+    sink = cfg.get("rx_sink") or {}
+    sink_mode = _sink_mode(cfg)
+    default_path = "recordings" if sink_mode == "segments" else "mix.wav"
+    outpath = Path(__file__).parent / (sink.get("path") or default_path)
+    sink_opts = {k: sink[k] for k in SEGMENT_OPTS if k in sink} if sink_mode == "segments" else {}
     ssrc_names = cfg.get("ssrc_names") or {}
     iface = cfg.get("rx_iface")  # Optional: e.g. "eth0"; None/empty means default
-    rx_worker = RxPartylineWorker(cfg["rx_multicast"], cfg["rx_port"], sink_mode, outpath, ssrc_names, iface)
-    rx_worker.start()
-
-def stop_rx_internal():
-    global rx_worker
-    # Detach first so /status reflects stopped immediately
-    worker = rx_worker
-    rx_worker = None
     try:
-        rxmon.stop()
+        idle = max(0.0, float(cfg.get("rx_idle_timeout_sec") or 0))
     except Exception:
-        pass
-    if worker:
+        idle = 30.0
+    return dict(group=cfg["rx_multicast"], port=cfg["rx_port"], sink_mode=sink_mode, sink_path=outpath,
+                ssrc_names=ssrc_names, iface=iface, idle_timeout=idle, sink_opts=sink_opts,
+                ring_minutes=_minutes(cfg, "rx_ring_minutes"),
+                ring_talker_minutes=_minutes(cfg, "rx_ring_talker_minutes"),
+                fmt=_rx_format(cfg), jb=_jb_params(cfg), mix_minus=_mix_minus_params(cfg),
+                vad=_vad_params(cfg), drift=_drift_params(cfg), meter_hz=_meter_hz(cfg))
+
+_rx_lock = threading.RLock()
+_configured_channels = set(channel_configs(load_config()))  # as of the last applied config
+
+def start_rx_internal(cfg, rebuild=False, channel=None):
+    """
+    Start RX for one channel (or every configured channel), or apply cfg to running
+    pipelines unless a rebuild is forced/required. All channels are tried; the first
+    failure is raised afterwards.
+    """
+    chans = channel_configs(cfg)
+    first_err = None
+    with _rx_lock:
+        for name in ([channel] if channel else list(chans)):
+            try:
+                _start_channel(name, chans[name], rebuild)
+            except Exception as e:
+                print(f"RX[{name}] start failed:", e)
+                first_err = first_err or e
+    if first_err is not None:
+        raise first_err
+
+def _start_channel(name, ccfg, rebuild):
+    worker = rx_workers.get(name)
+    if worker is not None and not rebuild:
+        try:
+            if worker.reconfigure(**_rx_params(ccfg)):
+                return
+        except Exception:
+            print(f"RX[{name}] live reconfigure failed, rebuilding:\n" + traceback.format_exc())
+    stop_rx_internal(name)
+    worker = RxPartylineWorker(**_rx_params(ccfg), channel=name)
+    worker.on_talk = lambda ev, ch=name: telemetry.broadcast("talk", dict(ev, channel=ch))
+    hub = _live(name)
+    hub.set_format(worker.fmt["channels"])
+    # publish first: a listener arriving from now on finds this worker, and resync()
+    # covers the ones that arrived before (taps are idempotent and serialised)
+    rx_workers[name] = worker
+    hub.resync()
+    if probe is not None and probe.running and probe_channel == name:
+        worker.set_probe_tap(probe.feed)
+    worker.start()
+
+def _on_rx_config(changed, cfg):
+    jobs.submit("apply-rx-config", _job_apply_rx_config, coalesce_running=False, internal=True)
+
+def _job_apply_rx_config():
+    """Reconfigure running channels, stop removed ones, and start channels added while RX runs."""
+    global _configured_channels
+    cfg = load_config()
+    chans = set(channel_configs(cfg))
+    added, _configured_channels = chans - _configured_channels, chans
+    with _rx_lock:
+        if not rx_workers:
+            return
+        for name in [n for n in rx_workers if n not in chans]:
+            stop_rx_internal(name)
+        for name in sorted((set(rx_workers) | added) & chans):
+            try:
+                start_rx_internal(cfg, channel=name)
+            except Exception as e:
+                print(f"RX[{name}] config update failed:", e)
+
+config_subscribe(RX_LIVE_KEYS, _on_rx_config)
+
+def stop_rx_internal(channel=None):
+    """Stop one channel's RX, or all of them."""
+    with _rx_lock:
+        # Detach first so /status reflects stopped immediately
+        names = [channel] if channel else list(rx_workers)
+        workers = [rx_workers.pop(n) for n in names if n in rx_workers]
+    if channel in (None, DEFAULT_CHANNEL):
+        try:
+            rxmon.stop()
+        except Exception:
+            pass
+    for worker in workers:
         try:
             worker.stop()
         except Exception:
             pass
 
+# ---------- SAP / SDP ----------
+SAP_KEYS = ("sap_listen", "sap_announce", "sap_interval_sec", "sap_min_timeout_sec", "rx_iface", "tx_iface",
+            "tx_name", "tx_ssrc")
+_sap_versions = {}  # sess-id -> (description without version, o= version) of our announcements
+
+def _num(cfg, key, default, lo):
+    try:
+        return max(lo, float(cfg.get(key, default)))
+    except Exception:
+        return default
+
+def _sap_refresh(*_):
+    """(Re)start or stop the SAP service per config and announce one session per TX destination while TX runs."""
+    cfg = load_config()
+    interval = _num(cfg, "sap_interval_sec", 30, 1.0)
+    min_timeout = _num(cfg, "sap_min_timeout_sec", 3600, 0.0)
+    if not (cfg.get("sap_listen", True) or cfg.get("sap_announce", True)):
+        sap.stop()
+        return
+    iface = cfg.get("rx_iface") or cfg.get("tx_iface") or None
+    listen = bool(cfg.get("sap_listen", True))
+    if not sap.is_running() or sap.iface != iface:
+        sap.start(iface=iface, interval_sec=interval, min_timeout_sec=min_timeout, listen=listen)
+    else:
+        sap.configure(interval, min_timeout, listen)
+    origin = local_addr(cfg.get("tx_iface"))
+    sdps = []
+    if cfg.get("sap_announce", True) and tx_running():
+        fmt = stream_format(cfg)
+        dests = tx_destinations(cfg)
+        name = cfg.get("tx_name") or f"SSRC {cfg.get('tx_ssrc')}"
+        for host, port in dests:
+            sess_id = zlib.crc32(f"{cfg.get('tx_ssrc')} {host}:{port}".encode())
+            label = name if len(dests) == 1 else f"{name} ({host}:{port})"
+            body = make_sdp(label, sess_id, origin, host, port, fmt, version=0)
+            prev = _sap_versions.get(sess_id)
+            version = prev[1] if prev and prev[0] == body else int(time.time())  # bumped when the description changes
+            _sap_versions[sess_id] = (body, version)
+            sdps.append(make_sdp(label, sess_id, origin, host, port, fmt, version=version))
+    sap.set_announcements(sdps, origin)
+
+def _on_sap_change(session, event):
+    """A stream one of our channels receives was announced, changed or withdrawn: re-derive RX caps."""
+    cfg = load_config()
+    if not rx_workers or not cfg.get("rx_sdp_caps", True):
+        return
+    for c in channel_configs(cfg).values():
+        if (c["rx_multicast"], int(c["rx_port"])) == (session["group"], session["port"]):
+            jobs.submit("apply-rx-config", _job_apply_rx_config, coalesce_running=False, internal=True)
+            return
+
+sap.on_change = _on_sap_change
+config_subscribe(SAP_KEYS, _sap_refresh)
+_sap_refresh()
+
+@app.get("/sap")
+def sap_sessions():
+    """Streams announced on the network (with their RX format, or why we cannot receive them) and ours."""
+    return jsonify(_sanitize(sap.snapshot()))
+
+@app.get("/sap/<sid>/sdp")
+def sap_session_sdp(sid):
+    sdp = sap.sdp(sid)
+    if sdp is None:
+        return jsonify({"ok": False, "error": f"unknown session: {sid}"}), 404
+    return Response(sdp, mimetype="application/sdp")
+
+# ---------- Metrics history ----------
+HISTORY_KEYS = ("rx_history_hours", "channels")
+HISTORY_MAX_POINTS = 5000
+
+def _history_sample():
+    """What HistoryRecorder stores every 100 ms, for each channel receiving right now."""
+    out = {}
+    for name, w in list(rx_workers.items()):
+        out[name] = (w.metrics_snapshot(), getattr(w, "mix_level_db", None), w.peers_snapshot())
+    if DEFAULT_CHANNEL not in out and rxmon.thread is not None and rxmon.thread.is_alive():
+        out[DEFAULT_CHANNEL] = (rxmon.read_stats(), None, [])
+    return out
+
+history = HistoryRecorder(_history_sample, hours=0)
+
+def _history_refresh(*_):
+    cfg = load_config()
+    history.configure(_num(cfg, "rx_history_hours", 24, 0.0))
+    history.retain(channel_configs(cfg))
+
+config_subscribe(HISTORY_KEYS, _history_refresh)
+_history_refresh()
+
+@app.get("/rx/history")
+@app.get("/ch/<channel>/rx/history")
+def rx_history(channel=None):
+    """
+    Recorded metrics over ?start=&end= (unix seconds; <= 0 is relative to now, default the
+    last hour) as ?points= min/max/mean buckets (default 500). ?series= and ?ssrc= take
+    comma-separated filters.
+    """
+    now = time.time()
+    try:
+        def when(key, default):
+            v = float(request.args.get(key, default))
+            if not math.isfinite(v):
+                raise ValueError(key)  # nan/inf pass every comparison below but cannot be binned
+            return now + v if v <= 0 else v
+        end = when("end", 0)
+        start = when("start", end - 3600)
+        points = max(1, min(HISTORY_MAX_POINTS, int(request.args.get("points", 500))))
+        ssrcs = {int(x) for x in request.args.get("ssrc", "").split(",") if x.strip()}
+    except ValueError:
+        return jsonify({"ok": False, "error": "start/end must be numbers, points and ssrc integers"}), 400
+    if end <= start:
+        return jsonify({"ok": False, "error": "end must be after start"}), 400
+    series = [x.strip() for x in request.args.get("series", "").split(",") if x.strip()]
+    h = history.get(channel or DEFAULT_CHANNEL)
+    if h is None:
+        return jsonify({"recording": False, "start": start, "end": end, "points": points,
+                        "t": [], "series": {}, "talkers": []})
+    out = h.query(start, end, points, series=series, ssrcs=ssrcs)
+    out["recording"] = history.hours > 0
+    out["clock_skew_sec"] = round(history.clock_skew(), 3)
+    return jsonify(_sanitize(out))
+
 # ---------- Static (React) ----------
 @app.route("/", defaults={"path": ""})
 @app.route("/<path:path>")
@@ -184,15 +978,112 @@ def serve_frontend(path):
         return send_from_directory(build_dir, "index.html")
     return jsonify({"ok": True, "api": "running", "hint": "Use CRA dev server with proxy or build the frontend."})
 
+@app.get("/rx/segments")
+@app.get("/ch/<channel>/rx/segments")
+def rx_segments(channel=None):
+    """Index of recorded segments (sink mode "segments")."""
+    rec, live = _segment_recorder(channel)
+    if rec is None:
+        return jsonify({"segments": [], "recording": False})
+    return jsonify({"segments": rec.segments(), "recording": live, "dir": str(rec.dir)})
+
+def _segment_recorder(channel=None):
+    """(recorder, live): the running worker's recorder, else a read-only view of the configured directory."""
+    rec = getattr(_rx(channel), "recorder", None)
+    if rec is not None:
+        return rec, True
+    cfg = channel_configs(load_config())[channel or DEFAULT_CHANNEL]
+    if _sink_mode(cfg) != "segments":
+        return None, False
+    d = _rx_params(cfg)["sink_path"]
+    return (SegmentRecorder.open_index(d), False) if d.is_dir() else (None, False)
+
+def _download_range(rec):
+    """WAV of ?start=&end= (unix seconds) or the last ?minutes= (default 10) from the segment recorder."""
+    now = time.time()
+    try:
+        end = float(request.args.get("end") or now)
+        if request.args.get("start"):
+            start = float(request.args["start"])
+        else:
+            start = end - 60.0 * float(request.args.get("minutes") or 10)
+    except ValueError:
+        return jsonify({"ok": False, "error": "start/end/minutes must be numbers"}), 400
+    if end <= start:
+        return jsonify({"ok": False, "error": "end must be after start"}), 400
+    parts, first, _ = rec.plan_range(start, end)
+    opened, nbytes = rec.open_range(parts)
+    if not nbytes:
+        for f, _off, _ln in opened:
+            f.close()
+        return jsonify({"ok": False, "error": "No recorded audio in that range"}), 404
+
+    def _gen():
+        yield wav_header(nbytes, rec.rate, rec.channels, rec.sampwidth)
+        yield from rec.iter_range(opened)
+
+    name = "mix-" + time.strftime("%Y%m%d-%H%M%S", time.gmtime(first)) + ".wav"
+    resp = Response(_gen(), mimetype="audio/wav")
+    resp.headers["Content-Length"] = str(44 + nbytes)
+    resp.headers["Content-Disposition"] = f'attachment; filename="{name}"'
+    resp.headers["X-Recording-Start"] = f"{first:.3f}"
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+@app.get("/rx/ring")
+@app.get("/ch/<channel>/rx/ring")
+def rx_ring(channel=None):
+    """What the in-memory "last N minutes" rings currently hold."""
+    worker = _rx(channel)
+    if worker is None:
+        return jsonify({"mix": None, "talkers": []})
+    return jsonify(_sanitize(worker.ring_info()))
+
+@app.get("/rx/clip")
+@app.get("/ch/<channel>/rx/clip")
+def rx_clip(channel=None):
+    """
+    WAV of recent audio straight from memory: ?seconds=N (default 30) back from now, or
+    ?start=&end= (unix seconds). ?ssrc= selects a talker's ring instead of the mix.
+    """
+    worker = _rx(channel)
+    if worker is None:
+        return jsonify({"ok": False, "error": "RX not running"}), 409
+    now = time.time()
+    try:
+        end = float(request.args.get("end") or now)
+        start = float(request.args["start"]) if request.args.get("start") else end - float(request.args.get("seconds") or 30)
+        ssrc = int(request.args["ssrc"]) if request.args.get("ssrc") else None
+    except ValueError:
+        return jsonify({"ok": False, "error": "start/end/seconds/ssrc must be numbers"}), 400
+    ring, first, pcm = worker.clip(start, end, ssrc)
+    if ring is None:
+        return jsonify({"ok": False, "error": "ring buffer disabled" if ssrc is None else f"no ring for SSRC {ssrc}"}), 404
+    if not pcm:
+        return jsonify({"ok": False, "error": "No audio in that range"}), 404
+    who = (f"ssrc{ssrc}" if ssrc is not None else "mix") + (f"-{channel}" if channel else "")
+    name = f"clip-{who}-" + time.strftime("%Y%m%d-%H%M%S", time.gmtime(first)) + ".wav"
+    resp = Response(wav_header(len(pcm), ring.rate, ring.channels, ring.sampwidth) + pcm, mimetype="audio/wav")
+    resp.headers["Content-Disposition"] = f'attachment; filename="{name}"'
+    resp.headers["X-Recording-Start"] = f"{first:.3f}"
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
 @app.get("/download/mix")
-def download_mix():
+@app.get("/ch/<channel>/download/mix")
+def download_mix(channel=None):
+    # Segmented recording: export a time range instead of a whole file
+    rec, _live = _segment_recorder(channel)
+    if rec is not None:
+        return _download_range(rec)
     # Prefer the live worker's path; otherwise use configured default
     p = None
+    worker = _rx(channel)
     try:
-        if rx_worker is not None and getattr(rx_worker, "sink_path", None):
-            p = Path(rx_worker.sink_path)
+        if worker is not None and getattr(worker, "sink_path", None):
+            p = Path(worker.sink_path)
         else:
-            cfg = load_config()
+            cfg = channel_configs(load_config())[channel or DEFAULT_CHANNEL]
             p = Path(__file__).with_name((cfg.get("rx_sink") or {}).get("path", "mix.wav"))
         if not p.is_file():
             return jsonify({"ok": False, "error": f"File not found: {p}"}), 404
@@ -252,23 +1143,18 @@ def alsa_devices():
 # ---------- Mic monitor (listen locally + VU) ----------
 @app.post("/monitor/mic/start")
 def mic_monitor_start():
-    try:
-        cfg = load_config()
-        dev = cfg.get("tx_mic_device") or ""
-        ok = micmon.start(dev, with_audio=True)
-        if ok:
-            return jsonify({"ok": True, "monitoring": True})
-        return jsonify({"ok": False, "error": "failed to start monitor"}), 500
-    except Exception as e:
-        return jsonify({"ok": False, "error": str(e)}), 500
+    def _job():
+        if not micmon.start(load_config().get("tx_mic_device") or "", with_audio=True):
+            raise RuntimeError("failed to start monitor")
+        return {"monitoring": True}
+    return _job_response("mic-monitor-start", _job, key="mic-monitor")
 
 @app.post("/monitor/mic/stop")
 def mic_monitor_stop():
-    try:
+    def _job():
         micmon.stop()
-        return jsonify({"ok": True, "monitoring": False})
-    except Exception as e:
-        return jsonify({"ok": False, "error": str(e)}), 500
+        return {"monitoring": False}
+    return _job_response("mic-monitor-stop", _job, key="mic-monitor")
 
 @app.get("/monitor/mic/level")
 def mic_monitor_level():
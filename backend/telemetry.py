@@ -0,0 +1,183 @@
+# backend/telemetry.py
+import json
+import queue
+import threading
+import time
+
+
+def encode_event(event: str, data) -> bytes:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+# Collections whose entries come and go; their deltas list removals explicitly
+KEYED = ("peers", "channels")
+
+
+def diff_state(old: dict, new: dict) -> dict:
+    """
+    Delta between two telemetry states (see TelemetryHub). Nested dicts are diffed one
+    level deep; keyed collections (KEYED) report changed entries plus a
+    "<key>_removed" list.
+    """
+    out = {}
+    for k, v in new.items():
+        ov = old.get(k)
+        if isinstance(v, dict) and isinstance(ov, dict):
+            if k in KEYED:
+                changed = {pk: pv for pk, pv in v.items() if ov.get(pk) != pv}
+                removed = [pk for pk in ov if pk not in v]
+                if changed:
+                    out[k] = changed
+                if removed:
+                    out[k + "_removed"] = removed
+            else:
+                changed = {ck: cv for ck, cv in v.items() if ov.get(ck) != cv}
+                if changed:
+                    out[k] = changed
+        elif ov != v or k not in old:
+            out[k] = v
+    return out
+
+
+class _Subscriber:
+    def __init__(self, group, maxsize):
+        self.group = group
+        self.q = queue.Queue(maxsize=maxsize)
+        self.resync = False
+
+    def get(self, timeout):
+        return self.q.get(timeout=timeout)
+
+
+class TelemetryHub:
+    """
+    Produces live telemetry once and fans it out to SSE subscribers.
+
+    Subscribers are grouped by requested interval (rounded to 100 ms). Each group keeps
+    the last state it published, so a delta is computed and encoded once per group and
+    tick, then queued to every member. A new subscriber first receives the group's
+    current state as a "snapshot" event. Slow clients never block the producer: when a
+    queue is full its backlog is dropped and the client is resynced with a snapshot.
+    """
+    MIN_INTERVAL_MS = 100
+    MAX_INTERVAL_MS = 5000
+    MAX_SUBSCRIBERS = 4   # each stream holds a gunicorn thread; keep some for control calls
+    QUEUE_DEPTH = 16
+
+    def __init__(self, collect):
+        self._collect = collect  # () -> state dict
+        self._lock = threading.Lock()
+        self._groups = {}        # interval_ms -> {"iv", "iv_ms", "subs", "last", "due"}
+        self._thread = None
+        self._wake = threading.Event()
+
+    def _interval(self, interval_ms):
+        try:
+            v = int(interval_ms)
+        except Exception:
+            v = 500
+        v = max(self.MIN_INTERVAL_MS, min(self.MAX_INTERVAL_MS, v))
+        return (v + 50) // 100 * 100
+
+    def subscribe(self, interval_ms=500):
+        """Register a client; raises RuntimeError when the subscriber limit is reached."""
+        iv = self._interval(interval_ms)
+        state = None
+        while True:
+            with self._lock:
+                if sum(len(g["subs"]) for g in self._groups.values()) >= self.MAX_SUBSCRIBERS:
+                    raise RuntimeError("too many telemetry subscribers")
+                g = self._groups.get(iv)
+                if g is None and state is not None:
+                    g = self._groups[iv] = {"iv": iv / 1000.0, "iv_ms": iv, "subs": set(), "last": state,
+                                            "due": time.monotonic() + iv / 1000.0}
+                if g is not None:
+                    sub = _Subscriber(iv, self.QUEUE_DEPTH)
+                    sub.q.put_nowait(encode_event("snapshot", g["last"]))
+                    g["subs"].add(sub)
+                    if not self._thread or not self._thread.is_alive():
+                        self._thread = threading.Thread(target=self._run, daemon=True)
+                        self._thread.start()
+                    break
+            state = self._collect()  # a new group needs a first state; never collect under the lock
+        self._wake.set()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            g = self._groups.get(sub.group)
+            if g is None:
+                return
+            g["subs"].discard(sub)
+            if not g["subs"]:
+                del self._groups[sub.group]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(g["subs"]) for g in self._groups.values())
+
+    def broadcast(self, event: str, data):
+        """Send one named event to every subscriber now, outside the delta ticks (e.g. talk-state changes)."""
+        msg = encode_event(event, data)
+        with self._lock:
+            subs = [sub for g in self._groups.values() for sub in g["subs"]]
+        for sub in subs:
+            try:
+                sub.q.put_nowait(msg)
+            except queue.Full:
+                sub.resync = True
+
+    def _publish(self, g, state):
+        delta = diff_state(g["last"], state)
+        g["last"] = state
+        msg = encode_event("delta", delta) if delta else None
+        snap = None
+        for sub in list(g["subs"]):
+            if sub.resync:
+                while True:
+                    try:
+                        sub.q.get_nowait()
+                    except queue.Empty:
+                        break
+                if snap is None:
+                    snap = encode_event("snapshot", state)
+                sub.q.put_nowait(snap)
+                sub.resync = False
+            elif msg is not None:
+                try:
+                    sub.q.put_nowait(msg)
+                except queue.Full:
+                    sub.resync = True
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._groups:
+                    self._thread = None
+                    return
+                now = time.monotonic()
+                due = [g for g in self._groups.values() if g["due"] <= now]
+                for g in due:
+                    g["due"] += g["iv"]
+                    if g["due"] <= now:  # fell behind; don't burst to catch up
+                        g["due"] = now + g["iv"]
+            if due:
+                # one collection per tick, shared by every group that is due; collected
+                # without the lock so subscribe/unsubscribe/broadcast never wait on it
+                try:
+                    state = self._collect()
+                except Exception as e:
+                    print("telemetry collect failed:", e)
+                    state = None
+                if state is not None:
+                    with self._lock:
+                        for g in due:
+                            if self._groups.get(g["iv_ms"]) is g:
+                                self._publish(g, state)
+            with self._lock:
+                if not self._groups:
+                    continue
+                next_due = min(g["due"] for g in self._groups.values())
+            self._wake.wait(timeout=max(0.0, next_due - time.monotonic()))
+            self._wake.clear()
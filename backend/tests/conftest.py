@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+# The backend modules are flat and import each other by name (as under gunicorn's --chdir)
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,32 @@
+# backend/tests/test_channels.py
+from channels import channel_configs, tx_destinations, validate
+
+MAIN = {"rx_multicast": "239.69.69.69", "rx_port": 5004, "tx_multicast": "239.69.69.69", "tx_port": 5004,
+        "rx_sink": {"mode": "segments", "path": "recordings"}, "channels": []}
+
+
+def test_channel_inherits_and_suffixes_paths():
+    cfg = dict(MAIN, channels=[{"name": "lx", "multicast": "239.69.0.122", "port": 5006}])
+    c = channel_configs(cfg)["lx"]
+    assert (c["rx_multicast"], c["rx_port"], c["tx_multicast"]) == ("239.69.0.122", 5006, "239.69.0.122")
+    assert c["rx_sink"]["path"] == "recordings-lx"
+
+
+def test_validate_names():
+    assert validate("x") == "channels must be a list"
+    assert "bad channel name" in validate([{"name": "no spaces"}])
+    assert "duplicate" in validate([{"name": "main"}])
+    assert validate([{"name": "lx", "multicast": "239.69.0.122"}]) is None
+
+
+def test_validate_rejects_shared_rx_group():
+    assert validate([{"name": "lx"}], MAIN) is not None  # inherits main's group:port
+    assert validate([{"name": "a", "multicast": "239.69.0.1"}, {"name": "b", "multicast": "239.69.0.1"}],
+                    MAIN) is not None
+    assert validate([{"name": "a", "multicast": "239.69.0.1"}, {"name": "b", "multicast": "239.69.0.1",
+                                                                "port": 5006}], MAIN) is None
+
+
+def test_tx_destinations_dedupes():
+    cfg = dict(MAIN, channels=[{"name": "lx", "multicast": "239.69.0.122"}], tx_channels=["main", "lx", "main"])
+    assert tx_destinations(cfg) == [("239.69.69.69", 5004), ("239.69.0.122", 5004)]
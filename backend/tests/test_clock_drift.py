@@ -0,0 +1,91 @@
+# backend/tests/test_clock_drift.py
+import random
+
+from clock_drift import DriftEstimator, RateDither
+
+
+def _feed(est, ppm, seconds, t0=0.0, ts0=0, pkt_sec=0.02, jitter_ms=5.0, seed=1):
+    """Packets from a sender `ppm` fast, each delayed by up to jitter_ms of queueing."""
+    rnd = random.Random(seed)
+    step = int(48000 * pkt_sec)
+    n = int(seconds / pkt_sec)
+    for i in range(n):
+        rtp = (ts0 + i * step) & 0xFFFFFFFF
+        arrival = t0 + i * pkt_sec / (1 + ppm * 1e-6) + rnd.random() * jitter_ms / 1000
+        est.add(arrival, rtp)
+    return t0 + n * pkt_sec / (1 + ppm * 1e-6), (ts0 + n * step) & 0xFFFFFFFF
+
+
+def test_least_squares_fit_recovers_skew_despite_queueing():
+    for ppm in (35.0, -12.0):
+        est = DriftEstimator(48000)
+        _feed(est, ppm, 300)
+        assert abs(est.ppm - ppm) < 1.0
+
+
+def test_first_estimate_needs_min_buckets_and_rtp_wraps():
+    est = DriftEstimator(48000)
+    _feed(est, 20.0, DriftEstimator.BUCKET_SEC * DriftEstimator.MIN_BUCKETS - 1)
+    assert est.ppm is None
+    est = DriftEstimator(48000)
+    _feed(est, 20.0, 120, ts0=0xFFFFFFFF - 48000 * 30)  # wraps after 30 s
+    assert est.resyncs == 0 and abs(est.ppm - 20.0) < 1.0
+
+
+def test_timestamp_jump_beyond_threshold_resyncs():
+    est = DriftEstimator(48000)
+    t, ts = _feed(est, 10.0, 60)
+    assert est.ppm is not None
+    est.add(t + 0.02, ts + int(48000 * (DriftEstimator.RESYNC_SEC + 0.5)))  # sender restarted
+    assert est.resyncs == 1 and est.ppm is not None  # last estimate is kept...
+    assert len(est._buckets) == 0                     # ...but history starts over
+    small = DriftEstimator(48000)
+    t, ts = _feed(small, 10.0, 60)
+    small.add(t + 0.02, ts + int(48000 * (DriftEstimator.RESYNC_SEC / 2)))
+    assert small.resyncs == 0
+
+
+def test_dither_slews_at_most_the_limit():
+    d = RateDither(48000)
+    applied = []
+    for t in range(10):
+        d.update(float(t), 100.0)
+        applied.append(d.applied_ppm)
+    assert applied[0] == RateDither.SLEW_PPM_PER_SEC
+    assert all(b - a <= RateDither.SLEW_PPM_PER_SEC + 1e-9 for a, b in zip(applied, applied[1:]))
+    d.update(10.0, None)  # no estimate: hold
+    assert d.applied_ppm == applied[-1]
+
+
+def test_dither_error_diffusion_averages_to_target_and_rarely_renegotiates():
+    d = RateDither(48000)
+    d.applied_ppm = 7.3  # 0.3504 Hz above nominal
+    err, seconds = 0.0, 3600
+    for t in range(seconds):
+        err += 48000 * (1 + 7.3e-6) - d.update(float(t), 7.3)
+        assert abs(err) <= RateDither.MAX_ERR_SAMPLES + 1
+    assert d.changes < seconds / 30  # the old per-update dither changed rate ~every second
+
+
+def _soak(ppm, seconds, compensate):
+    """
+    Simulated soak: a talker `ppm` fast feeds its estimator; the dither's rate is what
+    audioresample consumes. Returns the jitterbuffer fill change in ms at the end.
+    """
+    est, dither = DriftEstimator(48000), RateDither(48000)
+    rnd = random.Random(7)
+    backlog, pkt = 0.0, 0.02
+    for sec in range(seconds):
+        for i in range(int(1 / pkt)):
+            n = sec / pkt + i
+            est.add(n * pkt / (1 + ppm * 1e-6) + rnd.random() * 0.005, int(n * 960) & 0xFFFFFFFF)
+        rate = dither.update(float(sec), est.ppm) if compensate else 48000
+        backlog += 48000 * (1 + ppm * 1e-6) - rate
+    return backlog / 48.0
+
+
+def test_soak_compensation_holds_the_buffer():
+    before = _soak(40.0, 1800, compensate=False)
+    after = _soak(40.0, 1800, compensate=True)
+    assert abs(before - 72.0) < 0.5  # 40 ppm for 30 min: 72 ms piled up
+    assert abs(after) < 5.0
@@ -0,0 +1,56 @@
+# backend/tests/test_config_store.py
+import json
+
+import pytest
+
+import config_store
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_store, "CONFIG_PATH", tmp_path / "config.json")
+    monkeypatch.setattr(config_store, "SAVE_DELAY_SEC", 0.05)
+    monkeypatch.setattr(config_store, "_cfg", None)
+    monkeypatch.setattr(config_store, "_file_sig", None)
+    return config_store
+
+
+def test_coalesced_saves_share_one_write(store):
+    cfg = store.load_config()
+    first = store.save_config({**cfg, "tx_name": "a"})
+    second = store.save_config({**cfg, "tx_name": "b"})
+    assert first is second
+    assert second.wait(2) is True
+    assert json.loads(store.CONFIG_PATH.read_text())["tx_name"] == "b"
+
+
+def test_failed_write_reaches_the_caller(store, tmp_path, monkeypatch):
+    cfg = store.load_config()
+    monkeypatch.setattr(store, "CONFIG_PATH", tmp_path / "missing" / "config.json")
+    pending = store.save_config({**cfg, "tx_name": "lost"})
+    with pytest.raises(OSError):
+        pending.wait(2)
+    assert store.load_config()["tx_name"] == "lost"  # still applied in memory
+
+
+def test_readers_do_not_wait_for_a_slow_write(store, monkeypatch):
+    import threading
+    import time
+
+    cfg = store.load_config()
+    release = threading.Event()
+    real_dump = store.json.dump
+
+    def slow_dump(*a, **kw):
+        release.wait(2)
+        return real_dump(*a, **kw)
+
+    monkeypatch.setattr(store.json, "dump", slow_dump)
+    pending = store.save_config({**cfg, "tx_name": "slow"})
+    assert pending.wait(store.SAVE_DELAY_SEC + 0.2) is False  # still writing: the caller can tell
+    t0 = time.monotonic()
+    assert store.load_config()["tx_name"] == "slow"
+    store.get_version()
+    assert time.monotonic() - t0 < 0.5
+    release.set()
+    assert pending.wait(2) is True
@@ -0,0 +1,46 @@
+# backend/tests/test_jitter_adapt.py
+from jitter_adapt import AdaptiveLatency
+
+
+def test_target_from_peak_jitter_rounds_up_and_clamps():
+    a = AdaptiveLatency(min_ms=10, max_ms=200, ptime_ms=4.0, initial_ms=10)
+    assert a.update(0.0, 3.0) == 25  # 4 * 3 + 4 + 5 = 21 -> 25
+    assert a.update(1.0, 100.0) == 200
+
+
+def test_raises_at_once_on_late_drops():
+    a = AdaptiveLatency(initial_ms=40)
+    a.update(0.0, 1.0, late_total=0)
+    assert a.update(1.0, 1.0, late_total=3) == 60
+    assert a.update(2.0, None, late_total=3) is None  # no new drops, no jitter reading
+
+
+def test_lowering_waits_for_hold_down_then_moves_halfway():
+    a = AdaptiveLatency(min_ms=10, max_ms=200, ptime_ms=4.0, initial_ms=100)
+    t, got = 0.0, []
+    while t < 30.0:
+        r = a.update(t, 1.0)  # target 15 ms
+        if r is not None:
+            got.append((t, r))
+        t += 1.0
+    first_t, first = got[0]
+    assert first_t >= AdaptiveLatency.HOLD_DOWN_SEC and first == 60  # halfway from 100 to 15, rounded up
+    assert [r for _, r in got] == sorted((r for _, r in got), reverse=True)
+    assert a.latency_ms >= 15
+
+
+def test_peak_window_holds_a_burst():
+    a = AdaptiveLatency(initial_ms=10)
+    a.update(0.0, 20.0)
+    high = a.latency_ms
+    for t in range(1, int(AdaptiveLatency.PEAK_WINDOW_SEC)):
+        a.update(float(t), 1.0)
+    assert a.target_ms == high  # the burst is still inside the peak window
+    a.update(AdaptiveLatency.PEAK_WINDOW_SEC + 1, 1.0)
+    assert a.target_ms < high
+
+
+def test_small_dips_inside_hysteresis_do_not_lower():
+    a = AdaptiveLatency(initial_ms=30, ptime_ms=4.0)
+    for t in range(30):
+        assert a.update(float(t), 4.0) is None  # target 25, within HYSTERESIS_MS of 30
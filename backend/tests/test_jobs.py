@@ -0,0 +1,89 @@
+# backend/tests/test_jobs.py
+import threading
+
+from jobs import JobRunner
+
+
+def _blocked_runner():
+    """A runner whose first job holds the worker until the returned event is set."""
+    jobs = JobRunner()
+    gate = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        gate.wait(5)
+    jobs.submit("hold", hold, key="hold")
+    started.wait(5)
+    return jobs, gate
+
+
+def test_latest_op_replaces_queued_job_for_the_resource():
+    jobs, gate = _blocked_runner()
+    state = []
+    a, _ = jobs.submit("start-rx", lambda: state.append("start"), key="rx:main")
+    b, co_b = jobs.submit("stop-rx", lambda: state.append("stop"), key="rx:main")
+    c, co_c = jobs.submit("start-rx", lambda: state.append("start"), key="rx:main")
+    assert co_b and co_c and a["id"] == b["id"] == c["id"]
+    gate.set()
+    done = jobs.wait(a["id"], timeout=5)
+    assert done["op"] == "start-rx" and done["coalesced"] == 2
+    assert state == ["start"]
+
+
+def test_no_coalescing_across_a_wider_queued_job():
+    jobs, gate = _blocked_runner()
+    order = []
+    a, _ = jobs.submit("stop-rx", lambda: order.append("stop main"), key="rx:main")
+    jobs.submit("restart", lambda: order.append("restart"), key="*")
+    c, coalesced = jobs.submit("start-rx", lambda: order.append("start main"), key="rx:main")
+    assert not coalesced and c["id"] != a["id"]
+    gate.set()
+    jobs.wait(c["id"], timeout=5)
+    assert order == ["stop main", "restart", "start main"]
+
+
+def test_running_job_is_joined_only_with_the_same_op_and_stamp():
+    jobs = JobRunner()
+    gate, started = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        gate.wait(5)
+    a, _ = jobs.submit("start-rx", slow, key="rx:main", stamp=1)
+    started.wait(5)
+    same, co_same = jobs.submit("start-rx", slow, key="rx:main", stamp=1)
+    newer, co_newer = jobs.submit("start-rx", lambda: None, key="rx:main", stamp=2)
+    assert co_same and same["id"] == a["id"]
+    assert not co_newer and newer["id"] != a["id"]
+    gate.set()
+    assert jobs.wait(newer["id"], timeout=5)["state"] == "done"
+
+
+def test_internal_jobs_do_not_evict_client_jobs():
+    jobs = JobRunner()
+    user, _ = jobs.submit("start-tx", lambda: None, key="tx")
+    jobs.wait(user["id"], timeout=5)
+    for _ in range(JobRunner.MAX_DONE + 5):
+        j, _ = jobs.submit("apply-rx-config", lambda: None, coalesce_running=False, internal=True)
+        jobs.wait(j["id"], timeout=5)
+    assert jobs.get(user["id"])["state"] == "done"
+    assert len(jobs.snapshot()["recent"]) == 1 + JobRunner.MAX_DONE_INTERNAL
+
+
+def test_failure_is_reported_with_hint():
+    from jobs import JobError
+
+    def boom():
+        raise JobError("no gi", "install it")
+    runner = JobRunner()
+    j, _ = runner.submit("start-rx", boom, key="rx:main")
+    done = runner.wait(j["id"], timeout=5)
+    assert (done["state"], done["error"], done["hint"]) == ("failed", "no gi", "install it")
+
+
+def test_compound_keys_overlap_each_named_resource():
+    o = JobRunner._overlaps
+    assert o("tx+rx:main", "tx") and o("tx+rx:main", "rx:main") and o("tx+rx:main", "rx")
+    assert o("tx+rx:main", "*")
+    assert not o("tx+rx:main", "rx:lighting") and not o("tx+rx:main", "mic-monitor")
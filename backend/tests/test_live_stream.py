@@ -0,0 +1,42 @@
+# backend/tests/test_live_stream.py
+from live_stream import LiveStreamHub
+
+
+def test_silence_is_one_frame_aligned_chunk():
+    hub = LiveStreamHub(lambda active: None, channels=2)
+    assert hub.silence() == bytes(int(hub.CHUNK_SEC * 48000) * 4)
+    hub.set_format(1)
+    assert len(hub.silence()) == int(hub.CHUNK_SEC * 48000) * 2
+
+
+def test_listener_gets_pushed_chunks_and_activity_callbacks():
+    seen = []
+    hub = LiveStreamHub(seen.append)
+    sub = hub.subscribe()
+    hub.push(bytes(hub._chunk_bytes + 2))
+    assert len(sub.get(timeout=0)) == hub._chunk_bytes + 2
+    hub.unsubscribe(sub)
+    assert seen == [True, False]
+
+
+def test_concurrent_join_and_leave_leave_the_tap_matching_the_listeners():
+    import threading
+    import time
+
+    for _ in range(20):
+        state = []
+
+        def on_active(active):
+            time.sleep(0.001)  # widen the window between deciding and applying
+            state.append(active)
+
+        hub = LiveStreamHub(on_active)
+        old = hub.subscribe()
+        kept = []
+        leave = threading.Thread(target=hub.unsubscribe, args=(old,))   # the reload: old tab leaves...
+        join = threading.Thread(target=lambda: kept.append(hub.subscribe()))  # ...as the new one joins
+        leave.start(), join.start()
+        leave.join(), join.join()
+        assert hub.listener_count() == 1 and state[-1] is True
+        hub.unsubscribe(kept[0])
+        assert state[-1] is False
@@ -0,0 +1,123 @@
+# backend/tests/test_metrics_history.py
+import math
+import threading
+import time
+
+from metrics_history import ChannelHistory, HistoryRecorder, _Tier, _downsample, _pick
+
+T0 = 1_700_000_000.0
+
+
+def _nan(v):
+    return v != v
+
+
+def test_raw_tier_ring_wraps_and_blanks_gaps():
+    t = _Tier(1.0, 5, 1, rollup=False)
+    for i in range(7):
+        t.add(T0 + i, [float(i)])
+    assert t.column(t.lo, 0, t.head - 4, t.head) == [2.0, 3.0, 4.0, 5.0, 6.0]
+    t.add(T0 + 9, [9.0])  # buckets 7 and 8 were never written
+    vals = t.column(t.lo, 0, t.head - 4, t.head)
+    assert vals[:2] == [5.0, 6.0] and _nan(vals[2]) and _nan(vals[3]) and vals[4] == 9.0
+
+
+def test_rollup_tier_keeps_min_max_mean_and_skips_nan():
+    t = _Tier(10.0, 100, 2, rollup=True)
+    for i, v in enumerate([3.0, float("nan"), 1.0, 5.0]):
+        t.add(T0 + i, [v, 7.0])
+    k = t.head
+    assert t.column(t.lo, 0, k, k) == [1.0] and t.column(t.hi, 0, k, k) == [5.0]
+    assert t.column(t.mean, 0, k, k) == [3.0] and t.column(t.mean, 1, k, k) == [7.0]
+
+
+def test_clock_step_back_keeps_history():
+    t = _Tier(1.0, 100, 1, rollup=False)
+    for i in range(10):
+        t.add(T0 + i, [float(i)])
+    head = t.head
+    t.add(T0 - 3600, [99.0])  # wall clock stepped back an hour
+    assert t.head == head
+    assert t.column(t.lo, 0, head - 9, head - 1) == [float(i) for i in range(9)]
+    assert t.column(t.lo, 0, head, head) == [99.0]
+
+
+def test_gap_longer_than_ring_clears():
+    t = _Tier(1.0, 5, 1, rollup=False)
+    t.add(T0, [1.0])
+    t.add(T0 + 100, [2.0])
+    assert sum(1 for v in t.lo if not _nan(v)) == 1
+
+
+def test_pick_prefers_coarsest_resolving_tier_that_covers():
+    raw, sec, minute = _Tier(0.1, 3600, 1, False), _Tier(1.0, 86400, 1, True), _Tier(60.0, 86400, 1, True)
+    tiers = [raw, sec, minute]
+    for t in tiers:
+        t.add(T0, [1.0])
+    end = T0
+    assert _pick(tiers, end - 60, end, 0.1) is raw
+    assert _pick(tiers, end - 60, end, 0.5) is raw
+    assert _pick(tiers, end - 3000, end, 5.0) is sec
+    assert _pick(tiers, end - 86000, end, 200.0) is minute
+    assert _pick(tiers, end - 7200, end, 0.1) is sec  # raw no longer covers the start
+
+
+def test_downsample_combines_buckets():
+    t = _Tier(1.0, 100, 1, rollup=False)
+    for i in range(10):
+        t.add(T0 + i, [float(i)])
+    lo, hi, mean = _downsample(t, [0], T0, T0 + 10, 2)[0]
+    assert lo == [0.0, 5.0] and hi == [4.0, 9.0] and mean == [2.0, 7.0]
+    lo, hi, mean = _downsample(t, [0], T0 + 20, T0 + 30, 2)[0]
+    assert lo == [None, None] and mean == [None, None]
+
+
+def test_channel_history_query_and_talkers():
+    h = ChannelHistory(hours=1)
+    lost = 0
+    for i in range(600):
+        lost += 3 if i == 300 else 0
+        h.add(T0 + i * 0.1, {"packets_total": i * 25, "bytes_total": i * 25 * 300}, -20.0,
+              [{"ssrc": 7, "name": "A", "level_db": -30.0, "lost": lost, "jitter_ms": 0.4}])
+    q = h.query(T0, T0 + 60, 6)
+    assert q["resolution_sec"] == 1.0
+    assert q["series"]["pps"]["mean"][1:] == [250.0] * 5
+    tk = q["talkers"][0]
+    assert tk["ssrc"] == 7 and max(tk["series"]["lost"]["max"]) == 3.0
+    q = h.query(T0, T0 + 60, 6, series=["jitter_ms"], ssrcs={8})
+    assert q["series"] == {} and q["talkers"] == []
+
+
+def test_query_does_not_hold_the_lock_while_binning():
+    h = ChannelHistory(hours=1)
+    for i in range(36000):
+        h.add(T0 + i * 0.1, {"packets_total": i, "bytes_total": i}, -20.0, [])
+    done = threading.Event()
+
+    def query():
+        h.query(T0, T0 + 3600, 5000)
+        done.set()
+    threading.Thread(target=query).start()
+    worst = 0.0
+    while not done.is_set():
+        t = time.perf_counter()
+        with h._lock:
+            pass
+        worst = max(worst, time.perf_counter() - t)
+    assert worst < 0.05
+
+
+def test_recorder_timeline_follows_forward_steps_only(monkeypatch):
+    r = HistoryRecorder(lambda: {}, hours=0)
+    wall = [T0]
+    mono = [100.0]
+    monkeypatch.setattr(time, "time", lambda: wall[0])
+    monkeypatch.setattr(time, "monotonic", lambda: mono[0])
+    r._offset = wall[0] - mono[0]
+    mono[0] += 1; wall[0] += 1
+    assert r.now() == T0 + 1
+    wall[0] -= 600 - 1  # stepped back, one second later
+    mono[0] += 1
+    assert r.now() == T0 + 2 and math.isclose(r.clock_skew(), 600)
+    wall[0] += 3600  # stepped ahead
+    assert r.now() == wall[0] and r.clock_skew() == 0
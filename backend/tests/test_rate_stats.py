@@ -0,0 +1,42 @@
+# backend/tests/test_rate_stats.py
+from rate_stats import RateWindow
+
+
+def test_empty_window():
+    w = RateWindow()
+    assert w.snapshot(5.0) == {"pps": 0.0, "bps": 0.0, "iat_p50_ms": None, "iat_p99_ms": None, "burst_max": None}
+
+
+def test_steady_rate_and_interarrival():
+    w = RateWindow(window_sec=2.0, bucket_sec=0.05)
+    t = 100.0
+    for i in range(1000):  # 250 pkt/s of 200 bytes for 4 s
+        w.add(t + i * 0.004, 200)
+    s = w.snapshot(t + 4.0)
+    assert abs(s["pps"] - 250) < 5 and abs(s["bps"] - 50000) < 1000
+    assert 3.5 < s["iat_p50_ms"] < 4.5 and 3.5 < s["iat_p99_ms"] < 4.5
+    assert s["burst_max"] in (12, 13)
+
+
+def test_rate_while_filling_uses_elapsed_time():
+    w = RateWindow(window_sec=2.0)
+    for i in range(50):
+        w.add(10.0 + i * 0.01, 100)  # 100 pkt/s for 0.5 s
+    assert abs(w.snapshot(10.5)["pps"] - 100) < 5
+
+
+def test_old_buckets_expire():
+    w = RateWindow(window_sec=1.0, bucket_sec=0.1)
+    for i in range(100):
+        w.add(i * 0.01, 10)
+    s = w.snapshot(5.0)  # silent for 4 s
+    assert s["pps"] == 0 and s["bps"] == 0 and s["iat_p50_ms"] is None
+
+
+def test_batches_count_without_interarrival():
+    w = RateWindow(window_sec=2.0)
+    for k in range(1, 21):
+        w.add_many(k * 0.1, 10, 1000)  # 100 pkt/s in 10-packet batches
+    s = w.snapshot(2.05)
+    assert abs(s["pps"] - 100) < 10
+    assert s["iat_p50_ms"] is None and s["burst_max"] is None
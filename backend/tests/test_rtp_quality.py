@@ -0,0 +1,47 @@
+# backend/tests/test_rtp_quality.py
+from rtp_quality import RtpSeqStats
+
+
+def _feed(stats, seqs, pkt_sec=0.004, step=192):
+    for i, seq in enumerate(seqs):
+        stats.update(seq & 0xFFFF, (i * step) & 0xFFFFFFFF, 10.0 + i * pkt_sec)
+
+
+def test_probation_then_clean_stream():
+    s = RtpSeqStats()
+    assert s.update(100, 0, 0.0) is False  # first packet is on probation
+    _feed(s, range(101, 200))
+    snap = s.snapshot()
+    assert snap["lost"] == 0 and snap["received"] == snap["expected"] == 99
+    assert snap["jitter_ms"] < 0.01  # arrival is truncated to whole samples
+
+
+def test_loss_gaps_duplicates_and_reordering():
+    s = RtpSeqStats()
+    _feed(s, [1, 2, 3, 5, 6, 6, 4, 9, 10])
+    snap = s.snapshot()
+    assert snap["duplicates"] == 1 and snap["reordered"] == 1 and snap["gaps"] == 2
+    assert snap["lost"] == 2  # 7 and 8
+
+
+def test_sequence_wrap_counts_cycles():
+    s = RtpSeqStats()
+    _feed(s, range(65530, 65546))
+    snap = s.snapshot()
+    assert s.cycles == 65536 and snap["lost"] == 0 and snap["expected"] == 15
+
+
+def test_large_jump_needs_two_sequential_packets():
+    s = RtpSeqStats()
+    _feed(s, range(1, 11))
+    assert s.update(30000, 0, 11.0) is False
+    assert s.update(30001, 192, 11.004) is True  # sender restarted
+    assert s.snapshot()["lost"] == 0
+
+
+def test_jitter_follows_arrival_variation():
+    s = RtpSeqStats()
+    for i in range(200):
+        late = 0.002 if i % 2 else 0.0
+        s.update(i, i * 192, 10.0 + i * 0.004 + late)
+    assert 1.5 < s.snapshot()["jitter_ms"] < 2.5
@@ -0,0 +1,121 @@
+# backend/tests/test_sap.py
+import struct
+import zlib
+
+import pytest
+
+from sap import SapService, make_sdp, pack_sap, parse_sap, parse_sdp, sdp_format
+
+FMT = {"encoding": "L24", "channels": 2, "ptime_us": 1000}
+
+
+def _sdp(**kw):
+    args = dict(name="Booth", sess_id=4242, origin_addr="192.168.1.20", group="239.69.0.10", port=5004, fmt=FMT)
+    args.update(kw)
+    return make_sdp(**args)
+
+
+def test_make_parse_sdp_round_trip():
+    d = parse_sdp(_sdp())
+    assert d["name"] == "Booth"
+    assert d["origin"] == {"user": "-", "sess_id": "4242", "version": "1", "addr": "192.168.1.20"}
+    assert (d["group"], d["port"], d["pt"]) == ("239.69.0.10", 5004, 96)
+    assert (d["encoding"], d["rate"], d["channels"], d["ptime_ms"]) == ("L24", 48000, 2, 1.0)
+    assert sdp_format(d) == (FMT, None)
+
+
+def test_sdp_format_snaps_ptime_and_reports_reasons():
+    d = parse_sdp(_sdp(fmt={"encoding": "L16", "channels": 1, "ptime_us": 333}))
+    assert sdp_format(d)[0]["ptime_us"] == 250
+    d = parse_sdp(_sdp().replace("L24/48000/2", "L24/96000/2"))
+    assert sdp_format(d)[0] is None and "96000" in sdp_format(d)[1]
+    d = parse_sdp(_sdp().replace("L24/48000/2", "L24/48000/8"))
+    assert sdp_format(d)[0] is None
+
+
+def test_pack_parse_sap_round_trip():
+    sdp = _sdp()
+    is_del, msg_hash, origin, text = parse_sap(pack_sap(sdp, "192.168.1.20"))
+    assert (is_del, origin, text) == (False, "192.168.1.20", sdp)
+    assert msg_hash == (zlib.crc32(sdp.encode()) & 0xFFFF or 1)
+    assert parse_sap(pack_sap(sdp, "192.168.1.20", delete=True))[0] is True
+
+
+def test_parse_sap_compressed_and_without_mime():
+    sdp = _sdp().encode()
+    head = struct.pack("!BBH4s", 0x21, 0, 7, bytes([10, 0, 0, 1]))
+    assert parse_sap(head + zlib.compress(sdp))[3] == sdp.decode()
+    head = struct.pack("!BBH4s", 0x20, 0, 7, bytes([10, 0, 0, 1]))
+    assert parse_sap(head + sdp)[2] == "10.0.0.1"
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"\x20\x00\x00",                                           # short header
+    struct.pack("!BBH4s", 0x40, 0, 1, b"\0\0\0\1") + b"v=0",   # SAP version 2
+    struct.pack("!BBH4s", 0x22, 0, 1, b"\0\0\0\1") + b"v=0",   # encrypted
+    struct.pack("!BBH4s", 0x21, 0, 1, b"\0\0\0\1") + b"junk",  # bad zlib
+    struct.pack("!BBH4s", 0x20, 0, 1, b"\0\0\0\1") + b"text/plain\0v=0",
+])
+def test_parse_sap_rejects_malformed(data):
+    assert parse_sap(data) is None
+
+
+@pytest.mark.parametrize("old, new", [
+    ("L24/48000/2", "L24/48000/two"),
+    ("L24/48000/2", "L24/fast/2"),
+    ("a=rtpmap:96", "a=rtpmap:x96"),
+    ("m=audio 5004 RTP/AVP 96", "m=audio port RTP/AVP 96"),
+    ("m=audio 5004 RTP/AVP 96", "m=audio 5004 RTP/AVP pt"),
+])
+def test_parse_sdp_tolerates_garbage_numbers(old, new):
+    d = parse_sdp(_sdp().replace(old, new))
+    assert d is not None
+    fmt, reason = sdp_format(d)
+    assert fmt is None and reason
+
+
+def test_parse_sdp_needs_origin():
+    assert parse_sdp("v=0\r\ns=x\r\n") is None
+    assert parse_sdp("") is None
+
+
+def _service():
+    sap = SapService()
+    sap.min_timeout_sec = 3600.0
+    return sap
+
+
+def test_handle_counts_bad_packets_instead_of_raising():
+    sap = _service()
+    sap._handle(pack_sap(_sdp().replace("/2\r\n", "/two\r\n"), "10.0.0.1"), "10.0.0.1", 1.0)
+    sap._handle(b"\xff" * 40, "10.0.0.1", 1.0)
+    assert sap.stats["ignored"] == 1
+    assert [s["usable"] for s in sap.snapshot()["sessions"]] == [False]
+
+
+def test_announcement_without_origin_matching_a_known_hash_is_ignored():
+    sap = _service()
+    sdp = _sdp()
+    pkt = pack_sap(sdp, "10.0.0.1")
+    sap._handle(pkt, "10.0.0.1", 1.0)
+    # same hash, body without o=: not a usable description, and not a deletion
+    head = pkt[:8]
+    sap._handle(head + b"application/sdp\0v=0\r\ns=x\r\n", "10.0.0.1", 2.0)
+    assert sap.stats["ignored"] == 1
+    assert len(sap.snapshot()["sessions"]) == 1
+    # a deletion may omit it: found by hash
+    sap._handle(bytes([pkt[0] | 0x04]) + pkt[1:8] + b"application/sdp\0v=0\r\n", "10.0.0.1", 3.0)
+    assert sap.snapshot()["sessions"] == []
+
+
+def test_lookup_is_stable_across_reannouncements():
+    sap = _service()
+    a = _sdp(sess_id=1, origin_addr="10.0.0.1", name="A")
+    b = _sdp(sess_id=2, origin_addr="10.0.0.2", name="B")
+    sap._handle(pack_sap(a, "10.0.0.1"), "10.0.0.1", 1.0)
+    sap._handle(pack_sap(b, "10.0.0.2"), "10.0.0.2", 2.0)
+    assert sap.lookup("239.69.0.10", 5004)["name"] == "A"
+    sap._handle(pack_sap(b, "10.0.0.2"), "10.0.0.2", 30.0)
+    assert sap.lookup("239.69.0.10", 5004)["name"] == "A"
+    assert sap.lookup("239.69.0.11", 5004) is None
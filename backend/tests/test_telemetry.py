@@ -0,0 +1,59 @@
+# backend/tests/test_telemetry.py
+import threading
+
+from telemetry import TelemetryHub, diff_state, encode_event
+
+
+def test_diff_state_scalars_and_nested_dicts():
+    old = {"rx_running": True, "mic_db": -40.0, "metrics": {"pps": 250, "bps": 1000}}
+    new = {"rx_running": True, "mic_db": -38.5, "metrics": {"pps": 250, "bps": 1200}, "tx": {}}
+    assert diff_state(old, new) == {"mic_db": -38.5, "metrics": {"bps": 1200}, "tx": {}}
+    assert diff_state(new, new) == {}
+
+
+def test_diff_state_keyed_collections_report_removals():
+    old = {"peers": {"1": {"level_db": -20}, "2": {"level_db": -30}}}
+    new = {"peers": {"1": {"level_db": -20}, "3": {"level_db": -10}}}
+    assert diff_state(old, new) == {"peers": {"3": {"level_db": -10}}, "peers_removed": ["2"]}
+
+
+def test_diff_state_new_key_set_to_none_is_sent():
+    assert diff_state({}, {"mix_level_db": None}) == {"mix_level_db": None}
+
+
+def test_encode_event_is_one_sse_message():
+    assert encode_event("delta", {"a": 1}) == b'event: delta\ndata: {"a":1}\n\n'
+
+
+def test_collect_runs_outside_the_hub_lock():
+    held = []
+    ticked = threading.Event()
+    hub = None
+
+    def collect():
+        held.append(hub._lock.locked())
+        if len(held) > 1:
+            ticked.set()
+        return {"n": len(held)}
+
+    hub = TelemetryHub(collect)
+    sub = hub.subscribe(100)
+    assert sub.get(timeout=1).startswith(b"event: snapshot")
+    assert ticked.wait(2)
+    assert sub.get(timeout=1).startswith(b"event: delta")
+    hub.unsubscribe(sub)
+    assert held and not any(held)
+
+
+def test_subscriber_limit():
+    hub = TelemetryHub(lambda: {})
+    subs = [hub.subscribe(5000) for _ in range(hub.MAX_SUBSCRIBERS)]
+    try:
+        hub.subscribe(5000)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("limit not enforced")
+    for s in subs:
+        hub.unsubscribe(s)
+    assert hub.subscriber_count() == 0
@@ -0,0 +1,20 @@
+# backend/tests/test_vad.py
+from vad import VoiceGate
+
+
+def test_opens_on_threshold_and_closes_after_hangover():
+    g = VoiceGate(threshold_db=-45.0, hangover_ms=300)
+    assert not g.update(-60.0, 0.0) and not g.open
+    assert g.update(-40.0, 0.05) and g.open
+    assert not g.update(None, 0.20)          # silence within the hangover
+    assert not g.update(-50.0, 0.30)
+    assert g.update(-50.0, 0.35) and not g.open
+    assert g.peak_db == -50.0
+
+
+def test_reconfigure_applies_to_next_reading():
+    g = VoiceGate(threshold_db=-20.0, hangover_ms=0)
+    assert not g.update(-30.0, 0.0)
+    g.configure(-35.0, 0)
+    assert g.update(-30.0, 0.05) and g.open
+    assert g.update(-40.0, 0.10) and not g.open
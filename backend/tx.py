@@ -1,12 +1,22 @@
-import subprocess, re, time, sys
-_proc = None
+import re, time, threading
+from rate_stats import RateWindow
+import gst_runtime
+from channels import tx_destinations
+from metrics import STATE_CHANGE, observe_bus_message
+from audio_format import (stream_format, ptime_ns, samples_per_packet, packet_bytes, payloader,
+                          wire_raw_format, mix_raw_format, capture_latency_us)
+
+# Config keys the running sender can apply without a restart
+TX_LIVE_KEYS = ("tx_sine_freq", "tx_source", "tx_mic_device", "tx_ssrc")
+# Keys that decide where the sender sends (see channels.tx_destinations); applied live
+TX_DEST_KEYS = ("tx_channels", "channels", "tx_multicast", "tx_port")
+# Keys that need the sender rebuilt (caps change)
+TX_FORMAT_KEYS = ("audio_encoding", "audio_channels", "audio_ptime_us")
+
+_worker = None
+_lock = threading.RLock()
+_probe = None  # LatencyProbe while a latency measurement runs (survives sender restarts)
 
-def stop_tx():
-    global _proc
-    if _proc and _proc.poll() is None:
-        try: _proc.terminate()
-        except Exception: pass
-    _proc=None
 
 def _normalize_alsa_device(dev: str) -> str:
     if not dev:
@@ -29,84 +39,421 @@ def _normalize_alsa_device(dev: str) -> str:
     return d
 
 
-def start_tx(cfg: dict):
+def _dsnoop_variant(dev: str):
+    """dsnoop: device for the same card, used when the plain device is busy."""
+    m = re.match(r"^(?:hw|plughw):(?:(CARD=([^,]+),DEV=(\d+))|(\d+),(\d+))$", dev)
+    if m:
+        if m.group(1):
+            return f"dsnoop:CARD={m.group(2)},DEV={m.group(3)}"
+        return f"dsnoop:{m.group(4)},{m.group(5)}"
+    if dev.startswith("sysdefault:"):
+        # Try dsnoop for the same card if specified
+        return "dsnoop:" + dev.split(":", 1)[1]
+    return None
+
+
+class TxWorker:
     """
-    Sends L16/48k/mono to cfg['tx_multicast']:cfg['tx_port'] with 4 ms packet time.
+    In-process AES67 sender (48 kHz; L16/L24, 1-2 channels, packet time per audio_format):
+      source (audiotestsrc | alsasrc) -> convert -> resample -> 48k/channels -> queue
+        -> convert -> S16BE|S24BE -> rtpL16pay|rtpL24pay -> udpsink (one client per assigned channel)
+    Readiness comes from the pipeline's state-change/error messages, counters are
+    polled from the payloader and queue, and the sine frequency, source and SSRC can
+    be changed while running.
     """
-    global _proc
-    stop_tx()
-    raw_caps = ["audio/x-raw,format=S16LE,channels=1,rate=48000"]
-
-    def _build_src(dev_str: str):
-        dev = _normalize_alsa_device(dev_str or "")
-        if dev.startswith("hw:"):
-            dev = "plughw:" + dev.split(":",1)[1]
-        # Add conservative buffering + timestamps for stable capture
-        props = [
-            "alsasrc",
-            *( [f"device={dev}"] if dev else [] ),
-            "do-timestamp=true",
-            "buffer-time=200000",
-            "latency-time=20000",
-        ]
-        return props
-
-    if (cfg.get("tx_source") or "sine") == "mic":
-        user_dev = (cfg.get("tx_mic_device") or "").strip()
-        src = _build_src(user_dev)
-        # Do conversion downstream to avoid device open failures on strict hw devices
-    else:
-        freq = int(cfg.get("tx_sine_freq") or 1000)
-        src = ["audiotestsrc","is-live=true","wave=sine",f"freq={freq}","!",*raw_caps]
-
-    ssrc = int(cfg.get("tx_ssrc") or 12345678)
-
-    def _launch(src_chain):
-        args = [
-            "gst-launch-1.0","-q",
-            *src_chain,
-            "!","audioconvert","!","audioresample",
-            "!",*raw_caps,                # ensure mono/48k/S16LE
-            "!","queue",
-            "!","audioconvert",          # convert endianness for RTP L16
-            "!","audio/x-raw,format=S16BE",
-            "!","rtpL16pay","pt=96","min-ptime=4000000","max-ptime=4000000",f"ssrc={ssrc}","!",
-            "udpsink",f"host={cfg['tx_multicast']}",f"port={int(cfg['tx_port'])}",
-            "auto-multicast=true","loop=true","ttl=16"
-        ]
+    STATS_POLL_SEC = 0.5
+    START_TIMEOUT_SEC = 2.0
+
+    def __init__(self):
+        self.Gst = gst_runtime.gst()
+
+        self.pipeline = None
+        self.src = None
+        self.source = None        # "sine" | "mic"
+        self.device = ""
+        self.fmt = stream_format({})
+        self.destinations = []    # [(host, port)] of the channels we talk on
+        self.probe = None         # LatencyProbe: send ticks instead of the configured source
+        self._stats_lock = threading.Lock()
+        self._rate = RateWindow(window_sec=2.0)
+        self._seq_last = None
+        self.stats = {"state": "stopped", "packets_sent": 0, "capture_xruns": 0,
+                      "queue_buffers": 0, "queue_fill_pct": 0.0, "startup_ms": None,
+                      "started_ts": None, "last_error": None}
+        self._unwatch = None      # bus watch / stats timer removal while running (gst_runtime main loop)
+        self._cancel_poll = None
+
+    # ---------- build ----------
+    def _make(self, factory, name=None):
+        e = self.Gst.ElementFactory.make(factory, name)
+        if not e:
+            raise RuntimeError(f"Missing GStreamer element: {factory} (install gstreamer1.0-plugins-base/good)")
+        return e
+
+    def _make_source(self, cfg, mic_dev=None):
+        if self.probe is not None:
+            return self._make_tick_source(), "probe", ""
+        if (cfg.get("tx_source") or "sine") == "mic":
+            dev = mic_dev if mic_dev is not None else _normalize_alsa_device((cfg.get("tx_mic_device") or "").strip())
+            if dev.startswith("hw:"):
+                dev = "plughw:" + dev.split(":", 1)[1]
+            src = self._make("alsasrc", "txsrc")
+            if dev:
+                src.set_property("device", dev)
+            # Conservative buffering + timestamps for stable capture; small periods for low ptime
+            lat = capture_latency_us(self.fmt)
+            src.set_property("do-timestamp", True)
+            src.set_property("buffer-time", 200000 if lat >= 20000 else max(10 * lat, 20000))
+            src.set_property("latency-time", lat)
+            return src, "mic", dev
+        src = self._make("audiotestsrc", "txsrc")
+        src.set_property("is-live", True)
+        # one packet per buffer: the payloader never has to wait for a partial packet
+        src.set_property("samplesperbuffer", samples_per_packet(self.fmt))
+        src.set_property("wave", 0)  # sine
+        src.set_property("freq", float(int(cfg.get("tx_sine_freq") or 1000)))
+        return src, "sine", ""
+
+    def _make_tick_source(self):
+        """
+        audiotestsrc ticks (a 10-period 1 kHz burst every probe interval, silence between)
+        with a probe that reports each tick's capture time to the LatencyProbe.
+        """
+        Gst = self.Gst
+        probe = self.probe
+        src = self._make("audiotestsrc", "txsrc")
+        src.set_property("is-live", True)
+        src.set_property("samplesperbuffer", samples_per_packet(self.fmt))
+        try:
+            src.set_property("wave", 8)  # ticks
+            src.set_property("tick-interval", int(probe.interval_sec * Gst.SECOND))
+        except Exception:
+            raise RuntimeError("audiotestsrc has no tick-interval (needs gstreamer1.0-plugins-base >= 1.14)")
+        src.set_property("freq", 1000.0)
+        src.set_property("volume", 0.8)
+        every = int(round(probe.interval_sec * 48000))  # samples between ticks
+
+        def _on_buffer(_pad, info):
+            buf = info.get_buffer()
+            off = buf.offset if buf is not None else Gst.BUFFER_OFFSET_NONE
+            if off == Gst.BUFFER_OFFSET_NONE or buf.pts == Gst.CLOCK_TIME_NONE:
+                return Gst.PadProbeReturn.OK
+            n = buf.offset_end - off if buf.offset_end != Gst.BUFFER_OFFSET_NONE else samples_per_packet(self.fmt)
+            tick = -(-off // every) * every  # first tick sample at or after this buffer's start
+            if tick < off + n:
+                clock = self.pipeline.get_clock() if self.pipeline is not None else None
+                if clock is not None:
+                    # pipeline clock time of the tick's first sample, mapped onto time.monotonic_ns()
+                    at = self.pipeline.get_base_time() + buf.pts + (tick - off) * Gst.SECOND // 48000
+                    probe.emitted(time.monotonic_ns() - (clock.get_time() - at))
+            return Gst.PadProbeReturn.OK
+
+        src.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, _on_buffer)
+        return src
+
+    def _build(self, cfg, mic_dev=None):
+        Gst = self.Gst
+        pipe = Gst.Pipeline.new("tx")
+        self.fmt = fmt = stream_format(cfg)
+        self.src, self.source, self.device = self._make_source(cfg, mic_dev)
+        self.aconv = self._make("audioconvert", "txconv")
+        ares = self._make("audioresample", "txres")
+        rawcaps = self._make("capsfilter", "txcaps")
+        rawcaps.set_property("caps", Gst.Caps.from_string(
+            f"audio/x-raw,format={mix_raw_format(fmt)},channels={fmt['channels']},rate=48000"))
+        self.queue = self._make("queue", "txq")
+        aconv2 = self._make("audioconvert", None)  # sample format/endianness for RTP L16/L24
+        becaps = self._make("capsfilter", None)
+        becaps.set_property("caps", Gst.Caps.from_string(f"audio/x-raw,format={wire_raw_format(fmt)}"))
+        self.pay = self._make(payloader(fmt), "txpay")
+        self.pay.set_property("pt", 96)
+        self.pay.set_property("min-ptime", ptime_ns(fmt))
+        self.pay.set_property("max-ptime", ptime_ns(fmt))
+        self.pay.set_property("ssrc", int(cfg.get("tx_ssrc") or 12345678) & 0xFFFFFFFF)
+        sink = self.sink = self._make("udpsink", "txsink")
+        sink.set_property("host", cfg["tx_multicast"])
+        sink.set_property("port", int(cfg["tx_port"]))
+        sink.set_property("auto-multicast", True)
+        sink.set_property("loop", True)
+        sink.set_property("ttl", 16)
+        sink.set_property("ttl-mc", 16)
         iface = (cfg.get("tx_iface") or "").strip()
         if iface:
-            args.append(f"multicast-iface={iface}")
-        # Inherit stdout/stderr so errors appear in journal/syslog
-        return subprocess.Popen(args)
-
-    # First attempt
-    _proc = _launch(src)
-    time.sleep(0.7)
-    if _proc.poll() is not None and _proc.returncode != 0 and (cfg.get("tx_source") or "sine") == "mic":
-        # Retry with dsnoop variant if busy
-        dev = _normalize_alsa_device((cfg.get("tx_mic_device") or "").strip())
-        dsnoop_dev = None
-        m = re.match(r"^(?:hw|plughw):(?:(CARD=([^,]+),DEV=(\d+))|(\d+),(\d+))$", dev)
-        if m:
-            if m.group(1):
-                dsnoop_dev = f"dsnoop:CARD={m.group(2)},DEV={m.group(3)}"
+            sink.set_property("multicast-iface", iface)
+        self.set_destinations(tx_destinations(cfg))
+
+        chain = [self.src, self.aconv, ares, rawcaps, self.queue, aconv2, becaps, self.pay, sink]
+        for e in chain:
+            pipe.add(e)
+        for a, b in zip(chain, chain[1:]):
+            if not a.link(b):
+                raise RuntimeError(f"TX: could not link {a.get_name()} -> {b.get_name()}")
+        self.pipeline = pipe
+        self.bus = pipe.get_bus()
+
+    # ---------- lifecycle ----------
+    def _wait_playing(self):
+        """Block until the pipeline reports PLAYING or an error; returns error text or None."""
+        Gst = self.Gst
+        deadline = time.monotonic() + self.START_TIMEOUT_SEC
+        mask = Gst.MessageType.ERROR | Gst.MessageType.STATE_CHANGED
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return "timed out waiting for PLAYING"
+            msg = self.bus.timed_pop_filtered(int(remaining * Gst.SECOND), mask)
+            if not msg:
+                continue
+            if msg.type == Gst.MessageType.ERROR:
+                err, dbg = msg.parse_error()
+                return f"{err.message} ({dbg})" if dbg else err.message
+            if msg.src == self.pipeline:
+                _old, new, _pending = msg.parse_state_changed()
+                if new == Gst.State.PLAYING:
+                    return None
+
+    def _try_start(self, cfg, mic_dev=None):
+        self._build(cfg, mic_dev)
+        t0 = time.monotonic()
+        ret = self.pipeline.set_state(self.Gst.State.PLAYING)
+        err = None
+        if ret == self.Gst.StateChangeReturn.FAILURE:
+            # the ERROR message usually says why (e.g. device busy)
+            msg = self.bus.pop_filtered(self.Gst.MessageType.ERROR)
+            err = msg.parse_error()[0].message if msg else "state change failed"
+        else:
+            err = self._wait_playing()
+        if err:
+            print("TX start failed:", err)
+            self.pipeline.set_state(self.Gst.State.NULL)
+            self.pipeline = None
+            with self._stats_lock:
+                self.stats["last_error"] = err
+            return False
+        STATE_CHANGE.observe(time.monotonic() - t0, pipeline="tx", target="PLAYING")
+        with self._stats_lock:
+            self.stats.update({"state": "playing", "startup_ms": round((time.monotonic() - t0) * 1000.0, 1),
+                               "started_ts": time.time(), "last_error": None})
+        return True
+
+    def start(self, cfg):
+        ok = self._try_start(cfg)
+        if not ok and (cfg.get("tx_source") or "sine") == "mic":
+            # Retry with dsnoop variant if busy
+            ds = _dsnoop_variant(_normalize_alsa_device((cfg.get("tx_mic_device") or "").strip()))
+            if ds:
+                ok = self._try_start(cfg, mic_dev=ds)
+        if not ok:
+            with self._stats_lock:
+                self.stats["state"] = "error"
+            if (cfg.get("tx_source") or "sine") == "mic":
+                raise RuntimeError("TX mic failed to start. Device may be busy or unsupported. Try selecting a dsnoop: device, stop 'Monitor Mic', or use 'sysdefault'.")
+            raise RuntimeError(f"TX failed to start: {self.stats['last_error']}")
+        if self._unwatch is None:
+            self._unwatch = gst_runtime.watch_bus(self.bus, self._on_bus_message)
+            self._cancel_poll = gst_runtime.every(self.STATS_POLL_SEC, self._poll_stats)
+
+    def stop(self):
+        if self._unwatch is not None:
+            self._cancel_poll()
+            self._unwatch()
+            self._unwatch = self._cancel_poll = None
+        if self.pipeline is not None:
+            t0 = time.monotonic()
+            self.pipeline.set_state(self.Gst.State.NULL)
+            STATE_CHANGE.observe(time.monotonic() - t0, pipeline="tx", target="NULL")
+        self.pipeline = None
+        with self._stats_lock:
+            self.stats["state"] = "stopped"
+
+    def is_running(self):
+        with self._stats_lock:
+            return self.pipeline is not None and self.stats["state"] == "playing"
+
+    # ---------- bus + counters ----------
+    def _on_bus_message(self, msg):
+        """Bus watch on the shared main loop (see gst_runtime); counters are polled by a timer there too."""
+        Gst = self.Gst
+        if msg.type not in (Gst.MessageType.ERROR, Gst.MessageType.WARNING, Gst.MessageType.EOS):
+            return
+        observe_bus_message(Gst, "tx", msg)
+        if msg.type == Gst.MessageType.ERROR:
+            err, dbg = msg.parse_error()
+            print("TX ERROR:", err, dbg)
+            with self._stats_lock:
+                self.stats["state"] = "error"
+                self.stats["last_error"] = err.message
+        elif msg.type == Gst.MessageType.WARNING:
+            # audiobasesrc warns ("Can't record audio fast enough") when capture overruns
+            if msg.src == self.src:
+                with self._stats_lock:
+                    self.stats["capture_xruns"] += 1
             else:
-                dsnoop_dev = f"dsnoop:{m.group(4)},{m.group(5)}"
-        elif dev.startswith("sysdefault:"):
-            # Try dsnoop for the same card if specified
-            tail = dev.split(":",1)[1]
-            dsnoop_dev = f"dsnoop:{tail}"
-        if dsnoop_dev:
-            try:
-                src2 = _build_src(dsnoop_dev)
-                _proc = _launch(src2)
-            except Exception:
-                pass
-    # Final quick check: if process died immediately, raise for API visibility
-    time.sleep(0.3)
-    if _proc.poll() is not None and _proc.returncode != 0:
-        raise RuntimeError("TX mic failed to start. Device may be busy or unsupported. Try selecting a dsnoop: device, stop 'Monitor Mic', or use 'sysdefault'.")
+                print("TX WARNING:", msg.parse_warning()[0])
+        elif msg.type == Gst.MessageType.EOS:
+            print("TX EOS")
+            with self._stats_lock:
+                self.stats["state"] = "stopped"
+
+    def _poll_stats(self):
+        now = time.time()
+        try:
+            seq = int(self.pay.get_property("stats").get_value("seqnum"))
+        except Exception:
+            seq = None
+        try:
+            q_bufs = int(self.queue.get_property("current-level-time"))
+            q_max = int(self.queue.get_property("max-size-time")) or 1
+            q_n = int(self.queue.get_property("current-level-buffers"))
+        except Exception:
+            q_bufs = q_max = q_n = None
+        with self._stats_lock:
+            sent = 0
+            if seq is not None:
+                if self._seq_last is not None:
+                    sent = (seq - self._seq_last) & 0xFFFF  # 16-bit RTP sequence wraps
+                self._seq_last = seq
+            self.stats["packets_sent"] += sent
+            self._rate.add_many(now, sent, sent * packet_bytes(self.fmt))
+            if q_n is not None:
+                self.stats["queue_buffers"] = q_n
+                self.stats["queue_fill_pct"] = round(100.0 * q_bufs / q_max, 1)
+
+    def stats_snapshot(self):
+        with self._stats_lock:
+            r = self._rate.snapshot(time.time())
+            s = dict(self.stats)
+        s["pps_recent"] = r["pps"]
+        s["bps_recent"] = r["bps"]
+        s["source"] = self.source
+        s["device"] = self.device
+        s["format"] = f"{self.fmt['encoding']}/{self.fmt['channels']}ch/{self.fmt['ptime_us']}us"
+        s["destinations"] = [f"{h}:{p}" for h, p in self.destinations]
+        try:
+            s["ssrc"] = int(self.pay.get_property("ssrc"))
+            s["freq"] = float(self.src.get_property("freq")) if self.source == "sine" else None
+        except Exception:
+            pass
+        return s
+
+    # ---------- live changes ----------
+    def set_sine_freq(self, freq):
+        if self.source != "sine":
+            return False
+        self.src.set_property("freq", float(max(20, min(20000, int(freq)))))
+        return True
+
+    def set_ssrc(self, ssrc):
+        self.pay.set_property("ssrc", int(ssrc) & 0xFFFFFFFF)
+        # The payloader picks up a new SSRC when it renegotiates its src caps
+        self.pay.get_static_pad("src").mark_reconfigure()
+        return True
+
+    def set_source(self, cfg):
+        """Swap the source element in place; False if the new source could not start."""
+        Gst = self.Gst
+        new_src, kind, dev = self._make_source(cfg)
+        old = self.src
+        old.set_state(Gst.State.NULL)  # stops its streaming thread
+        old.unlink(self.aconv)
+        self.pipeline.remove(old)
+        self.pipeline.add(new_src)
+        new_src.link(self.aconv)
+        if not new_src.sync_state_with_parent() or new_src.get_state(self.START_TIMEOUT_SEC * Gst.SECOND)[0] == Gst.StateChangeReturn.FAILURE:
+            new_src.set_state(Gst.State.NULL)
+            self.src = new_src
+            return False
+        self.src, self.source, self.device = new_src, kind, dev
+        return True
+
+    def set_destinations(self, dests):
+        """Send to exactly these (host, port) pairs; one encode, one packet copy per channel."""
+        dests = [(h, int(p)) for h, p in dests]
+        if dests == self.destinations:
+            return
+        # udpsink is a multiudpsink: its client list can be edited while playing
+        self.sink.emit("clear")
+        for host, port in dests:
+            self.sink.emit("add", host, port)
+        self.destinations = dests
+        print("TX sending to", ", ".join(f"{h}:{p}" for h, p in dests) or "nobody")
+
+    def set_probe(self, probe, cfg):
+        """Swap in latency-probe ticks (a LatencyProbe) or restore the configured source (None)."""
+        if probe is self.probe:
+            return True
+        self.probe = probe
+        return self.set_source(cfg)
+
+    def apply_live(self, changed: dict, cfg: dict):
+        """Apply TX_LIVE_KEYS/TX_DEST_KEYS changes to the running pipeline. False means restart instead."""
+        if self.pipeline is None or any(k in changed for k in TX_FORMAT_KEYS):
+            return False
+        if "tx_source" in changed or ("tx_mic_device" in changed and (cfg.get("tx_source") or "sine") == "mic"):
+            if not self.set_source(cfg):
+                return False
+        elif "tx_sine_freq" in changed:
+            self.set_sine_freq(cfg.get("tx_sine_freq") or 1000)
+        if "tx_ssrc" in changed:
+            self.set_ssrc(cfg.get("tx_ssrc") or 12345678)
+        if any(k in changed for k in TX_DEST_KEYS):
+            self.set_destinations(tx_destinations(cfg))
+        return True
+
+
+def start_tx(cfg: dict):
+    """
+    Sends to every channel in cfg['tx_channels'] (default: main, i.e.
+    cfg['tx_multicast']:cfg['tx_port']) in the configured stream format
+    (audio_encoding/audio_channels/audio_ptime_us; default L16/mono/4 ms).
+    """
+    global _worker
+    with _lock:
+        stop_tx()
+        w = TxWorker()
+        w.probe = _probe
+        w.start(cfg)  # raises RuntimeError with a user-facing hint on failure
+        _worker = w
+
+
+def stop_tx():
+    global _worker
+    with _lock:
+        w, _worker = _worker, None
+        if w is not None:
+            try: w.stop()
+            except Exception: pass
+
 
 def is_running():
-    return _proc is not None and _proc.poll() is None
+    w = _worker
+    return w is not None and w.is_running()
+
+
+def tx_stats():
+    w = _worker
+    if w is None:
+        return {"state": "stopped"}
+    return w.stats_snapshot()
+
+
+def set_tx_probe(probe, cfg: dict):
+    """Start (LatencyProbe) or end (None) latency-probe ticks; False if the sender could not switch."""
+    global _probe
+    with _lock:
+        _probe = probe
+        w = _worker
+        if w is None:
+            return probe is None
+        return w.set_probe(probe, cfg)
+
+
+def apply_tx_config(changed: dict, cfg: dict):
+    """Push live-changeable keys into a running sender; restarts it when that isn't possible."""
+    with _lock:
+        w = _worker
+        if w is None:
+            return
+        if not w.apply_live(changed, cfg):
+            print("TX live change not possible, restarting sender")
+            start_tx(cfg)
@@ -0,0 +1,36 @@
+# backend/vad.py
+
+
+class VoiceGate:
+    """
+    Per-talker noise gate / voice activity detector, fed with the talker's meter readings.
+
+    Opens on the first reading whose peak reaches `threshold_db` (dBFS) and closes after
+    `hangover_ms` without one, so the gate rides over short pauses. Readings arrive once
+    per meter period for all talkers at once (see RxPartylineWorker._update_gates), so
+    the gate adds no work per packet; in exchange it opens up to one period (50 ms at
+    the default 20 Hz) after a word starts.
+    """
+
+    def __init__(self, threshold_db=-45.0, hangover_ms=300):
+        self.open = False
+        self.peak_db = None   # latest reading
+        self._last_voice = None
+        self.configure(threshold_db, hangover_ms)
+
+    def configure(self, threshold_db, hangover_ms):
+        self.threshold_db = float(threshold_db)
+        self.hangover_sec = max(0.0, float(hangover_ms) / 1000.0)
+
+    def update(self, peak_db, now):
+        """Feed one meter reading (peak dBFS, None for silence) at `now` (monotonic seconds). True when the state changed."""
+        self.peak_db = peak_db
+        if peak_db is not None and peak_db >= self.threshold_db:
+            self._last_voice = now
+            if not self.open:
+                self.open = True
+                return True
+        elif self.open and now - (self._last_voice or now) >= self.hangover_sec:
+            self.open = False
+            return True
+        return False
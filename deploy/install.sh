@@ -127,7 +127,7 @@ WorkingDirectory=${BACKEND_DIR}
 Environment=PYTHONUNBUFFERED=1
 Environment=PYTHONPATH=/usr/lib/python3/dist-packages
 Environment=PATH=${BACKEND_DIR}/venv/bin:/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin
-ExecStart=${BACKEND_DIR}/venv/bin/gunicorn -b 0.0.0.0:8080 --workers 1 --threads 2 --timeout 120 server:app
+ExecStart=${BACKEND_DIR}/venv/bin/gunicorn -b 0.0.0.0:8080 --workers 1 --threads 12 --timeout 120 server:app
 Restart=always
 RestartSec=2
 KillMode=control-group
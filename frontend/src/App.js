@@ -1,6 +1,6 @@
 // frontend/src/App.js
-import React, { useEffect, useState, useCallback } from "react";
-import { API_BASE, apiGet, apiPost } from "./api";
+import React, { useEffect, useState, useCallback, useRef } from "react";
+import { API_BASE, apiGet, apiPost, runJob, openTelemetry } from "./api";
 
 function DbMeter({ db, width = 160 }) {
   // Map -60..0 dBFS to 0..100%
@@ -19,6 +19,23 @@ function DbMeter({ db, width = 160 }) {
   );
 }
 
+// Merge a telemetry delta (see backend/telemetry.py) into the previous state
+const KEYED = ["peers", "channels"];
+function applyTelemetryDelta(prev, d) {
+  const next = { ...prev };
+  for (const [k, v] of Object.entries(d)) {
+    const base = k.endsWith("_removed") ? k.slice(0, -8) : null;
+    if (KEYED.includes(k)) next[k] = { ...(next[k] || {}), ...v };
+    else if (KEYED.includes(base)) {
+      const p = { ...(next[base] || {}) };
+      v.forEach((id) => delete p[id]);
+      next[base] = p;
+    } else if (k === "metrics") next.metrics = { ...(next.metrics || {}), ...v };
+    else next[k] = v;
+  }
+  return next;
+}
+
 export default function App() {
   const [config, setConfig] = useState({
     tx_source: "sine",
@@ -28,9 +45,12 @@ export default function App() {
     tx_ssrc: 12345678,
     tx_multicast: "239.69.69.69",
     tx_port: 5004,
+    audio_encoding: "L16",
+    audio_channels: 1,
+    audio_ptime_us: 4000,
     rx_multicast: "239.69.69.69",
     rx_port: 5004,
-    rx_sink: { mode: "file", path: "mix.wav" },
+    rx_sink: { mode: "segments", path: "recordings", segment_sec: 300, retention_hours: 24, retention_mb: 2048 },
     ssrc_names: { "12345678": "Unit A" },
   });
   const [status, setStatus] = useState({ tx_running: false, rx_running: false });
@@ -41,6 +61,8 @@ export default function App() {
     mix_level_db: null,
   });
   const [peers, setPeers] = useState([]);
+  const [channels, setChannels] = useState([]);
+  const [txStats, setTxStats] = useState({});
   const [mixDb, setMixDb] = useState(null);
   const [micDb, setMicDb] = useState(null);
   const [err, setErr] = useState("");
@@ -49,6 +71,12 @@ export default function App() {
   const [fullUpdate, setFullUpdate] = useState(false);
   const [forceUpdate, setForceUpdate] = useState(false);
   const [updRunning, setUpdRunning] = useState(false);
+  const [downloadMinutes, setDownloadMinutes] = useState(10);
+  const [clipSeconds, setClipSeconds] = useState(30);
+  const [listening, setListening] = useState(false);
+  const [probe, setProbe] = useState({ running: false });
+  const [sapSessions, setSapSessions] = useState([]);
+  const live = useRef({});
 
   const refreshStatus = useCallback(() => {
     return apiGet("/status")
@@ -62,41 +90,101 @@ export default function App() {
 
   useEffect(() => {
     refreshStatus();
-    const t1 = setInterval(() => {
-      if (typeof document !== "undefined" && document.hidden) return; // pause when hidden
-      apiGet("/rx/metrics")
-          .then((m) => {
-            setMetrics(m);
-            if (typeof m.mix_level_db === "number") setMixDb(m.mix_level_db);
-          })
-        .catch((e) => setErr(e.message || String(e)));
-    }, 500);
-
-    const t2 = setInterval(() => {
-      if (typeof document !== "undefined" && document.hidden) return; // pause when hidden
-      apiGet("/rx/peers")
-          .then((r) => {
-            setPeers(r.peers || []);
-            if (typeof r.mix_level_db === "number") setMixDb(r.mix_level_db);
-          })
-        .catch((e) => setErr(e.message || String(e)));
-    }, 500);
-
-      return () => {
-        clearInterval(t1);
-        clearInterval(t2);
-      };
-    }, [refreshStatus]);
-
-  // Poll mic VU level
+  }, [refreshStatus]);
+
+  // Live metrics, peers and meters pushed by the backend; polling only when SSE is unavailable
   useEffect(() => {
-    const t = setInterval(() => {
-      if (typeof document !== "undefined" && document.hidden) return;
-      apiGet("/monitor/mic/level")
-        .then((v) => setMicDb(typeof v.db === "number" ? v.db : null))
-        .catch(() => {});
-    }, 300);
-    return () => clearInterval(t);
+    let es = null;
+    let polls = [];
+    let retry = null;
+    const show = (t) => {
+      live.current = t;
+      setMetrics(t.metrics || {});
+      setPeers(
+        Object.values(t.peers || {}).sort(
+          (a, b) => (a.name || "").localeCompare(b.name || "") || (a.ssrc || 0) - (b.ssrc || 0)
+        )
+      );
+      setChannels(Object.values(t.channels || {}));
+      setMixDb(typeof t.mix_level_db === "number" ? t.mix_level_db : null);
+      setMicDb(typeof t.mic_db === "number" ? t.mic_db : null);
+      setStatus({ tx_running: !!t.tx_running, rx_running: !!t.rx_running });
+      setTxStats(t.tx || {});
+    };
+    const stopPolling = () => {
+      polls.forEach(clearInterval);
+      polls = [];
+    };
+    // the old poll loop, used while /events refuses us (503: every stream slot taken)
+    const startPolling = () => {
+      if (polls.length) return;
+      polls = [
+        setInterval(() => {
+          apiGet("/rx/metrics")
+            .then((m) => {
+              setMetrics(m);
+              if (typeof m.mix_level_db === "number") setMixDb(m.mix_level_db);
+            })
+            .catch((e) => setErr(e.message || String(e)));
+        }, 500),
+        setInterval(() => {
+          apiGet("/rx/peers")
+            .then((r) => setPeers(r.peers || []))
+            .catch((e) => setErr(e.message || String(e)));
+        }, 500),
+        setInterval(() => {
+          apiGet("/monitor/mic/level")
+            .then((v) => setMicDb(typeof v.db === "number" ? v.db : null))
+            .catch(() => {});
+        }, 300),
+      ];
+    };
+    const open = () => {
+      if (es) return;
+      if (typeof EventSource === "undefined") {
+        startPolling();
+        return;
+      }
+      es = openTelemetry(300, {
+        onSnapshot: (t) => {
+          stopPolling();
+          show(t);
+        },
+        onDelta: (d) => show(applyTelemetryDelta(live.current, d)),
+        // voice gate changes arrive as they happen, ahead of the next delta
+        onTalk: (ev) => {
+          const p = ev.channel === "main" && (live.current.peers || {})[String(ev.ssrc)];
+          if (p) show(applyTelemetryDelta(live.current, { peers: { [String(ev.ssrc)]: { ...p, talking: ev.talking } } }));
+        },
+        // EventSource retries network drops itself; an HTTP error (503) closes it for good
+        onError: () => {
+          if (!es || es.readyState !== EventSource.CLOSED) return;
+          es = null;
+          startPolling();
+          if (!retry) {
+            retry = setTimeout(() => {
+              retry = null;
+              if (!document.hidden) open();
+            }, 30000);
+          }
+        },
+      });
+    };
+    const close = () => {
+      if (es) es.close();
+      es = null;
+      stopPolling();
+      clearTimeout(retry);
+      retry = null;
+    };
+    // pause when hidden
+    const onVis = () => (document.hidden ? close() : open());
+    if (!document.hidden) open();
+    document.addEventListener("visibilitychange", onVis);
+    return () => {
+      document.removeEventListener("visibilitychange", onVis);
+      close();
+    };
   }, []);
 
   useEffect(() => {
@@ -125,7 +213,7 @@ export default function App() {
   };
 
   const restartBoth = () =>
-    apiPost("/restart")
+    runJob("/restart")
       .then(refreshStatus)
       .catch((e) => setErr(e.message || String(e)));
   const restartBackend = () =>
@@ -155,34 +243,86 @@ export default function App() {
     }, 1500);
     return () => clearInterval(iv);
   }, [updRunning]);
+  // Latency probe: poll its results while it runs
+  useEffect(() => {
+    if (!probe.running) return;
+    const iv = setInterval(() => {
+      apiGet("/probe/latency").then(setProbe).catch(() => {});
+    }, 1000);
+    return () => clearInterval(iv);
+  }, [probe.running]);
+  const startProbe = () =>
+    runJob("/probe/latency/start", { interval_ms: 1000 })
+      .then((job) => setProbe((job.result || {}).probe || { running: true }))
+      .catch((e) => setErr(e.message || String(e)));
+  const stopProbe = () =>
+    runJob("/probe/latency/stop")
+      .then((job) => setProbe((job.result || {}).probe || { running: false }))
+      .catch((e) => setErr(e.message || String(e)));
+  const ms = (v) => (typeof v === "number" ? `${v.toFixed(1)} ms` : "--");
+
+  // Party-line channels (backend/channels.py): talk toggles tx_channels, listen starts/stops that channel's RX
+  const toggleTalk = (name) => {
+    const cur = Array.isArray(config.tx_channels) ? config.tx_channels : ["main"];
+    const tx_channels = cur.includes(name) ? cur.filter((n) => n !== name) : [...cur, name];
+    apiPost("/config", { tx_channels })
+      .then(refreshStatus)
+      .catch((e) => setErr(e.message || String(e)));
+  };
+  const channelRx = (name, on) =>
+    runJob(`/ch/${encodeURIComponent(name)}/${on ? "start" : "stop"}/rx`)
+      .then(refreshStatus)
+      .catch((e) => setErr(e.message || String(e)));
+
+  // Streams announced over SAP (backend/sap.py); "Receive" points the main channel at one
+  useEffect(() => {
+    const load = () =>
+      apiGet("/sap")
+        .then((r) => setSapSessions((r.sessions || []).filter((s) => !s.own)))
+        .catch(() => {});
+    load();
+    const iv = setInterval(load, 5000);
+    return () => clearInterval(iv);
+  }, []);
+  const receiveStream = (s) =>
+    apiPost("/config", { rx_multicast: s.group, rx_port: s.port })
+      .then(refreshStatus)
+      .catch((e) => setErr(e.message || String(e)));
+  const fmtLabel = (s) =>
+    `${s.encoding || "?"}/${s.channels || "?"}ch` + (s.ptime_ms != null ? ` ${s.ptime_ms} ms` : "");
+
   const startMicMonitor = () =>
-    apiPost("/monitor/mic/start")
+    runJob("/monitor/mic/start")
       .then(() => setErr(""))
       .catch((e) => setErr(e.message || String(e)));
   const stopMicMonitor = () =>
-    apiPost("/monitor/mic/stop")
+    runJob("/monitor/mic/stop")
       .then(() => setErr(""))
       .catch((e) => setErr(e.message || String(e)));
   const startTx = () =>
-    apiPost("/start/tx")
+    runJob("/start/tx")
       .then(refreshStatus)
       .catch((e) => setErr(e.message || String(e)));
   const startRx = () =>
-    apiPost("/start/rx")
+    runJob("/start/rx?all=1")
       .then(refreshStatus)
       .catch((e) => setErr(e.message || String(e)));
   const stopTx = () =>
-    apiPost("/stop/tx")
+    runJob("/stop/tx")
       .then(refreshStatus)
       .catch((e) => setErr(e.message || String(e)));
   const stopRx = () =>
-    apiPost("/stop/rx")
+    runJob("/stop/rx?all=1")
       .then(refreshStatus)
       .catch((e) => setErr(e.message || String(e)));
 
-  const downloadMix = async () => {
+  const downloadMix = () => downloadFile(`/download/mix?minutes=${encodeURIComponent(downloadMinutes)}`);
+  const downloadClip = (ssrc) =>
+    downloadFile(`/rx/clip?seconds=${encodeURIComponent(clipSeconds)}${ssrc != null ? `&ssrc=${ssrc}` : ""}`);
+
+  const downloadFile = async (path) => {
     try {
-      const res = await fetch(`${API_BASE}/download/mix`, { cache: "no-store" });
+      const res = await fetch(`${API_BASE}${path}`, { cache: "no-store" });
       if (!res.ok) {
         const t = await res.text().catch(() => "");
         throw new Error(`download -> ${res.status}${t ? " " + t : ""}`);
@@ -191,7 +331,9 @@ export default function App() {
       const url = window.URL.createObjectURL(blob);
       const a = document.createElement("a");
       a.href = url;
-      a.download = "mix.wav";
+      const cd = res.headers.get("Content-Disposition") || "";
+      const m = cd.match(/filename="?([^";]+)"?/);
+      a.download = m ? m[1] : "mix.wav";
       document.body.appendChild(a);
       a.click();
       a.remove();
@@ -246,6 +388,13 @@ export default function App() {
         <div>
           PPS: {metrics.pps_recent?.toFixed?.(1) || 0} · BPS: {Math.round(metrics.bps_recent || 0)}
         </div>
+        {txStats.state && txStats.state !== "stopped" && (
+          <div>
+            TX {txStats.source || ""}: {txStats.packets_sent || 0} pkts · {Math.round(txStats.pps_recent || 0)} pps ·
+            xruns {txStats.capture_xruns || 0} · queue {txStats.queue_fill_pct ?? 0}%
+            {txStats.last_error ? ` · ${txStats.last_error}` : ""}
+          </div>
+        )}
       </div>
 
       <div style={{ margin: "8px 0 18px" }}>
@@ -262,6 +411,48 @@ export default function App() {
       </div>
 
       <form onSubmit={saveConfig} style={{ display: "grid", gap: "0.75rem" }}>
+        <fieldset style={{ padding: 12 }}>
+          <legend>Stream format (TX and RX)</legend>
+          <label>
+            Encoding:
+            <select
+              value={config.audio_encoding || "L16"}
+              onChange={(e) => setConfig({ ...config, audio_encoding: e.target.value })}
+              style={{ marginLeft: 8 }}
+            >
+              <option value="L16">L16 (16-bit)</option>
+              <option value="L24">L24 (24-bit)</option>
+            </select>
+          </label>
+          <label style={{ marginLeft: 12 }}>
+            Channels:
+            <select
+              value={Number(config.audio_channels || 1)}
+              onChange={(e) => setConfig({ ...config, audio_channels: Number(e.target.value) })}
+              style={{ marginLeft: 8 }}
+            >
+              <option value={1}>1 (mono)</option>
+              <option value={2}>2 (stereo)</option>
+            </select>
+          </label>
+          <label style={{ marginLeft: 12 }}>
+            Packet time:
+            <select
+              value={Number(config.audio_ptime_us || 4000)}
+              onChange={(e) => setConfig({ ...config, audio_ptime_us: Number(e.target.value) })}
+              style={{ marginLeft: 8 }}
+            >
+              <option value={4000}>4 ms (lowest load)</option>
+              <option value={1000}>1 ms (AES67 default)</option>
+              <option value={250}>250 µs</option>
+              <option value={125}>125 µs (dedicated network)</option>
+            </select>
+          </label>
+          <div style={{ fontSize: 12, color: "#666", marginTop: 4 }}>
+            Changing the format restarts TX and rebuilds RX. All units on the group must use the same format.
+          </div>
+        </fieldset>
+
         <fieldset style={{ padding: 12 }}>
           <legend>TX (Sender)</legend>
 
@@ -394,20 +585,84 @@ export default function App() {
             style={{ marginLeft: 8, width: 140 }}
           />
         </label>
+        <label style={{ marginLeft: 12 }}>
+          Drop idle talkers after (s, 0 = never):
+          <input
+            type="number"
+            min={0}
+            value={Number(config.rx_idle_timeout_sec ?? 30)}
+            onChange={(e) => setConfig({ ...config, rx_idle_timeout_sec: Number(e.target.value || 0) })}
+            style={{ marginLeft: 8, width: 80 }}
+          />
+        </label>
+        <div style={{ marginTop: 8 }}>
+          <label>
+            Jitterbuffer:
+            <select
+              value={config.rx_jb_mode || "fixed"}
+              onChange={(e) => setConfig({ ...config, rx_jb_mode: e.target.value })}
+              style={{ marginLeft: 8 }}
+            >
+              <option value="fixed">Fixed</option>
+              <option value="adaptive">Adaptive per talker</option>
+            </select>
+          </label>
+          {[
+            ["rx_jb_latency_ms", (config.rx_jb_mode || "fixed") === "adaptive" ? "Start (ms)" : "Latency (ms)", 100],
+            ...((config.rx_jb_mode || "fixed") === "adaptive"
+              ? [
+                  ["rx_jb_min_ms", "Min (ms)", 10],
+                  ["rx_jb_max_ms", "Max (ms)", 200],
+                ]
+              : []),
+          ].map(([key, label, def]) => (
+            <label key={key} style={{ marginLeft: 12 }}>
+              {label}:
+              <input
+                type="number"
+                min={0}
+                value={Number(config[key] ?? def)}
+                onChange={(e) => setConfig({ ...config, [key]: Number(e.target.value || 0) })}
+                style={{ marginLeft: 8, width: 70 }}
+              />
+            </label>
+          ))}
+        </div>
+        <label style={{ marginLeft: 12 }}>
+          Replay buffer (min, 0 = off):
+          <input
+            type="number"
+            min={0}
+            value={Number(config.rx_ring_minutes ?? 5)}
+            onChange={(e) => setConfig({ ...config, rx_ring_minutes: Number(e.target.value || 0) })}
+            style={{ marginLeft: 8, width: 60 }}
+          />
+        </label>
+        <label style={{ marginLeft: 12 }}>
+          per talker (min):
+          <input
+            type="number"
+            min={0}
+            value={Number(config.rx_ring_talker_minutes ?? 0)}
+            onChange={(e) => setConfig({ ...config, rx_ring_talker_minutes: Number(e.target.value || 0) })}
+            style={{ marginLeft: 8, width: 60 }}
+          />
+        </label>
       </div>
           <div style={{ marginTop: 8 }}>
             <label>
               Sink:
               <select
-                value={config.rx_sink?.mode || "file"}
+                value={config.rx_sink?.mode || "segments"}
                 onChange={(e) => setConfig({ ...config, rx_sink: { ...(config.rx_sink || {}), mode: e.target.value } })}
                 style={{ marginLeft: 8 }}
               >
+                <option value="segments">Record rotating WAV segments</option>
                 <option value="file">Write mixed WAV</option>
                 <option value="auto">Play on device (autoaudiosink)</option>
               </select>
             </label>
-            {(config.rx_sink?.mode || "file") === "file" && (
+            {config.rx_sink?.mode === "file" && (
               <label style={{ marginLeft: 12 }}>
                 File path:
                 <input
@@ -419,6 +674,41 @@ export default function App() {
                 />
               </label>
             )}
+            {(config.rx_sink?.mode || "segments") === "segments" && (
+              <span>
+                <label style={{ marginLeft: 12 }}>
+                  Directory:
+                  <input
+                    value={config.rx_sink?.path || "recordings"}
+                    onChange={(e) =>
+                      setConfig({ ...config, rx_sink: { ...(config.rx_sink || {}), path: e.target.value } })
+                    }
+                    style={{ marginLeft: 8, width: 160 }}
+                  />
+                </label>
+                {[
+                  ["segment_sec", "Segment (s)", 300],
+                  ["retention_hours", "Keep (h)", 24],
+                  ["retention_mb", "Keep (MB)", 2048],
+                ].map(([key, label, def]) => (
+                  <label key={key} style={{ marginLeft: 12 }}>
+                    {label}:
+                    <input
+                      type="number"
+                      min={0}
+                      value={Number(config.rx_sink?.[key] ?? def)}
+                      onChange={(e) =>
+                        setConfig({
+                          ...config,
+                          rx_sink: { ...(config.rx_sink || {}), [key]: Number(e.target.value || 0) },
+                        })
+                      }
+                      style={{ marginLeft: 8, width: 80 }}
+                    />
+                  </label>
+                ))}
+              </span>
+            )}
           </div>
         </fieldset>
 
@@ -441,12 +731,143 @@ export default function App() {
           <button type="button" onClick={stopTx}>Stop TX</button>
           <button type="button" onClick={startRx}>Start RX</button>
           <button type="button" onClick={stopRx}>Stop RX</button>
+          <button type="button" onClick={() => setListening(!listening)} disabled={!status.rx_running && !listening}>
+            {listening ? "Stop listening" : "Listen"}
+          </button>
+          {listening && (
+            <audio
+              src={`${API_BASE}/listen`}
+              autoPlay
+              controls
+              onError={() => {
+                setListening(false);
+                setErr("Live stream ended or unavailable");
+              }}
+              style={{ height: 28 }}
+            />
+          )}
           <button type="button" onClick={downloadMix}>Download mix</button>
+          <button type="button" onClick={() => downloadClip(null)} disabled={!Number(config.rx_ring_minutes ?? 5)}>
+            Clip last
+          </button>
+          <label style={{ display: "inline-flex", alignItems: "center", gap: 6 }}>
+            <input
+              type="number"
+              min={1}
+              value={clipSeconds}
+              onChange={(e) => setClipSeconds(Number(e.target.value || 30))}
+              style={{ width: 60 }}
+            />
+            s
+          </label>
+          {(config.rx_sink?.mode || "segments") === "segments" && (
+            <label style={{ display: "inline-flex", alignItems: "center", gap: 6 }}>
+              last
+              <input
+                type="number"
+                min={1}
+                value={downloadMinutes}
+                onChange={(e) => setDownloadMinutes(Number(e.target.value || 10))}
+                style={{ width: 60 }}
+              />
+              min
+            </label>
+          )}
           <button type="button" onClick={startMicMonitor}>Monitor Mic</button>
           <button type="button" onClick={stopMicMonitor}>Stop Monitor</button>
         </div>
       </form>
 
+      <div style={{ marginTop: 16, fontSize: 14 }}>
+        <strong>Latency probe</strong>{" "}
+        <button type="button" onClick={probe.running ? stopProbe : startProbe}
+          disabled={!probe.running && !(status.tx_running && status.rx_running)}>
+          {probe.running ? "Stop probe" : "Measure TX→RX latency"}
+        </button>
+        {probe.samples != null && (
+          <span style={{ marginLeft: 8 }}>
+            min {ms(probe.min_ms)} · median {ms(probe.median_ms)} · p99 {ms(probe.p99_ms)} · {probe.samples} ticks
+            {probe.unmatched ? ` · ${probe.unmatched} missed` : ""}
+            {probe.settings && !probe.settings.loopback ? " · TX and RX use different groups, no ticks will arrive" : ""}
+          </span>
+        )}
+        {probe.running && (
+          <div style={{ fontSize: 12, color: "#666" }}>
+            TX is sending ticks instead of its normal audio until the probe is stopped.
+          </div>
+        )}
+      </div>
+
+      {channels.length > 1 && (
+        <div>
+          <h3 style={{ marginTop: 24 }}>Channels</h3>
+          <table style={{ width: "100%", borderCollapse: "collapse" }}>
+            <thead>
+              <tr style={{ textAlign: "left", borderBottom: "1px solid #ddd" }}>
+                <th style={{ padding: "6px 0" }}>Name</th>
+                <th>RX group</th>
+                <th>TX group</th>
+                <th>Talkers</th>
+                <th>Mix</th>
+                <th>Talk</th>
+                <th>Listen</th>
+              </tr>
+            </thead>
+            <tbody>
+              {channels.map((c) => (
+                <tr key={c.name} style={{ borderBottom: "1px solid #f1f1f1" }}>
+                  <td style={{ padding: "6px 0" }}>{c.name}</td>
+                  <td><code>{c.rx}</code></td>
+                  <td><code>{c.tx}</code></td>
+                  <td>{c.running ? c.talkers : "--"}</td>
+                  <td><DbMeter db={c.mix_level_db} /></td>
+                  <td>
+                    <input type="checkbox" checked={!!c.talk} onChange={() => toggleTalk(c.name)} />
+                  </td>
+                  <td>
+                    <button type="button" onClick={() => channelRx(c.name, !c.running)}>
+                      {c.running ? "Stop" : "Start"}
+                    </button>
+                  </td>
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        </div>
+      )}
+
+      {sapSessions.length > 0 && (
+        <div>
+          <h3 style={{ marginTop: 24 }}>Discovered Streams</h3>
+          <table style={{ width: "100%", borderCollapse: "collapse" }}>
+            <thead>
+              <tr style={{ textAlign: "left", borderBottom: "1px solid #ddd" }}>
+                <th style={{ padding: "6px 0" }}>Name</th>
+                <th>Group</th>
+                <th>Format</th>
+                <th>Origin</th>
+                <th></th>
+              </tr>
+            </thead>
+            <tbody>
+              {sapSessions.map((s) => (
+                <tr key={s.id} style={{ borderBottom: "1px solid #f1f1f1" }}>
+                  <td style={{ padding: "6px 0" }}>{s.name || s.id}</td>
+                  <td><code>{`${s.group}:${s.port}`}</code></td>
+                  <td title={s.reason || ""} style={{ color: s.usable ? undefined : "#999" }}>{fmtLabel(s)}</td>
+                  <td>{s.origin}</td>
+                  <td>
+                    {s.usable && (config.rx_multicast !== s.group || Number(config.rx_port) !== s.port) && (
+                      <button type="button" onClick={() => receiveStream(s)}>Receive</button>
+                    )}
+                  </td>
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        </div>
+      )}
+
       <h3 style={{ marginTop: 24 }}>Active Talkers</h3>
       <table style={{ width: "100%", borderCollapse: "collapse" }}>
         <thead>
@@ -455,13 +876,24 @@ export default function App() {
             <th>SSRC</th>
             <th>Packets</th>
             <th>Level</th>
+            <th title="RFC 3550 cumulative loss">Loss</th>
+            <th title="RFC 3550 interarrival jitter">Jitter</th>
+            <th title="Dropped by the jitterbuffer as late">Late</th>
+            <th title="Jitterbuffer latency (adaptive target in brackets)">JB</th>
+            <th title="Talker clock skew vs ours (+ = fast); the correction being applied in brackets">Drift</th>
             <th>Last seen (s)</th>
           </tr>
         </thead>
         <tbody>
           {(peers || []).map((p, i) => (
             <tr key={i} style={{ borderBottom: "1px solid #f1f1f1" }}>
-              <td style={{ padding: "6px 0" }}>{p.name || ""}</td>
+              <td style={{ padding: "6px 0", fontWeight: p.talking ? "bold" : "normal" }}
+                title={p.talking == null ? "" : p.talking ? "Talking" : "Gated (silent)"}>
+                {p.talking != null && (
+                  <span style={{ color: p.talking ? "#2a2" : "#ccc", marginRight: 6 }}>●</span>
+                )}
+                {p.name || ""}
+              </td>
               <td><code>{p.ssrc}</code></td>
               <td>{p.packets}</td>
               <td>
@@ -472,12 +904,33 @@ export default function App() {
                   </span>
                 </div>
               </td>
-              <td>{p.last_seen_sec}</td>
+              <td>
+                {p.lost != null ? `${p.lost}` : "--"}
+                {p.loss_pct != null ? ` (${p.loss_pct.toFixed(2)}%)` : ""}
+              </td>
+              <td>{p.jitter_ms != null ? `${p.jitter_ms.toFixed(2)} ms` : "--"}</td>
+              <td>{p.late != null ? p.late : "--"}</td>
+              <td>
+                {p.jb_latency_ms != null ? `${p.jb_latency_ms} ms` : "--"}
+                {p.jb_target_ms != null && p.jb_target_ms !== p.jb_latency_ms ? ` (${p.jb_target_ms})` : ""}
+              </td>
+              <td>
+                {p.drift_ppm != null ? `${p.drift_ppm.toFixed(1)} ppm` : "--"}
+                {p.drift_comp_ppm != null && p.drift_ppm != null ? ` (${p.drift_comp_ppm.toFixed(1)})` : ""}
+              </td>
+              <td>
+                {p.last_seen_sec}
+                {Number(config.rx_ring_talker_minutes || 0) > 0 && (
+                  <button type="button" onClick={() => downloadClip(p.ssrc)} style={{ marginLeft: 8 }}>
+                    Clip
+                  </button>
+                )}
+              </td>
             </tr>
           ))}
           {(!peers || peers.length === 0) && (
             <tr>
-              <td colSpan="5" style={{ padding: "8px 0", color: "#666" }}>
+              <td colSpan="10" style={{ padding: "8px 0", color: "#666" }}>
                 No talkers detected yet.
               </td>
             </tr>
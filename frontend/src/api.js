@@ -33,3 +33,29 @@ export const apiGet = (path) => request(path, { method: 'GET' });
 // POST helpers
 export const apiPost = (path, body = {}) =>
   request(path, { method: 'POST', body: JSON.stringify(body) });
+
+// Lifecycle operations (start/stop/restart) run as backend jobs: POST, then poll
+// /jobs/<id> until it finishes. Resolves with the job; rejects with its error.
+export const runJob = async (path, body = {}, pollMs = 300) => {
+  const r = await apiPost(path, body);
+  let job = r.job;
+  while (job && (job.state === 'queued' || job.state === 'running')) {
+    await new Promise((res) => setTimeout(res, pollMs));
+    job = await apiGet(`/jobs/${job.id}`);
+  }
+  if (job && job.state === 'failed') {
+    throw new Error(job.hint ? `${job.error}. ${job.hint}` : job.error);
+  }
+  return job;
+};
+
+// Live telemetry (Server-Sent Events): a "snapshot" followed by "delta" events.
+// Returns the EventSource; call .close() to stop.
+export const openTelemetry = (intervalMs, { onSnapshot, onDelta, onTalk, onError } = {}) => {
+  const es = new EventSource(`${API_BASE}/events?interval=${intervalMs}`);
+  es.addEventListener('snapshot', (e) => onSnapshot && onSnapshot(JSON.parse(e.data)));
+  es.addEventListener('delta', (e) => onDelta && onDelta(JSON.parse(e.data)));
+  es.addEventListener('talk', (e) => onTalk && onTalk(JSON.parse(e.data)));
+  if (onError) es.onerror = onError;
+  return es;
+};